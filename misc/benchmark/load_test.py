@@ -0,0 +1,268 @@
+# load_test.py
+#
+# MainTab.process_message 전체 경로(페르소나 말투 → 입장 제어/생성 → DB 저장)에 동시 세션 부하를 걸어
+# 동시성 단계별 지연 시간 분포(p50/p95/p99)와 처리량을 측정합니다.
+#   - stub 백엔드: 모델 없이 첫 토큰 지연 + 토큰당 지연을 흉내 내는 핸들러 (용량 계획/대기열 동작 확인용)
+#   - tiny 백엔드: tiny_models.py의 초소형 무작위 Llama 모델로 실제 generate 경로 실행
+# 부하 모델:
+#   - closed: 동시 사용자 N명이 응답을 받은 뒤 think time 후 다음 턴을 보냄
+#   - open: 세션이 --arrival-rate (세션/초) 포아송 과정으로 도착
+#
+# 사용 예:
+#   python misc/benchmark/load_test.py --concurrency 1 2 4 8 --sessions 32 --turns 2 4
+#   python misc/benchmark/load_test.py --backend tiny --mode open --arrival-rate 2 -- --max-concurrent-generations 2
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+STUB_MODEL_ID = "stub/echo"
+TINY_MODEL_ID = "tiny-random/llama"
+
+USER_MESSAGES = [
+    "안녕하세요. 오늘 날씨가 어떤가요?",
+    "간단한 파이썬 예제를 보여 주세요.",
+    "존댓말로 말해줘",
+    "반말로 해도 돼",
+    "Tell me a short story about a fox.",
+    "今日は何をしましょうか？",
+    "这个周末有什么计划？",
+]
+
+class StubHandler:
+    """
+    모델 없이 생성 시간을 흉내 내는 핸들러.
+    현재 요청의 GenerationControl을 토큰마다 검사하므로 중지/마감/토큰 예산과 요청 지표가 실제 핸들러처럼 동작한다.
+    """
+    def __init__(self, ttft=0.05, per_token=0.01, tokens=32):
+        self.model_id = STUB_MODEL_ID
+        self.ttft = ttft
+        self.per_token = per_token
+        self.tokens = tokens
+
+    def generate_answer(self, history, generation_overrides=None):
+        from src.model_handlers.generation_control import current_generation_control
+        control = current_generation_control()
+        prompt_tokens = sum(len(msg["content"].split()) for msg in history)
+        tokens = (generation_overrides or {}).get("max_new_tokens") or self.tokens
+        time.sleep(self.ttft)
+        words = []
+        for i in range(tokens):
+            if i > 0:
+                time.sleep(self.per_token)
+            words.append(f"토큰{i}")
+            if control is not None:
+                control.mark_first_token(prompt_tokens)
+                if control.should_stop(i + 1):
+                    break
+        return "네, 알겠습니다. " + " ".join(words)
+
+def _import_app(app_args):
+    """앱 모듈은 import 시점에 전역 인자를 읽으므로 부하 테스트 인자 대신 app_args를 넘긴다."""
+    saved_argv = sys.argv
+    sys.argv = [saved_argv[0]] + list(app_args)
+    try:
+        from src.tabs import main_tab as main_tab_module
+        from src.common import database
+        from src.common.cache import models_cache
+        from src.common.utils import build_model_cache_key
+        from src.common.translations import translation_manager
+        from src.model_handlers.load_options import resolve_load_options, describe_load_options
+        from src.model_handlers.compiled_generation import resolve_compile_generation
+        from src.model_handlers.speculative import resolve_speculative
+    finally:
+        sys.argv = saved_argv
+    database.initialize_app(translation_manager)
+
+    def install_stub(handler):
+        # generate_answer가 찾는 캐시 키에 스텁 핸들러를 미리 넣어 둔다.
+        cpu_quantization, attn_implementation = resolve_load_options(None, None)
+        load_options = describe_load_options(cpu_quantization, attn_implementation, resolve_compile_generation(None), resolve_speculative(None, STUB_MODEL_ID))
+        models_cache[build_model_cache_key(STUB_MODEL_ID, "transformers", load_options=load_options)] = handler
+        if STUB_MODEL_ID not in main_tab_module.transformers_local:
+            main_tab_module.transformers_local.append(STUB_MODEL_ID)
+
+    return main_tab_module, install_stub
+
+def percentile(values, q):
+    """nearest-rank 백분위수"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+class LoadRunner:
+    def __init__(self, main_tab, model_id, turns=(2, 4), think_time=0.0, max_new_tokens=None, seed=0):
+        self.main_tab = main_tab
+        self.model_id = model_id
+        self.turns = turns
+        self.think_time = think_time
+        self.overrides = {"max_new_tokens": max_new_tokens, "do_sample": False} if max_new_tokens else None
+        self.random = random.Random(seed)
+        self.character = next(iter(main_tab.characters))
+        self._lock = threading.Lock()
+        self.samples = []
+        self._session_counter = 0
+
+    def _new_session_id(self):
+        with self._lock:
+            self._session_counter += 1
+            return f"loadtest_{self._session_counter}"
+
+    def run_session(self):
+        """세션 하나의 대화를 끝까지 진행하며 턴별 지연 시간을 기록"""
+        with self._lock:
+            turns = self.random.randint(*self.turns)
+            messages = [self.random.choice(USER_MESSAGES) for _ in range(turns)]
+        session_id = self._new_session_id()
+        history = []
+        for turn, user_input in enumerate(messages):
+            start = time.perf_counter()
+            _, history, _, status = self.main_tab.process_message(
+                user_input, session_id, history, "당신은 유용한 AI 비서입니다.", self.model_id, None, None, None,
+                "cpu", 0, "ko", self.character, self.overrides
+            )
+            latency = time.perf_counter() - start
+            answer = history[-1]["content"] if history else ""
+            ok = not status and not answer.startswith(("❌", "⚠", "오류 발생"))
+            with self._lock:
+                self.samples.append({"session": session_id, "turn": turn, "latency": latency, "ok": ok, "finished_at": time.perf_counter()})
+            if self.think_time:
+                time.sleep(self.think_time)
+
+    def run_closed(self, concurrency, sessions):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(self.run_session) for _ in range(sessions)]:
+                future.result()
+
+    def run_open(self, arrival_rate, sessions, max_workers=256):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = []
+            for _ in range(sessions):
+                futures.append(pool.submit(self.run_session))
+                time.sleep(self.random.expovariate(arrival_rate))
+            for future in futures:
+                future.result()
+
+def summarize(samples, elapsed):
+    latencies = [s["latency"] for s in samples if s["ok"]]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s["ok"]),
+        "elapsed_sec": elapsed,
+        "throughput_rps": len(samples) / elapsed if elapsed else None,
+        "p50_sec": percentile(latencies, 50),
+        "p95_sec": percentile(latencies, 95),
+        "p99_sec": percentile(latencies, 99),
+        "max_sec": max(latencies) if latencies else None,
+    }
+
+def run_load_test(args, app_args):
+    import logging
+    logging.disable(logging.WARNING)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="easyllm-load-")
+    os.makedirs(workdir, exist_ok=True)
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if args.backend == "tiny":
+            from tiny_models import build_transformers_model
+            build_transformers_model(TINY_MODEL_ID, "llama", "./models", seed=args.seed)
+            model_id = TINY_MODEL_ID
+        else:
+            model_id = STUB_MODEL_ID
+        main_tab_module, install_stub = _import_app(app_args)
+        if args.backend == "stub":
+            install_stub(StubHandler(ttft=args.stub_ttft, per_token=args.stub_per_token, tokens=args.stub_tokens))
+        main_tab = main_tab_module.MainTab()
+
+        report = {
+            "created_at": datetime.now().isoformat(),
+            "backend": args.backend,
+            "mode": args.mode,
+            "app_args": app_args,
+            "settings": {"sessions": args.sessions, "turns": args.turns, "think_time": args.think_time, "max_new_tokens": args.max_new_tokens},
+            "steps": [],
+        }
+        levels = args.concurrency if args.mode == "closed" else args.arrival_rate
+        for level in levels:
+            runner = LoadRunner(main_tab, model_id, tuple(args.turns), args.think_time, args.max_new_tokens, args.seed)
+            print(f"[*] {args.mode} {level} 측정 중...", file=sys.stderr)
+            start = time.perf_counter()
+            if args.mode == "closed":
+                runner.run_closed(int(level), args.sessions)
+            else:
+                runner.run_open(level, args.sessions)
+            step = summarize(runner.samples, time.perf_counter() - start)
+            step["concurrency" if args.mode == "closed" else "arrival_rate"] = level
+            report["steps"].append(step)
+        return report
+    finally:
+        os.chdir(previous_cwd)
+        logging.disable(logging.NOTSET)
+
+def format_table(report):
+    key = "concurrency" if report["mode"] == "closed" else "arrival_rate"
+    header = f"{key:>13}{'requests':>10}{'errors':>8}{'rps':>9}{'p50(s)':>9}{'p95(s)':>9}{'p99(s)':>9}{'max(s)':>9}"
+    lines = [header, "-" * len(header)]
+    fmt = lambda value, spec: format(value, spec) if value is not None else "-"
+    for step in report["steps"]:
+        lines.append(
+            f"{step[key]:>13}{step['requests']:>10}{step['errors']:>8}{fmt(step['throughput_rps'], '>9.2f')}"
+            f"{fmt(step['p50_sec'], '>9.3f')}{fmt(step['p95_sec'], '>9.3f')}{fmt(step['p99_sec'], '>9.3f')}{fmt(step['max_sec'], '>9.3f')}"
+        )
+    return "\n".join(lines)
+
+def parse_args(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # "--" 뒤의 인자는 앱 전역 인자로 전달 (예: --max-concurrent-generations 2)
+    app_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    argv = argv[:argv.index("--")] if "--" in argv else argv
+
+    parser = argparse.ArgumentParser(description="Easy-LLM 채팅 파이프라인 부하 테스트")
+    parser.add_argument("--backend", choices=["stub", "tiny"], default="stub", help="생성 백엔드 (default: %(default)s)")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed", help="부하 모델 (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8], help="closed 모드의 동시 사용자 수 단계 (default: %(default)s)")
+    parser.add_argument("--arrival-rate", type=float, nargs="+", default=[1.0, 2.0, 4.0], help="open 모드의 세션 도착률(세션/초) 단계 (default: %(default)s)")
+    parser.add_argument("--sessions", type=int, default=16, help="단계별 세션 수 (default: %(default)d)")
+    parser.add_argument("--turns", type=int, nargs=2, default=[2, 4], metavar=("MIN", "MAX"), help="세션당 대화 턴 수 범위 (default: %(default)s)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="턴 사이 대기 시간(초) (default: %(default)s)")
+    parser.add_argument("--max-new-tokens", type=int, default=None, help="턴당 생성 토큰 수 (default: 생성 프로필 값)")
+    parser.add_argument("--stub-ttft", type=float, default=0.05, help="stub 백엔드의 첫 토큰 지연(초) (default: %(default)s)")
+    parser.add_argument("--stub-per-token", type=float, default=0.01, help="stub 백엔드의 토큰당 지연(초) (default: %(default)s)")
+    parser.add_argument("--stub-tokens", type=int, default=32, help="stub 백엔드의 기본 생성 토큰 수 (default: %(default)d)")
+    parser.add_argument("--seed", type=int, default=0, help="턴 수/메시지 선택 시드 (default: %(default)d)")
+    parser.add_argument("--workdir", default=None, help="DB/모델을 생성할 작업 디렉토리 (default: 임시 디렉토리)")
+    parser.add_argument("--output", default=None, help="JSON 리포트를 저장할 경로")
+    return parser.parse_args(argv), app_args
+
+def main(argv=None):
+    args, app_args = parse_args(argv)
+    report = run_load_test(args, app_args)
+    print(format_table(report), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[*] 리포트 저장: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+# quant_benchmark.py
+#
+# ./models 아래의 로컬 transformers 모델에 대해 CPU에서 양자화 변형별 성능을 비교합니다.
+#   bf16 / quanto int8 / quanto int4 / torchao int8-dynamic / torch dynamic-int8 (--cpu-quantization)
+# 측정 항목: 로드 시간, 최대 RSS, prefill tokens/sec, decode tokens/sec, perplexity 샘플
+#
+# 사용 예:
+#   python misc/benchmark/quant_benchmark.py --list
+#   python misc/benchmark/quant_benchmark.py Qwen/Qwen2.5-0.5B-Instruct --output bench.json
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.common.resource_usage import get_peak_rss_mb
+
+VARIANTS = ["bf16", "quanto-int8", "quanto-int4", "torchao-int8-dynamic", "dynamic-int8"]
+
+DEFAULT_PROMPT = (
+    "The history of computing is a story of abstraction layered upon abstraction. "
+    "대규모 언어 모델은 수많은 문서를 학습하여 다음 토큰을 예측합니다. "
+    "言語モデルは文脈に基づいて次の単語を予測します。"
+)
+
+DEFAULT_PPL_TEXT = (
+    "Language models assign probabilities to sequences of words. A good model assigns high "
+    "probability to fluent, natural text and low probability to random strings. Perplexity is "
+    "the exponentiated average negative log-likelihood of a sequence, so lower values indicate "
+    "that the model is less surprised by the text. Quantization reduces the precision of the "
+    "weights, which lowers memory usage and can speed up inference on CPUs, but it may also "
+    "increase perplexity slightly. Comparing perplexity before and after quantization on the "
+    "same sample gives a quick sanity check that the quantized variant is still usable."
+)
+
+def list_local_models(models_root="./models"):
+    """./models/transformers 아래에서 config.json이 있는 모델 ID 목록을 반환"""
+    subdir = os.path.join(models_root, "transformers")
+    if not os.path.isdir(subdir):
+        return []
+    return sorted(
+        folder.replace("__", "/")
+        for folder in os.listdir(subdir)
+        if os.path.isfile(os.path.join(subdir, folder, "config.json"))
+    )
+
+def resolve_model_dir(model, models_root="./models"):
+    """모델 ID 또는 경로를 로컬 디렉토리로 변환"""
+    if os.path.isdir(model):
+        return model
+    model_dir = os.path.join(models_root, "transformers", model.replace("/", "__"))
+    if not os.path.isdir(model_dir):
+        raise FileNotFoundError(f"로컬 모델을 찾을 수 없습니다: {model_dir}")
+    return model_dir
+
+def load_variant(model_dir, variant):
+    """변형별로 모델을 로드(및 양자화)하여 반환"""
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    if variant == "torchao-int8-dynamic":
+        from transformers import TorchAoConfig
+        return AutoModelForCausalLM.from_pretrained(
+            model_dir,
+            torch_dtype=torch.bfloat16,
+            quantization_config=TorchAoConfig("int8_dynamic_activation_int8_weight"),
+            trust_remote_code=True,
+        ).eval()
+
+    if variant == "dynamic-int8":
+        # 앱의 --cpu-quantization dynamic-int8 로드 경로와 동일
+        from src.model_handlers.load_options import model_load_kwargs, apply_cpu_quantization
+        model = AutoModelForCausalLM.from_pretrained(
+            model_dir,
+            **model_load_kwargs("cpu", "dynamic-int8"),
+            low_cpu_mem_usage=True,
+            trust_remote_code=True,
+        )
+        return apply_cpu_quantization(model, "dynamic-int8", "cpu")
+
+    model = AutoModelForCausalLM.from_pretrained(
+        model_dir,
+        torch_dtype=torch.bfloat16,
+        low_cpu_mem_usage=True,
+        trust_remote_code=True,
+    ).eval()
+    if variant in ("quanto-int8", "quanto-int4"):
+        from optimum.quanto import freeze, qint4, qint8, quantize
+        quantize(model, weights=qint8 if variant == "quanto-int8" else qint4, exclude=["lm_head"])
+        freeze(model)
+    return model
+
+def run_variant(model_dir, variant, prompt_tokens, max_new_tokens, ppl_tokens, threads, prompt, ppl_text):
+    """
+    단일 변형을 측정합니다. 최대 RSS를 변형별로 분리하기 위해 별도 프로세스에서 실행됩니다.
+    """
+    result = {"variant": variant, "status": "ok"}
+    try:
+        import torch
+        from transformers import AutoTokenizer
+
+        if threads:
+            torch.set_num_threads(threads)
+        result["threads"] = torch.get_num_threads()
+
+        tokenizer = AutoTokenizer.from_pretrained(model_dir, trust_remote_code=True)
+
+        t0 = time.perf_counter()
+        model = load_variant(model_dir, variant)
+        result["load_sec"] = time.perf_counter() - t0
+        result["load_peak_rss_mb"] = get_peak_rss_mb()
+
+        # prompt_tokens 길이에 맞춰 프롬프트를 반복
+        ids = tokenizer(prompt, return_tensors="pt").input_ids
+        repeats = max(1, math.ceil(prompt_tokens / ids.shape[-1]))
+        input_ids = ids.repeat(1, repeats)[:, :prompt_tokens]
+        attention_mask = torch.ones_like(input_ids)
+
+        with torch.inference_mode():
+            # 워밍업 (첫 호출의 커널 초기화 비용 제외)
+            model(input_ids[:, :8])
+
+            t0 = time.perf_counter()
+            model(input_ids, attention_mask=attention_mask)
+            prefill_sec = time.perf_counter() - t0
+            result["prompt_tokens"] = input_ids.shape[-1]
+            result["prefill_tokens_per_sec"] = input_ids.shape[-1] / prefill_sec
+
+            t0 = time.perf_counter()
+            outputs = model.generate(
+                input_ids,
+                attention_mask=attention_mask,
+                max_new_tokens=max_new_tokens,
+                min_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id,
+            )
+            generate_sec = time.perf_counter() - t0
+            new_tokens = outputs.shape[-1] - input_ids.shape[-1]
+            decode_sec = max(generate_sec - prefill_sec, 1e-9)
+            result["generated_tokens"] = new_tokens
+            result["decode_tokens_per_sec"] = new_tokens / decode_sec
+
+            ppl_ids = tokenizer(ppl_text, return_tensors="pt").input_ids[:, :ppl_tokens]
+            loss = model(ppl_ids, labels=ppl_ids).loss
+            result["perplexity_tokens"] = ppl_ids.shape[-1]
+            result["perplexity"] = math.exp(loss.float().item())
+
+        result["peak_rss_mb"] = get_peak_rss_mb()
+    except ImportError as e:
+        result.update({"status": "skipped", "reason": f"의존성 없음: {e}"})
+    except Exception as e:
+        result.update({"status": "error", "reason": str(e)})
+    return result
+
+def benchmark(model, variants=VARIANTS, prompt_tokens=256, max_new_tokens=64, ppl_tokens=256, threads=None, prompt=DEFAULT_PROMPT, ppl_text=DEFAULT_PPL_TEXT):
+    """각 변형을 독립된 spawn 프로세스에서 측정하고 리포트 딕셔너리를 반환"""
+    model_dir = resolve_model_dir(model)
+    report = {
+        "model": model,
+        "model_dir": model_dir,
+        "device": "cpu",
+        "created_at": datetime.now().isoformat(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "prompt_tokens": prompt_tokens,
+            "max_new_tokens": max_new_tokens,
+            "ppl_tokens": ppl_tokens,
+            "threads": threads,
+        },
+        "variants": [],
+    }
+    ctx = multiprocessing.get_context("spawn")
+    for variant in variants:
+        print(f"[*] {variant} 측정 중...", file=sys.stderr)
+        with ctx.Pool(1) as pool:
+            result = pool.apply(
+                run_variant,
+                (model_dir, variant, prompt_tokens, max_new_tokens, ppl_tokens, threads, prompt, ppl_text),
+            )
+        report["variants"].append(result)
+    return report
+
+def format_table(report):
+    """리포트를 사람이 읽기 쉬운 표 형태로 변환"""
+    header = f"{'variant':<22}{'status':<9}{'load(s)':>9}{'rss(MB)':>10}{'prefill t/s':>13}{'decode t/s':>12}{'ppl':>9}"
+    lines = [header, "-" * len(header)]
+    for r in report["variants"]:
+        if r["status"] != "ok":
+            lines.append(f"{r['variant']:<22}{r['status']:<9}  {r.get('reason', '')}")
+            continue
+        lines.append(
+            f"{r['variant']:<22}{r['status']:<9}{r['load_sec']:>9.2f}{r['peak_rss_mb']:>10.0f}"
+            f"{r['prefill_tokens_per_sec']:>13.1f}{r['decode_tokens_per_sec']:>12.2f}{r['perplexity']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Easy-LLM 양자화 변형 CPU 벤치마크")
+    parser.add_argument("model", nargs="?", help="./models/transformers 아래 모델 ID 또는 모델 디렉토리 경로")
+    parser.add_argument("--list", action="store_true", help="벤치마크 가능한 로컬 모델 목록을 출력합니다.")
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=VARIANTS,
+        default=VARIANTS,
+        help="측정할 변형 목록을 지정합니다. (default: 전체)"
+    )
+    parser.add_argument("--prompt-tokens", type=int, default=256, help="prefill 측정용 프롬프트 길이 (default: %(default)d)")
+    parser.add_argument("--max-new-tokens", type=int, default=64, help="decode 측정용 생성 토큰 수 (default: %(default)d)")
+    parser.add_argument("--ppl-tokens", type=int, default=256, help="perplexity 샘플 토큰 수 (default: %(default)d)")
+    parser.add_argument("--ppl-text-file", default=None, help="perplexity 측정에 사용할 텍스트 파일")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op 스레드 수 (default: torch 기본값)")
+    parser.add_argument("--output", default=None, help="JSON 리포트를 저장할 경로 (미지정 시 표준 출력)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.list or not args.model:
+        for model_id in list_local_models():
+            print(model_id)
+        return 0
+
+    ppl_text = DEFAULT_PPL_TEXT
+    if args.ppl_text_file:
+        with open(args.ppl_text_file, "r", encoding="utf-8") as f:
+            ppl_text = f.read()
+
+    report = benchmark(
+        args.model,
+        variants=args.variants,
+        prompt_tokens=args.prompt_tokens,
+        max_new_tokens=args.max_new_tokens,
+        ppl_tokens=args.ppl_tokens,
+        threads=args.threads,
+        ppl_text=ppl_text,
+    )
+    print(format_table(report), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[*] 리포트 저장: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
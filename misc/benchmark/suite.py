@@ -0,0 +1,310 @@
+# suite.py
+#
+# 초소형 무작위 모델과 임시 작업 디렉토리로 앱의 주요 경로를 오프라인 CPU에서 측정합니다.
+#   - load_model (transformers: Llama/Qwen2/GLM 구조, GGUF)
+#   - 첫 토큰 지연(TTFT) / 디코딩 처리량 (generate_answer → 요청 지표)
+#   - save_chat_history_db / load_chat_from_db / load_chat_window
+#   - scan_local_models
+#   - 페르소나 말투 변환 (PersonaSpeechManager.generate_response)
+# 결과를 기준선(baseline)과 비교하여 허용 범위를 벗어난 항목을 회귀로 표시합니다.
+#
+# 사용 예:
+#   python misc/benchmark/suite.py --save-baseline
+#   python misc/benchmark/suite.py --baseline misc/benchmark/suite_baseline.json --threshold 0.2
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+from tiny_models import build_all, TINY_TRANSFORMERS_MODELS, TINY_GGUF_MODEL
+
+DEFAULT_BASELINE_PATH = BENCHMARK_DIR / "suite_baseline.json"
+
+# 페르소나 변환 측정용 (언어, 말투, 문장)
+PERSONA_SAMPLES = [
+    ("ko", "반말", "안녕하세요. 오늘 날씨가 정말 좋습니다. 도와드릴 일이 있으면 말씀해 주세요. 감사합니다."),
+    ("ko", "존댓말", "안녕. 오늘 날씨 진짜 좋아. 도와줄 일 있으면 말해 줘. 고마워."),
+    ("ja", "カジュアル", "こんにちは。今日はいい天気ですね。何かお手伝いしましょうか。ありがとうございます。"),
+    ("ja", "フォーマル", "やあ。今日はいい天気だね。何か手伝おうか。ありがとう。"),
+    ("zh_CN", "随便", "您好。今天天气很好。请问有什么可以帮您的吗？谢谢您。"),
+    ("zh_TW", "正式", "嗨。今天天氣很好。要幫忙嗎？謝啦。"),
+    ("en", "casual", "Hello. I would be happy to help you. Thank you very much for your patience."),
+    ("en", "formal", "Hey. I'm gonna help you out. Thanks a lot, wanna continue?"),
+]
+
+def _median_time(fn, repeat):
+    """fn을 repeat번 실행한 소요 시간의 중앙값(초)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def _metric(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+def _import_app_modules():
+    """
+    앱 모듈은 import 시점에 전역 인자(parse_args)를 읽으므로 벤치마크 인자를 지우고 import 한다.
+    """
+    saved_argv = sys.argv
+    sys.argv = [saved_argv[0]]
+    try:
+        from src.models import models
+        from src.common import database, utils
+        from src.common.cache import models_cache
+        from src.common.metrics import metrics
+        from src.characters.persona_speech_manager import PersonaSpeechManager
+        from src.common.translations import translation_manager
+    finally:
+        sys.argv = saved_argv
+    return {
+        "models": models,
+        "database": database,
+        "utils": utils,
+        "models_cache": models_cache,
+        "metrics": metrics,
+        "PersonaSpeechManager": PersonaSpeechManager,
+        "translation_manager": translation_manager,
+    }
+
+def bench_generation(app, model_id, model_type, repeat, max_new_tokens, local_model_path=None):
+    """모델 로드 시간과 generate_answer의 TTFT/디코딩 처리량 측정"""
+    models = app["models"]
+    results = {}
+
+    app["models_cache"].clear()
+    start = time.perf_counter()
+    handler = models.load_model(model_id, model_type, local_model_path=local_model_path, device="cpu")
+    results["load_model_sec"] = _metric(time.perf_counter() - start, "s")
+    if handler is None:
+        raise RuntimeError(f"모델 로드 실패: {model_id}")
+
+    history = [
+        {"role": "system", "content": "당신은 유용한 AI 비서입니다."},
+        {"role": "user", "content": "Tell me about the quick brown fox."},
+    ]
+    overrides = {"max_new_tokens": max_new_tokens, "do_sample": False, "stop": []}
+    ttfts, tps = [], []
+    # 첫 호출은 워밍업으로 제외
+    for i in range(repeat + 1):
+        models.generate_answer(
+            list(history),
+            model_id,
+            model_type,
+            local_model_path=local_model_path,
+            device="cpu",
+            seed=0,
+            generation_overrides=overrides,
+            session_id="benchmark",
+        )
+        record = app["metrics"].recent_requests(limit=1)[0]
+        if i == 0:
+            continue
+        if record["ttft_seconds"] is not None:
+            ttfts.append(record["ttft_seconds"])
+        if record["decode_tokens_per_second"] is not None:
+            tps.append(record["decode_tokens_per_second"])
+    if ttfts:
+        results["first_token_sec"] = _metric(statistics.median(ttfts), "s")
+    if tps:
+        results["decode_tokens_per_sec"] = _metric(statistics.median(tps), "tok/s", better="higher")
+    app["models_cache"].clear()
+    return results
+
+def bench_database(app, repeat, messages):
+    """채팅 기록 저장/불러오기 측정 (messages개의 메시지를 가진 세션)"""
+    database = app["database"]
+    database.initialize_database()
+    history = [{"role": "system", "content": "당신은 유용한 AI 비서입니다."}]
+    for i in range(messages):
+        history.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"벤치마크 메시지 {i}: " + "내용 " * 20})
+
+    counter = {"n": 0}
+    def save_new_session():
+        counter["n"] += 1
+        database.save_chat_history_db(history, session_id=f"bench_{counter['n']}")
+
+    results = {
+        "save_chat_history_db_sec": _metric(_median_time(save_new_session, repeat), "s"),
+        # 이미 저장된 세션에 다시 저장 (중복 검사 경로)
+        "save_chat_history_db_resave_sec": _metric(
+            _median_time(lambda: database.save_chat_history_db(history, session_id="bench_1"), repeat), "s"
+        ),
+        "load_chat_from_db_sec": _metric(_median_time(lambda: database.load_chat_from_db("bench_1"), repeat), "s"),
+        # 화면 표시용 최근 메시지 창 (세션 길이와 무관해야 함)
+        "load_chat_window_sec": _metric(_median_time(lambda: database.load_chat_window("bench_1"), repeat), "s"),
+    }
+    return results
+
+def bench_scan(app, repeat):
+    return {"scan_local_models_sec": _metric(_median_time(lambda: app["utils"].scan_local_models("./models"), repeat), "s")}
+
+def bench_persona(app, repeat, iterations=200):
+    """말투 변환 처리량 (문장/초)"""
+    manager = app["PersonaSpeechManager"](
+        translation_manager=app["translation_manager"],
+        characters={"benchmark": {"default_tone": "반말", "languages": ["ko", "ja", "zh_CN", "zh_TW", "en"]}},
+    )
+    manager.current_character = "benchmark"
+
+    def convert_all():
+        for _ in range(iterations):
+            for language, tone, text in PERSONA_SAMPLES:
+                manager.current_language = language
+                manager.current_tone = tone
+                manager.generate_response(text)
+
+    elapsed = _median_time(convert_all, repeat)
+    return {"persona_conversions_per_sec": _metric(iterations * len(PERSONA_SAMPLES) / elapsed, "conv/s", better="higher")}
+
+def run_suite(workdir, repeat=5, max_new_tokens=32, db_messages=50, threads=1, seed=0, include_gguf=True):
+    """
+    임시 작업 디렉토리에서 초소형 모델을 만들고 전체 벤치마크를 실행.
+    DB/모델 경로가 현재 디렉토리 기준이므로 workdir로 이동하여 실제 데이터와 분리한다.
+    """
+    import logging
+    logging.disable(logging.INFO)
+
+    os.makedirs(workdir, exist_ok=True)
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"repeat": repeat, "max_new_tokens": max_new_tokens, "db_messages": db_messages, "threads": threads, "seed": seed},
+        "models": {},
+        "metrics": {},
+        "skipped": {},
+    }
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.manual_seed(seed)
+
+        report["models"] = build_all("./models", seed=seed, include_gguf=include_gguf)
+        app = _import_app_modules()
+
+        targets = [(model_id, "transformers", None) for model_id in TINY_TRANSFORMERS_MODELS]
+        if include_gguf:
+            targets.append((TINY_GGUF_MODEL, "gguf", os.path.join("./models", "gguf", TINY_GGUF_MODEL.replace("/", "__"))))
+        for model_id, model_type, local_model_path in targets:
+            if report["models"].get(model_id, {}).get("status") != "ok":
+                report["skipped"][model_id] = report["models"].get(model_id, {}).get("reason")
+                continue
+            print(f"[*] {model_id} 측정 중...", file=sys.stderr)
+            try:
+                results = bench_generation(app, model_id, model_type, repeat, max_new_tokens, local_model_path)
+                for name, metric in results.items():
+                    report["metrics"][f"{model_id}:{name}"] = metric
+            except ImportError as e:
+                report["skipped"][model_id] = f"의존성 없음: {e}"
+            except Exception as e:
+                report["skipped"][model_id] = str(e)
+
+        print("[*] DB/스캔/페르소나 측정 중...", file=sys.stderr)
+        report["metrics"].update(bench_database(app, repeat, db_messages))
+        report["metrics"].update(bench_scan(app, repeat))
+        report["metrics"].update(bench_persona(app, repeat))
+    finally:
+        os.chdir(previous_cwd)
+        logging.disable(logging.NOTSET)
+    return report
+
+def compare(report, baseline, threshold=0.2):
+    """
+    기준선 대비 변화율을 계산하여 항목별 비교 결과를 반환.
+    lower가 좋은 지표는 (1 + threshold)배 이상 커지면, higher가 좋은 지표는 (1 - threshold)배 이하로 작아지면 회귀로 판단한다.
+    """
+    comparison = []
+    for name, metric in report["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if not base or not base["value"]:
+            comparison.append({"name": name, "value": metric["value"], "baseline": None, "change": None, "regression": False})
+            continue
+        change = (metric["value"] - base["value"]) / base["value"]
+        if metric["better"] == "lower":
+            regression = change > threshold
+        else:
+            regression = change < -threshold
+        comparison.append({"name": name, "value": metric["value"], "baseline": base["value"], "change": change, "regression": regression})
+    return comparison
+
+def format_table(report, comparison=None):
+    rows = comparison or [{"name": name, "value": m["value"], "baseline": None, "change": None, "regression": False} for name, m in report["metrics"].items()]
+    header = f"{'metric':<52}{'value':>14}{'baseline':>14}{'change':>10}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        unit = report["metrics"][row["name"]]["unit"]
+        baseline = f"{row['baseline']:.4g}" if row["baseline"] is not None else "-"
+        change = f"{row['change'] * 100:+.1f}%" if row["change"] is not None else "-"
+        flag = "  ⚠ 회귀" if row["regression"] else ""
+        lines.append(f"{row['name']:<52}{row['value']:>10.4g} {unit:<3}{baseline:>14}{change:>10}{flag}")
+    for model_id, reason in report["skipped"].items():
+        lines.append(f"{model_id:<52}skipped  {reason}")
+    return "\n".join(lines)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Easy-LLM 오프라인 CPU 벤치마크 스위트")
+    parser.add_argument("--workdir", default=None, help="모델/DB를 생성할 작업 디렉토리 (default: 임시 디렉토리)")
+    parser.add_argument("--repeat", type=int, default=5, help="항목별 반복 횟수, 중앙값을 사용 (default: %(default)d)")
+    parser.add_argument("--max-new-tokens", type=int, default=32, help="생성 측정 토큰 수 (default: %(default)d)")
+    parser.add_argument("--db-messages", type=int, default=50, help="DB 측정용 세션 메시지 수 (default: %(default)d)")
+    parser.add_argument("--threads", type=int, default=1, help="torch 스레드 수, 재현성을 위해 기본 1 (default: %(default)d)")
+    parser.add_argument("--seed", type=int, default=0, help="모델 생성/생성 시드 (default: %(default)d)")
+    parser.add_argument("--no-gguf", action="store_true", help="GGUF 측정을 건너뜁니다.")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="비교할 기준선 JSON (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준선으로 저장합니다.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 판단할 변화율 (default: %(default)s)")
+    parser.add_argument("--output", default=None, help="JSON 리포트를 저장할 경로")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="easyllm-bench-")
+    report = run_suite(
+        workdir,
+        repeat=args.repeat,
+        max_new_tokens=args.max_new_tokens,
+        db_messages=args.db_messages,
+        threads=args.threads,
+        seed=args.seed,
+        include_gguf=not args.no_gguf,
+    )
+
+    comparison = None
+    if not args.save_baseline and os.path.isfile(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            comparison = compare(report, json.load(f), args.threshold)
+        report["comparison"] = comparison
+    print(format_table(report, comparison), file=sys.stderr)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[*] 기준선 저장: {args.baseline}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[*] 리포트 저장: {args.output}", file=sys.stderr)
+
+    # 회귀가 있으면 종료 코드 1 (CI에서 사용)
+    return 1 if comparison and any(row["regression"] for row in comparison) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# tiny_models.py
+#
+# 벤치마크/부하 테스트용 초소형 무작위 가중치 모델을 오프라인으로 생성합니다.
+#   - Llama / Qwen2 / GLM 구조의 transformers 체크포인트 (./models/transformers/tiny-random__*)
+#   - llama 구조의 GGUF 파일 (./models/gguf/tiny-random__llama-gguf)
+# 토크나이저는 고정 말뭉치로 학습한 바이트 수준 BPE이며, 같은 시드면 항상 같은 결과를 만듭니다.
+#
+# 사용 예:
+#   python misc/benchmark/tiny_models.py --models-root ./models
+
+import os
+import sys
+import json
+import argparse
+
+TINY_TRANSFORMERS_MODELS = {
+    "tiny-random/llama": "llama",
+    "tiny-random/qwen2": "qwen2",
+    "tiny-random/glm": "glm",
+}
+TINY_GGUF_MODEL = "tiny-random/llama-gguf"
+
+VOCAB_SIZE = 512
+SPECIAL_TOKENS = ["<|begin_of_text|>", "<|eot_id|>", "<|pad|>", "<|start|>"]
+
+# 접두사 안정적인 단순 채팅 템플릿 (ChatTemplateCache 증분 렌더링 경로도 함께 측정됨)
+CHAT_TEMPLATE = (
+    "{% for message in messages %}<|start|>{{ message['role'] }}\n{{ message['content'] }}<|eot_id|>{% endfor %}"
+    "{% if add_generation_prompt %}<|start|>assistant\n{% endif %}"
+)
+
+TRAINING_CORPUS = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Language models predict the next token from the previous context.",
+    "안녕하세요. 오늘 날씨가 좋습니다. 무엇을 도와드릴까요?",
+    "반가워요! 저는 AI 비서입니다. 질문이 있으면 말씀해 주세요.",
+    "こんにちは。今日はいい天気ですね。何かお手伝いしましょうか？",
+    "你好，今天天气很好。我可以帮你什么？",
+    "Benchmarks should be reproducible, small and fast enough to run on every change.",
+] * 20
+
+# 모델 구조별 최소 설정 (hidden 64, 2 layers)
+_TINY_CONFIG = {
+    "hidden_size": 64,
+    "intermediate_size": 128,
+    "num_hidden_layers": 2,
+    "num_attention_heads": 4,
+    "num_key_value_heads": 2,
+    "max_position_embeddings": 512,
+    "vocab_size": VOCAB_SIZE,
+    "tie_word_embeddings": False,
+}
+
+def build_tokenizer():
+    """고정 말뭉치로 바이트 수준 BPE 토크나이저를 학습하여 PreTrainedTokenizerFast로 반환"""
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=VOCAB_SIZE,
+        special_tokens=SPECIAL_TOKENS,
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+        show_progress=False,
+    )
+    tokenizer.train_from_iterator(TRAINING_CORPUS, trainer=trainer)
+    fast = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        bos_token="<|begin_of_text|>",
+        eos_token="<|eot_id|>",
+        pad_token="<|pad|>",
+    )
+    fast.chat_template = CHAT_TEMPLATE
+    return fast
+
+def _suppress_special_tokens(weight, tokenizer):
+    """
+    출력 가중치에서 특수 토큰 행을 0으로 만들어 탐욕적 디코딩 중 조기 종료되지 않게 한다.
+    (다른 토큰 중 하나는 거의 항상 양의 logit을 가지므로 특수 토큰이 선택되지 않는다)
+    """
+    for token in SPECIAL_TOKENS:
+        weight[tokenizer.convert_tokens_to_ids(token)] = 0
+
+def _build_config(architecture, tokenizer):
+    from transformers import AutoConfig
+
+    config = AutoConfig.for_model(architecture, **_TINY_CONFIG)
+    config.bos_token_id = tokenizer.bos_token_id
+    config.eos_token_id = tokenizer.eos_token_id
+    config.pad_token_id = tokenizer.pad_token_id
+    if architecture == "glm":
+        config.head_dim = _TINY_CONFIG["hidden_size"] // _TINY_CONFIG["num_attention_heads"]
+    return config
+
+def build_transformers_model(model_id, architecture, models_root="./models", seed=0, tokenizer=None):
+    """무작위 가중치 모델을 만들어 ./models/transformers/<모델> 에 저장하고 경로를 반환"""
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    tokenizer = tokenizer or build_tokenizer()
+    output_dir = os.path.join(models_root, "transformers", model_id.replace("/", "__"))
+    torch.manual_seed(seed)
+    model = AutoModelForCausalLM.from_config(_build_config(architecture, tokenizer), torch_dtype=torch.float32)
+    with torch.no_grad():
+        _suppress_special_tokens(model.get_output_embeddings().weight, tokenizer)
+    model.generation_config.eos_token_id = tokenizer.eos_token_id
+    model.generation_config.pad_token_id = tokenizer.pad_token_id
+    model.save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+def build_gguf_model(model_id=TINY_GGUF_MODEL, models_root="./models", seed=0, tokenizer=None):
+    """
+    llama 구조의 무작위 가중치 GGUF 파일을 생성.
+    GGUFModelHandler/ensure_model_available이 찾는 경로(./models/gguf/<모델>)에 파일로 저장한다.
+    """
+    import numpy as np
+    import gguf
+
+    tokenizer = tokenizer or build_tokenizer()
+    output_path = os.path.join(models_root, "gguf", model_id.replace("/", "__"))
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    hidden = _TINY_CONFIG["hidden_size"]
+    ff = _TINY_CONFIG["intermediate_size"]
+    heads = _TINY_CONFIG["num_attention_heads"]
+    kv_heads = _TINY_CONFIG["num_key_value_heads"]
+    head_dim = hidden // heads
+    vocab = tokenizer.backend_tokenizer.get_vocab(with_added_tokens=True)
+    tokens = [token for token, _ in sorted(vocab.items(), key=lambda item: item[1])]
+    merges = json.loads(tokenizer.backend_tokenizer.to_str())["model"]["merges"]
+    merges = [" ".join(merge) if isinstance(merge, list) else merge for merge in merges]
+    token_types = [
+        gguf.TokenType.CONTROL if token in SPECIAL_TOKENS else gguf.TokenType.NORMAL
+        for token in tokens
+    ]
+
+    writer = gguf.GGUFWriter(output_path, "llama")
+    writer.add_name(model_id)
+    writer.add_context_length(_TINY_CONFIG["max_position_embeddings"])
+    writer.add_embedding_length(hidden)
+    writer.add_block_count(_TINY_CONFIG["num_hidden_layers"])
+    writer.add_feed_forward_length(ff)
+    writer.add_head_count(heads)
+    writer.add_head_count_kv(kv_heads)
+    writer.add_rope_dimension_count(head_dim)
+    writer.add_layer_norm_rms_eps(1e-5)
+    writer.add_file_type(gguf.LlamaFileType.ALL_F32)
+    writer.add_tokenizer_model("gpt2")
+    writer.add_tokenizer_pre("default")
+    writer.add_token_list(tokens)
+    writer.add_token_types(token_types)
+    writer.add_token_merges(merges)
+    writer.add_bos_token_id(tokenizer.bos_token_id)
+    writer.add_eos_token_id(tokenizer.eos_token_id)
+    writer.add_pad_token_id(tokenizer.pad_token_id)
+    writer.add_add_bos_token(False)
+
+    rng = np.random.default_rng(seed)
+    def randn(*shape):
+        return (rng.standard_normal(shape) * 0.02).astype(np.float32)
+
+    writer.add_tensor("token_embd.weight", randn(len(tokens), hidden))
+    for i in range(_TINY_CONFIG["num_hidden_layers"]):
+        writer.add_tensor(f"blk.{i}.attn_norm.weight", np.ones(hidden, dtype=np.float32))
+        writer.add_tensor(f"blk.{i}.attn_q.weight", randn(hidden, hidden))
+        writer.add_tensor(f"blk.{i}.attn_k.weight", randn(kv_heads * head_dim, hidden))
+        writer.add_tensor(f"blk.{i}.attn_v.weight", randn(kv_heads * head_dim, hidden))
+        writer.add_tensor(f"blk.{i}.attn_output.weight", randn(hidden, hidden))
+        writer.add_tensor(f"blk.{i}.ffn_norm.weight", np.ones(hidden, dtype=np.float32))
+        writer.add_tensor(f"blk.{i}.ffn_gate.weight", randn(ff, hidden))
+        writer.add_tensor(f"blk.{i}.ffn_up.weight", randn(ff, hidden))
+        writer.add_tensor(f"blk.{i}.ffn_down.weight", randn(hidden, ff))
+    writer.add_tensor("output_norm.weight", np.ones(hidden, dtype=np.float32))
+    output = randn(len(tokens), hidden)
+    _suppress_special_tokens(output, tokenizer)
+    writer.add_tensor("output.weight", output)
+
+    writer.write_header_to_file()
+    writer.write_kv_data_to_file()
+    writer.write_tensors_to_file()
+    writer.close()
+    return output_path
+
+def build_all(models_root="./models", seed=0, include_gguf=True):
+    """
+    모든 초소형 모델을 생성하고 {모델 ID: 경로 또는 오류 메시지} 결과를 반환.
+    설치된 transformers가 해당 구조를 지원하지 않으면 그 모델만 건너뛴다.
+    """
+    tokenizer = build_tokenizer()
+    results = {}
+    for model_id, architecture in TINY_TRANSFORMERS_MODELS.items():
+        try:
+            results[model_id] = {"status": "ok", "path": build_transformers_model(model_id, architecture, models_root, seed, tokenizer)}
+        except Exception as e:
+            results[model_id] = {"status": "skipped", "reason": str(e)}
+    if include_gguf:
+        try:
+            results[TINY_GGUF_MODEL] = {"status": "ok", "path": build_gguf_model(TINY_GGUF_MODEL, models_root, seed, tokenizer)}
+        except ImportError as e:
+            results[TINY_GGUF_MODEL] = {"status": "skipped", "reason": f"의존성 없음: {e}"}
+        except Exception as e:
+            results[TINY_GGUF_MODEL] = {"status": "skipped", "reason": str(e)}
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크용 초소형 무작위 모델 생성")
+    parser.add_argument("--models-root", default="./models", help="모델을 저장할 루트 디렉토리 (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="가중치 초기화 시드 (default: %(default)d)")
+    parser.add_argument("--no-gguf", action="store_true", help="GGUF 모델은 생성하지 않습니다.")
+    args = parser.parse_args(argv)
+    results = build_all(args.models_root, seed=args.seed, include_gguf=not args.no_gguf)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
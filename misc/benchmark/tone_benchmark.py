@@ -0,0 +1,109 @@
+# tone_benchmark.py
+#
+# 페르소나 말투 변환의 응답당 비용을 측정합니다.
+#   - sequential: 규칙마다 re.sub / str.replace를 차례로 적용하던 기존 방식
+#   - compiled: tone_converter.ToneConverter (규칙을 미리 컴파일하여 한 번의 스캔으로 치환)
+#   - stream: tone_converter.IncrementalToneConverter (--chunk-size 글자씩 나눈 토큰 청크를 차례로 변환)
+# 응답 길이(문자 수)별로 소요 시간과 결과가 같은지 비교합니다.
+#
+# 사용 예:
+#   python misc/benchmark/tone_benchmark.py --lengths 1000 10000 100000
+
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.characters.tone_converter import TONE_RULES, REGEX_LANGUAGES, STRIP_LANGUAGES, get_tone_converter, create_incremental_converter
+
+SAMPLE_SENTENCES = {
+    "ko": "안녕하세요. 오늘 날씨가 정말 좋습니다. 도와 드려요 감사합니다. 궁금한 점이 있으면 말씀해 주세요 예 네 할까요 ",
+    "en": "I am happy to help. I do not mind, and I cannot wait. Could you tell me what you would like? ",
+    "ja": "こんにちは。今日はいい天気です。お手伝いします。ありがとうございます。いただきます。",
+    "zh_CN": "您好，请问有什么可以帮您？谢谢，不客气。",
+    "zh_TW": "您好，請問有什麼可以幫您？謝謝，不客氣。",
+}
+
+def convert_sequential(content, language, tone):
+    """기존 구현: 규칙마다 전체 문자열을 다시 스캔"""
+    for pattern, replacement in TONE_RULES[(language, tone)]:
+        if language in REGEX_LANGUAGES:
+            content = re.sub(pattern, replacement, content)
+        else:
+            content = content.replace(pattern, replacement)
+    return content.strip() if language in STRIP_LANGUAGES else content
+
+def convert_streaming(text, language, tone, chunk_size):
+    """청크 단위로 나누어 스트리밍 변환한 결과를 이어 붙임"""
+    converter = create_incremental_converter(language, tone)
+    chunks = (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+    return "".join(converter.stream(chunks))
+
+def _median_time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def benchmark(lengths, repeat=20, chunk_size=4):
+    results = []
+    for (language, tone) in TONE_RULES:
+        sentence = SAMPLE_SENTENCES[language]
+        converter = get_tone_converter(language, tone)
+        for length in lengths:
+            text = (sentence * (length // len(sentence) + 1))[:length]
+            sequential = _median_time(lambda: convert_sequential(text, language, tone), repeat)
+            compiled = _median_time(lambda: converter.convert(text), repeat)
+            stream = _median_time(lambda: convert_streaming(text, language, tone, chunk_size), repeat)
+            results.append({
+                "language": language,
+                "tone": tone,
+                "chars": length,
+                "rules": len(TONE_RULES[(language, tone)]),
+                "sequential_ms": sequential * 1000,
+                "compiled_ms": compiled * 1000,
+                "stream_ms": stream * 1000,
+                "speedup": sequential / compiled if compiled else None,
+                # 순차 적용에서는 앞 규칙의 결과에 뒤 규칙이 다시 적용될 수 있어 결과가 다를 수 있다.
+                "same_output": convert_sequential(text, language, tone) == converter.convert(text),
+                # 스트리밍 결과는 한 번에 변환한 결과와 항상 같아야 한다.
+                "stream_same": convert_streaming(text, language, tone, chunk_size) == converter.convert(text),
+            })
+    return results
+
+def format_table(results):
+    header = f"{'language':<8}{'tone':<8}{'chars':>9}{'rules':>7}{'sequential(ms)':>16}{'compiled(ms)':>14}{'stream(ms)':>12}{'speedup':>9}  same  stream_same"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['language']:<8}{r['tone']:<8}{r['chars']:>9}{r['rules']:>7}{r['sequential_ms']:>16.3f}"
+            f"{r['compiled_ms']:>14.3f}{r['stream_ms']:>12.3f}{r['speedup']:>8.1f}x  {'yes' if r['same_output'] else 'no ':<4}  {'yes' if r['stream_same'] else 'no'}"
+        )
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="페르소나 말투 변환 벤치마크")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[500, 5000, 50000], help="측정할 응답 길이(문자 수) (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=20, help="반복 횟수, 중앙값 사용 (default: %(default)d)")
+    parser.add_argument("--chunk-size", type=int, default=4, help="스트리밍 측정 시 청크 크기(문자 수) (default: %(default)d)")
+    parser.add_argument("--output", default=None, help="JSON 결과를 저장할 경로")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.lengths, args.repeat, args.chunk_size)
+    print(format_table(results), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"[*] 결과 저장: {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
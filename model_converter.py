@@ -1,9 +1,38 @@
 # model_converter.py
 
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from safetensors import safe_open
+from safetensors.torch import save_file
+from huggingface_hub import HfApi, snapshot_download
 
 from optimum.quanto import Calibration, QuantizedModelForCausalLM, qfloat8, qint4, qint8
+from optimum.quanto.nn import QLinear
+
+from src.common.resource_usage import get_peak_rss_mb
+
+SAFE_WEIGHTS_NAME = "model.safetensors"
+SAFE_WEIGHTS_INDEX_NAME = "model.safetensors.index.json"
+QUANTO_QMAP_NAME = "quanto_qmap.json"
+
+# 스트리밍 변환에서 지원하는 양자화 유형 (가중치 전용)
+STREAMING_QTYPES = {
+    "int8": qint8,
+    "int4": qint4,
+    "float8": qfloat8,
+}
 
 def convert_model_to_float8(model_id: str, output_dir: str, push_to_hub: float=False):
     """
@@ -86,4 +115,554 @@ def convert_model_to_int4(model_id: str, output_dir: str, push_to_hub: float=Fal
         return True
     except Exception as e:
         print(f"모델 변환 중 오류 발생: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def _parse_size(size) -> int:
+    """'2GB', '500MB' 형태의 크기 문자열을 바이트 수로 변환"""
+    if isinstance(size, int):
+        return size
+    size = str(size).strip().upper()
+    for unit, factor in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+def _resolve_source_dir(model_id: str) -> str:
+    """로컬 디렉토리면 그대로, 아니면 safetensors/설정 파일만 허브에서 받아 경로를 반환"""
+    if os.path.isdir(model_id):
+        return model_id
+    return snapshot_download(
+        repo_id=model_id,
+        allow_patterns=["*.json", "*.safetensors", "*.model", "*.txt", "*.py", "*.tiktoken", "*.jinja"],
+    )
+
+def _list_safetensors_shards(source_dir: str) -> list:
+    """원본 체크포인트의 safetensors 샤드 파일 목록을 반환"""
+    index_path = os.path.join(source_dir, SAFE_WEIGHTS_INDEX_NAME)
+    if os.path.isfile(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            weight_map = json.load(f)["weight_map"]
+        shards = sorted(set(weight_map.values()))
+    elif os.path.isfile(os.path.join(source_dir, SAFE_WEIGHTS_NAME)):
+        shards = [SAFE_WEIGHTS_NAME]
+    else:
+        shards = sorted(f for f in os.listdir(source_dir) if f.endswith(".safetensors"))
+    if not shards:
+        raise FileNotFoundError(f"safetensors 가중치를 찾을 수 없습니다: {source_dir}")
+    return [os.path.join(source_dir, shard) for shard in shards]
+
+def _quantizable_weight_names(source_dir: str) -> set:
+    """
+    빈(meta) 모델을 만들어 nn.Linear 가중치 이름 목록을 구함.
+    메모리를 거의 사용하지 않으며, tie_word_embeddings 모델의 lm_head는 제외한다.
+    """
+    from accelerate import init_empty_weights
+
+    config = AutoConfig.from_pretrained(source_dir, trust_remote_code=True)
+    with init_empty_weights():
+        model = AutoModelForCausalLM.from_config(config, trust_remote_code=True)
+    names = {
+        f"{name}.weight"
+        for name, module in model.named_modules()
+        if isinstance(module, torch.nn.Linear)
+    }
+    if getattr(config, "tie_word_embeddings", False):
+        names.discard("lm_head.weight")
+    del model
+    return names
+
+def _quantize_linear_weight(name: str, weight: torch.Tensor, qtype) -> dict:
+    """
+    단일 Linear 가중치를 quanto QLinear로 양자화하여 quanto 직렬화 형식의 state_dict 조각을 반환.
+    bias는 원본 체크포인트의 별도 키로 그대로 복사된다.
+    """
+    module_name = name[:-len(".weight")]
+    linear = torch.nn.Linear(weight.shape[1], weight.shape[0], bias=False, device="meta")
+    linear.weight = torch.nn.Parameter(weight, requires_grad=False)
+    qlinear = QLinear.from_module(linear, weights=qtype)
+    qlinear.freeze()
+    return {k: v.contiguous() for k, v in qlinear.state_dict(prefix=f"{module_name}.").items()}
+
+def _copy_model_files(source_dir: str, output_dir: str):
+    """가중치를 제외한 설정/토크나이저/원격 코드 파일을 복사"""
+    skip_suffixes = (".safetensors", ".bin", ".pt", ".pth", ".gguf", ".h5", ".msgpack")
+    for filename in os.listdir(source_dir):
+        src = os.path.join(source_dir, filename)
+        if not os.path.isfile(src) or filename == SAFE_WEIGHTS_INDEX_NAME or filename.endswith(skip_suffixes):
+            continue
+        shutil.copy2(src, os.path.join(output_dir, filename))
+
+class _ShardWriter:
+    """양자화된 텐서를 모아 일정 크기마다 safetensors 샤드로 바로 기록하는 헬퍼"""
+    def __init__(self, output_dir: str, max_shard_size="2GB"):
+        self.output_dir = output_dir
+        self.max_shard_bytes = _parse_size(max_shard_size)
+        self.buffer = {}
+        self.buffer_bytes = 0
+        self.shard_files = []
+        self.weight_map = {}
+        self.total_size = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, name: str, tensor: torch.Tensor):
+        nbytes = tensor.numel() * tensor.element_size()
+        if self.buffer and self.buffer_bytes + nbytes > self.max_shard_bytes:
+            self.flush()
+        self.buffer[name] = tensor
+        self.buffer_bytes += nbytes
+        self.total_size += nbytes
+
+    def flush(self):
+        if not self.buffer:
+            return
+        shard_name = f"model-{len(self.shard_files) + 1:05d}.safetensors.partial"
+        save_file(self.buffer, os.path.join(self.output_dir, shard_name), metadata={"format": "pt"})
+        for name in self.buffer:
+            self.weight_map[name] = shard_name
+        self.shard_files.append(shard_name)
+        self.buffer = {}
+        self.buffer_bytes = 0
+        gc.collect()
+
+    def finalize(self) -> list:
+        """남은 텐서를 기록하고 샤드 이름을 HF 규칙(model-0000i-of-0000N)으로 정리"""
+        self.flush()
+        total = len(self.shard_files)
+        renamed = {}
+        for i, shard_name in enumerate(self.shard_files, start=1):
+            final_name = SAFE_WEIGHTS_NAME if total == 1 else f"model-{i:05d}-of-{total:05d}.safetensors"
+            os.replace(os.path.join(self.output_dir, shard_name), os.path.join(self.output_dir, final_name))
+            renamed[shard_name] = final_name
+        self.weight_map = {name: renamed[shard] for name, shard in self.weight_map.items()}
+        if total > 1:
+            index = {"metadata": {"total_size": self.total_size}, "weight_map": self.weight_map}
+            with open(os.path.join(self.output_dir, SAFE_WEIGHTS_INDEX_NAME), "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=2)
+        return list(renamed.values())
+
+def convert_model_streaming(model_id: str, output_dir: str, quant_type: str = "int8", max_shard_size="2GB", push_to_hub: bool = False) -> dict:
+    """
+    safetensors 샤드를 mmap으로 읽어 텐서 단위로 양자화하고, 양자화된 샤드를 순차적으로 기록하는 저메모리 변환 함수.
+    전체 모델을 bf16으로 올리지 않으므로 최대 메모리 사용량이 (가장 큰 텐서 + 샤드 1개) 수준으로 제한된다.
+    결과물은 QuantizedModelForCausalLM.from_pretrained로 그대로 로드할 수 있다. (가중치 전용 양자화)
+
+    Returns:
+        dict: success, output_dir, shards, tensors, elapsed_sec, peak_rss_mb (실패 시 error 포함)
+    """
+    if quant_type not in STREAMING_QTYPES:
+        raise ValueError(f"지원되지 않는 변환 유형: {quant_type}")
+    qtype = STREAMING_QTYPES[quant_type]
+    start = time.perf_counter()
+    try:
+        source_dir = _resolve_source_dir(model_id)
+        shard_paths = _list_safetensors_shards(source_dir)
+        quantizable = _quantizable_weight_names(source_dir)
+        writer = _ShardWriter(output_dir, max_shard_size)
+        qmap = {}
+        tensor_count = 0
+
+        for shard_path in shard_paths:
+            print(f"[*] 샤드 변환 중: {os.path.basename(shard_path)} (최대 RSS {get_peak_rss_mb():.0f} MB)")
+            with safe_open(shard_path, framework="pt", device="cpu") as f:
+                for name in f.keys():
+                    tensor = f.get_tensor(name)
+                    if tensor.is_floating_point():
+                        tensor = tensor.to(torch.bfloat16)
+                    if name in quantizable and tensor.dim() == 2:
+                        for key, value in _quantize_linear_weight(name, tensor, qtype).items():
+                            writer.add(key, value)
+                        qmap[name[:-len(".weight")]] = {"weights": qtype.name, "activations": "none"}
+                    else:
+                        writer.add(name, tensor.contiguous())
+                    tensor_count += 1
+                    del tensor
+
+        shards = writer.finalize()
+        with open(os.path.join(output_dir, QUANTO_QMAP_NAME), "w", encoding="utf8") as f:
+            json.dump(qmap, f, indent=4)
+        _copy_model_files(source_dir, output_dir)
+
+        report = {
+            "success": True,
+            "model_id": model_id,
+            "quant_type": quant_type,
+            "output_dir": output_dir,
+            "shards": shards,
+            "tensors": tensor_count,
+            "quantized_tensors": len(qmap),
+            "elapsed_sec": time.perf_counter() - start,
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+        print(f"모델이 스트리밍 방식으로 {quant_type} 변환되어 '{output_dir}'에 저장되었습니다. "
+              f"(샤드 {len(shards)}개, {report['elapsed_sec']:.1f}초, 최대 RSS {report['peak_rss_mb']:.0f} MB)")
+
+        if push_to_hub:
+            repo_id = f"{model_id.rstrip('/').split('/')[-1]}-{quant_type}"
+            api = HfApi()
+            api.create_repo(repo_id, exist_ok=True)
+            api.upload_folder(folder_path=output_dir, repo_id=repo_id)
+            print(f"모델이 성공적으로 '{repo_id}'에 푸시되었습니다.")
+
+        return report
+    except Exception as e:
+        print(f"모델 변환 중 오류 발생: {e}")
+        return {
+            "success": False,
+            "model_id": model_id,
+            "quant_type": quant_type,
+            "output_dir": output_dir,
+            "error": str(e),
+            "elapsed_sec": time.perf_counter() - start,
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+
+def _init_quantize_worker():
+    """프로세스 풀 작업자 초기화: 작업자 간 스레드 경쟁을 막기 위해 intra-op 스레드를 1개로 제한"""
+    torch.set_num_threads(1)
+
+def _quantize_tensor_task(shard_path: str, name: str, quant_types: list):
+    """
+    프로세스 풀 작업자: 원본 텐서 하나를 mmap으로 읽어 요청된 모든 변형으로 양자화.
+    텐서는 작업자가 직접 읽으므로 부모 프로세스에서 작업자로의 복사가 발생하지 않는다.
+    """
+    with safe_open(shard_path, framework="pt", device="cpu") as f:
+        tensor = f.get_tensor(name).to(torch.bfloat16)
+    results = {}
+    timings = {}
+    for quant_type in quant_types:
+        t0 = time.perf_counter()
+        results[quant_type] = _quantize_linear_weight(name, tensor, STREAMING_QTYPES[quant_type])
+        timings[quant_type] = time.perf_counter() - t0
+    return results, timings, get_peak_rss_mb()
+
+def _local_model_name(model_id: str) -> str:
+    if os.path.isdir(model_id):
+        return os.path.basename(os.path.normpath(model_id))
+    return model_id.replace("/", "__")
+
+def _default_manifest_path(model_id: str, output_base_dir: str) -> str:
+    return os.path.join(output_base_dir, f"{_local_model_name(model_id)}-conversion_manifest.json")
+
+def convert_model_multi_variant(
+    model_id: str,
+    output_base_dir: str = "./models/transformers",
+    quant_types=("int8", "int4", "float8"),
+    max_workers: int = None,
+    max_shard_size="2GB",
+    manifest_path: str = None,
+) -> dict:
+    """
+    원본 모델을 한 번만 스트리밍으로 읽어 여러 양자화 변형을 동시에 생성하는 함수.
+    Linear 가중치의 양자화는 프로세스 풀에서 텐서 단위로 병렬 처리되며,
+    결과와 소요 시간은 JSON 매니페스트로 기록된다.
+
+    Returns:
+        dict: 매니페스트 내용 (success, variants, timings, peak_rss_mb 등)
+    """
+    quant_types = list(dict.fromkeys(quant_types))
+    unsupported = [q for q in quant_types if q not in STREAMING_QTYPES]
+    if not quant_types or unsupported:
+        raise ValueError(f"지원되지 않는 변환 유형: {unsupported or quant_types}")
+    max_workers = max_workers or min(os.cpu_count() or 1, 8)
+    local_name = _local_model_name(model_id)
+    manifest_path = manifest_path or _default_manifest_path(model_id, output_base_dir)
+
+    start = time.perf_counter()
+    manifest = {
+        "model_id": model_id,
+        "created_at": datetime.now().isoformat(),
+        "workers": max_workers,
+        "variants": {},
+    }
+    try:
+        source_dir = _resolve_source_dir(model_id)
+        shard_paths = _list_safetensors_shards(source_dir)
+        quantizable = _quantizable_weight_names(source_dir)
+        output_dirs = {q: os.path.join(output_base_dir, f"{local_name}-{q}") for q in quant_types}
+        writers = {q: _ShardWriter(output_dirs[q], max_shard_size) for q in quant_types}
+        qmaps = {q: {} for q in quant_types}
+        quantize_sec = {q: 0.0 for q in quant_types}
+        worker_peak_rss = 0.0
+        tensor_count = 0
+
+        def _drain(f, pending):
+            """가장 먼저 제출된 텐서의 결과를 모든 변형의 샤드 기록기에 전달"""
+            nonlocal worker_peak_rss
+            name, future = pending.popleft()
+            if future is None:
+                # 양자화 대상이 아닌 텐서는 모든 변형에 동일하게 기록
+                tensor = f.get_tensor(name)
+                if tensor.is_floating_point():
+                    tensor = tensor.to(torch.bfloat16)
+                tensor = tensor.contiguous()
+                for writer in writers.values():
+                    writer.add(name, tensor)
+                return
+            results, timings, rss = future.result()
+            worker_peak_rss = max(worker_peak_rss, rss)
+            for quant_type, state in results.items():
+                for key, value in state.items():
+                    writers[quant_type].add(key, value)
+                qmaps[quant_type][name[:-len(".weight")]] = {
+                    "weights": STREAMING_QTYPES[quant_type].name,
+                    "activations": "none",
+                }
+                quantize_sec[quant_type] += timings[quant_type]
+
+        # spawn 컨텍스트: torch 스레드가 초기화된 프로세스를 fork하지 않도록 함
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx, initializer=_init_quantize_worker) as executor:
+            for shard_path in shard_paths:
+                print(f"[*] 샤드 변환 중: {os.path.basename(shard_path)} (최대 RSS {get_peak_rss_mb():.0f} MB)")
+                # 제출 순서대로 결과를 기록하여 출력 샤드 구성을 결정적으로 유지
+                pending = deque()
+                with safe_open(shard_path, framework="pt", device="cpu") as f:
+                    for name in f.keys():
+                        tensor_count += 1
+                        if name in quantizable and len(f.get_slice(name).get_shape()) == 2:
+                            pending.append((name, executor.submit(_quantize_tensor_task, shard_path, name, quant_types)))
+                        else:
+                            pending.append((name, None))
+                        # 처리 중인 작업 수를 제한하여 메모리 사용량을 일정하게 유지
+                        while len(pending) > max_workers * 2 or (pending and pending[0][1] is None):
+                            _drain(f, pending)
+                    while pending:
+                        _drain(f, pending)
+
+        for quant_type in quant_types:
+            output_dir = output_dirs[quant_type]
+            shards = writers[quant_type].finalize()
+            with open(os.path.join(output_dir, QUANTO_QMAP_NAME), "w", encoding="utf8") as f:
+                json.dump(qmaps[quant_type], f, indent=4)
+            _copy_model_files(source_dir, output_dir)
+            manifest["variants"][quant_type] = {
+                "output_dir": output_dir,
+                "shards": shards,
+                "total_size_bytes": writers[quant_type].total_size,
+                "quantized_tensors": len(qmaps[quant_type]),
+                "quantize_sec": round(quantize_sec[quant_type], 3),
+            }
+
+        manifest.update({
+            "success": True,
+            "source_dir": source_dir,
+            "tensors": tensor_count,
+            "timings": {"total_sec": round(time.perf_counter() - start, 3)},
+            "peak_rss_mb": round(get_peak_rss_mb(), 1),
+            "worker_peak_rss_mb": round(worker_peak_rss, 1),
+        })
+        print(f"모델이 {', '.join(quant_types)} 변형으로 변환되었습니다. ({manifest['timings']['total_sec']:.1f}초)")
+    except Exception as e:
+        print(f"모델 변환 중 오류 발생: {e}")
+        manifest.update({
+            "success": False,
+            "error": str(e),
+            "timings": {"total_sec": round(time.perf_counter() - start, 3)},
+            "peak_rss_mb": round(get_peak_rss_mb(), 1),
+        })
+
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    manifest["manifest_path"] = manifest_path
+    return manifest
+
+def convert_model_multi_variant_subprocess(
+    model_id: str,
+    output_base_dir: str = "./models/transformers",
+    quant_types=("int8", "int4", "float8"),
+    max_workers: int = None,
+    max_shard_size="2GB",
+    manifest_path: str = None,
+) -> dict:
+    """
+    convert_model_multi_variant를 별도 프로세스(python model_converter.py multi ...)에서 실행하는 함수.
+    spawn 워커는 부모의 __main__을 다시 import하므로, 앱(app.py) 안에서 바로 풀을 만들면
+    워커마다 UI 구성과 DB 초기화가 반복된다. 이 모듈을 진입점으로 하는 자식 프로세스에서 풀을 만들어 이를 피한다.
+
+    Returns:
+        dict: 매니페스트 내용 (convert_model_multi_variant와 동일)
+    """
+    quant_types = list(dict.fromkeys(quant_types))
+    manifest_path = manifest_path or _default_manifest_path(model_id, output_base_dir)
+    command = [
+        sys.executable, os.path.abspath(__file__), "multi", model_id,
+        "--output-base-dir", output_base_dir,
+        "--quant-types", *quant_types,
+        "--max-shard-size", str(max_shard_size),
+        "--manifest", manifest_path,
+    ]
+    if max_workers:
+        command += ["--workers", str(max_workers)]
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    completed = subprocess.run(command)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        return {
+            "success": False,
+            "model_id": model_id,
+            "error": f"변환 프로세스가 매니페스트를 남기지 않았습니다. (종료 코드 {completed.returncode}: {e})",
+        }
+    manifest["manifest_path"] = manifest_path
+    return manifest
+
+# ORTQuantizer 동적 int8 양자화 설정 (CPU 명령어 집합별)
+ONNX_QUANTIZE_CONFIGS = ["none", "arm64", "avx2", "avx512", "avx512_vnni"]
+ONNX_MODEL_NAME = "model.onnx"
+ONNX_QUANTIZED_MODEL_NAME = "model_quantized.onnx"
+
+def export_model_to_onnx(model_id: str, output_dir: str, quantize: str = "none") -> dict:
+    """
+    transformers 디코더 모델을 KV 캐시 입출력(past_key_values)을 포함한 ONNX로 내보낸다.
+    quantize가 'none'이 아니면 ORTQuantizer로 가중치 동적 int8 양자화된 model_quantized.onnx를 추가로 생성한다.
+    결과물은 ORTModelForCausalLM.from_pretrained로 로드할 수 있다. (onnx 모델 유형)
+
+    Returns:
+        dict: success, output_dir, files, elapsed_sec, peak_rss_mb (실패 시 error 포함)
+    """
+    if quantize not in ONNX_QUANTIZE_CONFIGS:
+        raise ValueError(f"지원되지 않는 ONNX 양자화 설정: {quantize}")
+    start = time.perf_counter()
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM
+
+        print(f"[*] ONNX 내보내기 중: {model_id} → {output_dir}")
+        model = ORTModelForCausalLM.from_pretrained(model_id, export=True, use_cache=True, trust_remote_code=True)
+        model.save_pretrained(output_dir)
+        tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
+        tokenizer.save_pretrained(output_dir)
+        del model
+        gc.collect()
+
+        if quantize != "none":
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            print(f"[*] ONNX 동적 int8 양자화 중: {quantize}")
+            qconfig = getattr(AutoQuantizationConfig, quantize)(is_static=False, per_channel=False)
+            quantizer = ORTQuantizer.from_pretrained(output_dir, file_name=ONNX_MODEL_NAME)
+            quantizer.quantize(save_dir=output_dir, quantization_config=qconfig)
+
+        report = {
+            "success": True,
+            "model_id": model_id,
+            "output_dir": output_dir,
+            "quantize": quantize,
+            "files": sorted(f for f in os.listdir(output_dir) if f.endswith((".onnx", ".onnx_data"))),
+            "elapsed_sec": time.perf_counter() - start,
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+        print(f"모델이 ONNX로 내보내져 '{output_dir}'에 저장되었습니다. ({report['elapsed_sec']:.1f}초)")
+        return report
+    except Exception as e:
+        print(f"ONNX 내보내기 중 오류 발생: {e}")
+        return {
+            "success": False,
+            "model_id": model_id,
+            "output_dir": output_dir,
+            "quantize": quantize,
+            "error": str(e),
+            "elapsed_sec": time.perf_counter() - start,
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+
+def parse_converter_args(argv=None):
+    parser = argparse.ArgumentParser(description="Easy-LLM 모델 변환 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stream_parser = subparsers.add_parser("stream", help="샤드 단위 저메모리 스트리밍 양자화")
+    stream_parser.add_argument("model_id", help="HuggingFace 모델 ID 또는 로컬 모델 디렉토리")
+    stream_parser.add_argument("output_dir", help="변환된 모델을 저장할 디렉토리")
+    stream_parser.add_argument(
+        "--quant-type",
+        choices=list(STREAMING_QTYPES.keys()),
+        default="int8",
+        help="양자화 유형을 지정합니다. (default: %(default)s)"
+    )
+    stream_parser.add_argument(
+        "--max-shard-size",
+        default="2GB",
+        help="출력 샤드 하나의 최대 크기를 지정합니다. (default: %(default)s)"
+    )
+    stream_parser.add_argument("--push-to-hub", action="store_true", help="변환 후 Hugging Face Hub에 푸시합니다.")
+
+    multi_parser = subparsers.add_parser("multi", help="원본을 한 번만 읽어 여러 양자화 변형을 병렬 생성")
+    multi_parser.add_argument("model_id", help="HuggingFace 모델 ID 또는 로컬 모델 디렉토리")
+    multi_parser.add_argument(
+        "--output-base-dir",
+        default="./models/transformers",
+        help="변형별 출력 디렉토리가 생성될 상위 디렉토리를 지정합니다. (default: %(default)s)"
+    )
+    multi_parser.add_argument(
+        "--quant-types",
+        nargs="+",
+        choices=list(STREAMING_QTYPES.keys()),
+        default=["int8", "int4", "float8"],
+        help="생성할 양자화 변형 목록을 지정합니다. (default: %(default)s)"
+    )
+    multi_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="텐서 양자화에 사용할 프로세스 수를 지정합니다. (default: CPU 코어 수, 최대 8)"
+    )
+    multi_parser.add_argument(
+        "--max-shard-size",
+        default="2GB",
+        help="출력 샤드 하나의 최대 크기를 지정합니다. (default: %(default)s)"
+    )
+    multi_parser.add_argument("--manifest", default=None, help="매니페스트 JSON 경로를 지정합니다.")
+
+    onnx_parser = subparsers.add_parser("export-onnx", help="KV 캐시 입출력을 포함한 ONNX 디코더로 내보내기")
+    onnx_parser.add_argument("model_id", help="HuggingFace 모델 ID 또는 로컬 모델 디렉토리")
+    onnx_parser.add_argument(
+        "output_dir",
+        nargs="?",
+        default=None,
+        help="ONNX 모델을 저장할 디렉토리 (default: ./models/onnx/<모델 ID>)"
+    )
+    onnx_parser.add_argument(
+        "--quantize",
+        choices=ONNX_QUANTIZE_CONFIGS,
+        default="none",
+        help="ORTQuantizer 동적 int8 양자화에 사용할 CPU 설정을 지정합니다. (default: %(default)s)"
+    )
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_converter_args(argv)
+    if args.command == "stream":
+        report = convert_model_streaming(
+            args.model_id,
+            args.output_dir,
+            quant_type=args.quant_type,
+            max_shard_size=args.max_shard_size,
+            push_to_hub=args.push_to_hub,
+        )
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0 if report["success"] else 1
+    elif args.command == "multi":
+        manifest = convert_model_multi_variant(
+            args.model_id,
+            output_base_dir=args.output_base_dir,
+            quant_types=args.quant_types,
+            max_workers=args.workers,
+            max_shard_size=args.max_shard_size,
+            manifest_path=args.manifest,
+        )
+        print(json.dumps(manifest, ensure_ascii=False, indent=2))
+        return 0 if manifest["success"] else 1
+    elif args.command == "export-onnx":
+        model_id = args.model_id.rstrip("/")
+        local_name = os.path.basename(model_id) if os.path.isdir(model_id) else model_id.replace("/", "__")
+        output_dir = args.output_dir or os.path.join("./models", "onnx", local_name)
+        report = export_model_to_onnx(args.model_id, output_dir, quantize=args.quantize)
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0 if report["success"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,34 @@
 # persona_speech_manager.py
 import logging
-from typing import Dict
+from typing import Dict, Iterable, Iterator
 from src.common.database import load_system_presets
+from src.characters.tone_converter import convert_tone, create_incremental_converter
 import sqlite3
-
-import re
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+
+# persona_state 테이블을 이미 만든 DB 경로 (세션마다 인스턴스를 만들어도 한 번만 초기화)
+_initialized_db_paths = set()
+_initialize_lock = threading.Lock()
+
+def delete_persona_state(session_id=None, db_path='persona_state.db'):
+    """저장된 세션 상태를 삭제. session_id가 없으면 전체 삭제"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='persona_state'")
+        if cursor.fetchone() is None:
+            return
+        if session_id is None:
+            cursor.execute("DELETE FROM persona_state")
+        else:
+            cursor.execute("DELETE FROM persona_state WHERE session_id = ?", (session_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
 class PersonaSpeechManager:
     def __init__(self, translation_manager, characters: Dict[str, Dict[str, str]], db_path='persona_state.db'):
         """
@@ -138,188 +159,91 @@ class PersonaSpeechManager:
         # 다른 언어의 변환 로직 추가 가능
         return content
 
+    def create_stream_converter(self):
+        """
+        현재 캐릭터의 말투와 언어에 맞는 스트리밍 변환기를 반환. 변환 규칙이 없으면 None
+        """
+        if not self.current_character:
+            raise ValueError("캐릭터가 설정되지 않았습니다.")
+        tone = self.current_tone if hasattr(self, 'current_tone') else self.characters[self.current_character]["default_tone"]
+        return create_incremental_converter(self.current_language, tone)
+
+    def stream_response(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        토큰 청크를 받아 설정된 말투로 변환하며 내보냄.
+        이어 붙인 결과는 generate_response(전체 응답)과 같다.
+        """
+        converter = self.create_stream_converter()
+        if converter is None:
+            yield from chunks
+            return
+        yield from converter.stream(chunks)
+
     # 한국어 변환 메서드들
+    # 규칙은 tone_converter.TONE_RULES에 있으며, (언어, 말투)별로 한 번 컴파일된 정규식으로 한 번에 치환한다.
     def convert_to_casual(self, content: str) -> str:
         """
-        한국어 존댓말을 반말로 변환 (정규 표현식 사용)
-        """
-        # 예시: "입니다"를 "야"로 변환
-        content = re.sub(r'안녕하세요\b', '안녕', content)
-        content = re.sub(r'\b합시다\b', '하자', content)
-        content = re.sub(r'\b드려요\b', '줘', content)
-        content = re.sub(r'예\b', '응', content)
-        content = re.sub(r'네\b', '응', content)
-        content = re.sub(r'감사합니다\b', '고마워', content)
-        content = re.sub(r'죄송합니다\b','미안해', content)
-        content = re.sub(r'\b입니다\b', '야', content)
-        content = re.sub(r'\b습니다\b', '어', content)
-        content = re.sub(r'좋습니다\b', '좋아', content)
-        content = re.sub(r'\b합니다\b', '해', content)
-        content = re.sub(r'\b입니까\b', '일까', content)
-        content = re.sub(r'\b인가요\b', '일까', content)
-        content = re.sub(r'\b할겁니까\b', '할까', content)
-        content = re.sub(r'\b할까요\b', '할까', content)
-        content = re.sub(r'\b예요\b', '야', content)
-        content = re.sub(r'\b어요\b', '어', content)
-        content = re.sub(r'\b해요\b', '해', content)
-        content = re.sub(r'\b가요\b', '가', content)
-        content = re.sub(r'\b봐요\b', '봐', content)
-        content = re.sub(r'\b주세요\b', '줘', content)
-        content = re.sub(r'\b줘요\b', '줘', content)
-        content = re.sub(r'\b죠\b', '지', content)
-        content = re.sub(r'\b싶어요\b', '싶어', content)
-        content = re.sub(r'\b요\b', '', content)
-        content = re.sub(r'반가워요\b', '반가워', content)
-        content = re.sub(r'계신가요\b', '있어?', content)
-        content = re.sub(r'있으신가요\b', '있어?', content)
-        return content.strip()
-
+        한국어 존댓말을 반말로 변환
+        """
+        return convert_tone(content, "ko", "반말")
 
     def convert_to_formal(self, content: str) -> str:
         """
-        한국어 반말을 존댓말로 변환 (정규 표현식 사용)
-        """
-        # 예시: "야"를 "예요"로 변환
-        content = re.sub(r'\b야\b', '예요', content)
-        content = re.sub(r'\b응\b', '예요', content)
-        content = re.sub(r'\b해\b', '합니다', content)
-        content = re.sub(r'\b어\b', '습니다', content)
-        content = re.sub(r'\b지\b', '죠', content)
-        # 추가적인 변환 규칙을 아래에 추가할 수 있습니다.
-        # 예를 들어:
-        content = re.sub(r'\b할까\b', '할까요', content)
-        content = re.sub(r'\b일까\b', '입니까', content)
-        content = re.sub(r'\b왔어\b', '왔어요', content)
-        content = re.sub(r'\b봐\b', '봐요', content)
-        content = re.sub(r'\b줘\b', '주세요', content)
-        content = re.sub(r'\b싶어\b', '싶어요', content)
-        return content.strip()
+        한국어 반말을 존댓말로 변환
+        """
+        return convert_tone(content, "ko", "존댓말")
 
     # 영어 변환 메서드들
     def convert_to_casual_english(self, content: str) -> str:
         """
-        영어 formal을 casual로 변환 (예시)
-        """
-        replacements = {
-            "I am": "I'm",
-            "do not": "don't",
-            "cannot": "can't",
-            "would like": "wanna",
-            "could you": "could you please",
-            # 추가적인 변환 규칙
-        }
-        for formal, casual in replacements.items():
-            content = content.replace(formal, casual)
-        return content
+        영어 formal을 casual로 변환
+        """
+        return convert_tone(content, "en", "casual")
 
     def convert_to_formal_english(self, content: str) -> str:
         """
-        영어 casual을 formal로 변환 (예시)
-        """
-        replacements = {
-            "I'm": "I am",
-            "don't": "do not",
-            "can't": "cannot",
-            "wanna": "would like to",
-            "could you": "could you please",
-            # 추가적인 변환 규칙
-        }
-        for casual, formal in replacements.items():
-            content = content.replace(casual, formal)
-        return content
+        영어 casual을 formal로 변환
+        """
+        return convert_tone(content, "en", "formal")
 
     # 일본어 변환 메서드들
     def convert_to_casual_japanese(self, content: str) -> str:
         """
-        일본어 포멀을 캐주얼로 변환 (예시)
-        """
-        replacements = {
-            "です": "だよ",
-            "ます": "るよ",
-            "ございます": "あげるよ",
-            "いただきます": "もらうよ",
-            # 추가적인 변환 규칙
-        }
-        for formal, casual in replacements.items():
-            content = content.replace(formal, casual)
-        return content
+        일본어 포멀을 캐주얼로 변환
+        """
+        return convert_tone(content, "ja", "カジュアル")
 
     def convert_to_formal_japanese(self, content: str) -> str:
         """
-        일본어 캐주얼을 포멀로 변환 (예시)
-        """
-        replacements = {
-            "だよ": "です",
-            "るよ": "ます",
-            "あげるよ": "ございます",
-            "もらうよ": "いただきます",
-            # 추가적인 변환 규칙
-        }
-        for casual, formal in replacements.items():
-            content = content.replace(casual, formal)
-        return content
+        일본어 캐주얼을 포멀로 변환
+        """
+        return convert_tone(content, "ja", "フォーマル")
 
     # 중국어 간체 변환 메서드들
     def convert_to_casual_simplified_chinese(self, content: str) -> str:
         """
-        중국어 간체 正式을 随便으로 변환 (예시)
-        """
-        replacements = {
-            "您好": "嘿",
-            "请问": "请",
-            "谢谢": "谢谢你",
-            "不客气": "没事",
-            # 추가적인 변환 규칙
-        }
-        for formal, casual in replacements.items():
-            content = content.replace(formal, casual)
-        return content
+        중국어 간체 正式을 随便으로 변환
+        """
+        return convert_tone(content, "zh_CN", "随便")
 
     def convert_to_formal_simplified_chinese(self, content: str) -> str:
         """
-        중국어 간체 随便을 正式으로 변환 (예시)
-        """
-        replacements = {
-            "嘿": "您好",
-            "请": "请问",
-            "谢谢你": "谢谢",
-            "没事": "不客气",
-            # 추가적인 변환 규칙
-        }
-        for casual, formal in replacements.items():
-            content = content.replace(casual, formal)
-        return content
+        중국어 간체 随便을 正式으로 변환
+        """
+        return convert_tone(content, "zh_CN", "正式")
 
     # 중국어 번체 변환 메서드들
     def convert_to_casual_traditional_chinese(self, content: str) -> str:
         """
-        중국어 번체 正式을 隨便으로 변환 (예시)
-        """
-        replacements = {
-            "您好": "嘿",
-            "請問": "請",
-            "謝謝": "謝謝你",
-            "不客氣": "沒事",
-            # 추가적인 변환 규칙
-        }
-        for formal, casual in replacements.items():
-            content = content.replace(formal, casual)
-        return content
+        중국어 번체 正式을 隨便으로 변환
+        """
+        return convert_tone(content, "zh_TW", "隨便")
 
     def convert_to_formal_traditional_chinese(self, content: str) -> str:
         """
-        중국어 번체 隨便을 正式으로 변환 (예시)
-        """
-        replacements = {
-            "嘿": "您好",
-            "請": "請問",
-            "謝謝你": "謝謝",
-            "沒事": "不客氣",
-            # 추가적인 변환 규칙
-        }
-        for casual, formal in replacements.items():
-            content = content.replace(casual, formal)
-        return content
+        중국어 번체 隨便을 正式으로 변환
+        """
+        return convert_tone(content, "zh_TW", "正式")
 
     def process_input(self, user_input: str, base_response: str) -> str:
         """
@@ -329,6 +253,10 @@ class PersonaSpeechManager:
         return self.generate_response(base_response)
     
     def _initialize_db(self):
+        with _initialize_lock:
+            if self.db_path in _initialized_db_paths:
+                return
+            _initialized_db_paths.add(self.db_path)
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute('''
@@ -359,7 +287,7 @@ class PersonaSpeechManager:
         conn.close()
         logger.info(f"세션 {session_id}의 상태가 데이터베이스에 저장되었습니다.")
 
-    def load_state(self, session_id: str):
+    def load_state(self, session_id: str) -> bool:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute('SELECT current_character, current_language, current_tone, current_system_preset FROM persona_state WHERE session_id = ?', (session_id,))
@@ -368,7 +296,8 @@ class PersonaSpeechManager:
         if row:
             self.current_character, self.current_language, self.current_tone, self.current_system_preset = row
             logger.info(f"세션 {session_id}의 상태가 데이터베이스에서 로드되었습니다.")
-        else:
-            logger.warning(f"세션 {session_id}의 상태를 데이터베이스에서 찾을 수 없습니다.")
+            return True
+        logger.info(f"세션 {session_id}의 저장된 상태가 없습니다.")
+        return False
             
     
\ No newline at end of file
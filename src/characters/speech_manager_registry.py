@@ -0,0 +1,179 @@
+# speech_manager_registry.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from src.characters.persona_speech_manager import PersonaSpeechManager, delete_persona_state
+
+logger = logging.getLogger(__name__)
+
+class PersonaSpeechManagerRegistry:
+    """
+    세션별 PersonaSpeechManager를 보관하는 크기 제한 LRU 레지스트리.
+    - 최대 max_sessions개까지만 메모리에 유지하고, 가장 오래 사용하지 않은 세션부터 내보낸다.
+    - idle_timeout(초) 동안 사용하지 않은 세션도 내보낸다. 0이면 시간 제한을 두지 않는다.
+    - 내보낼 때 save_state로 상태를 persona_state.db에 저장하고, 다시 요청되면 load_state로 복원한다.
+    - 관리자 생성/복원과 저장은 잠금 밖에서 하므로 느린 DB 작업이 다른 세션의 get을 막지 않는다.
+      저장이 끝나기 전에 다시 요청된 세션은 DB에서 읽지 않고 내보낸 관리자를 그대로 되살린다.
+    """
+    def __init__(self, factory: Callable[[], PersonaSpeechManager], max_sessions: int = 256, idle_timeout: float = 1800, db_path: str = 'persona_state.db'):
+        self.factory = factory
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.db_path = db_path
+        self._entries = OrderedDict()  # session_id -> (manager, 마지막 사용 시각)
+        self._evicting = {}  # session_id -> (manager, 진행 중인 저장 수): 내보냈지만 아직 저장하지 않은 관리자
+        self._loading = {}  # session_id -> threading.Event: 잠금 밖에서 생성/복원 중인 세션
+        self._lock = threading.Lock()
+        self._stop_expiry = threading.Event()
+        self._expiry_thread = None
+        self.hits = 0
+        self.restores = 0
+        self.evictions = 0
+
+    def _pop_evictable(self, now):
+        """용량 초과 또는 유휴 시간이 지난 항목을 꺼내 반환 (잠금 안에서 호출)"""
+        evicted = []
+        while self._entries:
+            session_id, (manager, last_used) = next(iter(self._entries.items()))
+            expired = self.idle_timeout and now - last_used > self.idle_timeout
+            if len(self._entries) <= self.max_sessions and not expired:
+                break
+            self._entries.popitem(last=False)
+            pending = self._evicting.get(session_id, (manager, 0))[1]
+            self._evicting[session_id] = (manager, pending + 1)
+            evicted.append((session_id, manager))
+        return evicted
+
+    def _persist(self, evicted):
+        """내보낸 관리자의 상태를 저장한 뒤 저장 대기 목록에서 뺀다 (잠금 밖에서 호출)"""
+        for session_id, manager in evicted:
+            self.evictions += 1
+            with self._lock:
+                # 저장 전에 discard된 세션은 지운 상태를 되살리지 않도록 건너뛴다.
+                discarded = session_id not in self._evicting
+            if not discarded and manager.current_character:
+                # 캐릭터를 설정한 적 없는 세션은 저장할 상태가 없다.
+                try:
+                    manager.save_state(session_id)
+                except Exception as e:
+                    logger.error(f"세션 {session_id}의 말투 상태 저장 실패: {e}")
+            with self._lock:
+                entry = self._evicting.get(session_id)
+                if entry is not None:
+                    if entry[1] > 1:
+                        self._evicting[session_id] = (entry[0], entry[1] - 1)
+                    else:
+                        del self._evicting[session_id]
+
+    def _touch(self, session_id, manager, now):
+        """관리자를 가장 최근에 사용한 항목으로 등록하고 내보낼 항목을 반환 (잠금 안에서 호출)"""
+        self._entries[session_id] = (manager, now)
+        self._entries.move_to_end(session_id)
+        return self._pop_evictable(now)
+
+    def get(self, session_id: str) -> PersonaSpeechManager:
+        """세션의 PersonaSpeechManager를 반환. 메모리에 없으면 만들고 저장된 상태가 있으면 복원"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                entry = self._entries.get(session_id) or self._evicting.get(session_id)
+                if entry is not None:
+                    # 메모리에 있거나, 내보냈지만 아직 저장 중인 관리자는 그대로 사용
+                    self.hits += 1
+                    manager = entry[0]
+                    evicted = self._touch(session_id, manager, now)
+                    break
+                loading = self._loading.get(session_id)
+                if loading is None:
+                    loading = self._loading[session_id] = threading.Event()
+                    manager = None
+                    break
+            # 다른 스레드가 같은 세션을 복원하는 중이면 끝날 때까지 기다린 뒤 다시 확인
+            loading.wait()
+
+        if manager is None:
+            try:
+                manager = self.factory()
+                try:
+                    if manager.load_state(session_id):
+                        self.restores += 1
+                except Exception as e:
+                    logger.error(f"세션 {session_id}의 말투 상태 복원 실패: {e}")
+            finally:
+                with self._lock:
+                    del self._loading[session_id]
+                    evicted = self._touch(session_id, manager, time.monotonic()) if manager is not None else []
+                loading.set()
+        self._persist(evicted)
+        return manager
+
+    def expire_idle(self):
+        """유휴 시간이 지난 세션을 내보내고 그 수를 반환"""
+        with self._lock:
+            evicted = self._pop_evictable(time.monotonic())
+        self._persist(evicted)
+        return len(evicted)
+
+    def start_expiry_timer(self, interval: Optional[float] = None):
+        """
+        유휴 세션을 주기적으로 내보내는 백그라운드 스레드를 시작.
+        get이 호출되지 않아도 idle_timeout이 지난 세션의 상태가 저장되고 메모리에서 해제된다.
+        """
+        if not self.idle_timeout or self._expiry_thread is not None:
+            return
+        interval = interval or min(max(self.idle_timeout / 2, 1), 60)
+
+        def _run():
+            while not self._stop_expiry.wait(interval):
+                try:
+                    self.expire_idle()
+                except Exception as e:
+                    logger.error(f"유휴 세션 말투 상태 정리 실패: {e}")
+
+        self._expiry_thread = threading.Thread(target=_run, name="speech-session-expiry", daemon=True)
+        self._expiry_thread.start()
+
+    def close(self):
+        """만료 스레드를 멈추고 메모리에 있는 모든 세션의 상태를 저장 (종료 시 호출)"""
+        self._stop_expiry.set()
+        try:
+            self.save_all()
+        except Exception as e:
+            logger.error(f"말투 상태 저장 실패: {e}")
+
+    def discard(self, session_id: Optional[str] = None):
+        """세션(없으면 전체)을 메모리와 저장된 상태에서 모두 제거 (세션 초기화/삭제용)"""
+        with self._lock:
+            if session_id is None:
+                self._entries.clear()
+                self._evicting.clear()
+            else:
+                self._entries.pop(session_id, None)
+                self._evicting.pop(session_id, None)
+        try:
+            delete_persona_state(session_id, db_path=self.db_path)
+        except Exception as e:
+            logger.error(f"말투 상태 삭제 실패: {e}")
+
+    def save_all(self):
+        """메모리에 있는 모든 세션의 상태를 저장 (종료 시 사용)"""
+        with self._lock:
+            entries = [(session_id, manager) for session_id, (manager, _) in self._entries.items()]
+        for session_id, manager in entries:
+            if not manager.current_character:
+                continue
+            try:
+                manager.save_state(session_id)
+            except Exception as e:
+                logger.error(f"세션 {session_id}의 말투 상태 저장 실패: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._entries
@@ -0,0 +1,364 @@
+# tone_converter.py
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# (언어, 목표 말투)별 변환 규칙: (정규식 패턴, 치환 문자열)
+# 한국어 규칙은 단어 경계(\b)를 포함한 정규식, 나머지 언어는 문자열 그대로 치환한다.
+TONE_RULES: Dict[Tuple[str, str], List[Tuple[str, str]]] = {
+    # 한국어 존댓말 → 반말
+    ("ko", "반말"): [
+        (r'안녕하세요\b', '안녕'),
+        (r'\b합시다\b', '하자'),
+        (r'\b드려요\b', '줘'),
+        (r'예\b', '응'),
+        (r'네\b', '응'),
+        (r'감사합니다\b', '고마워'),
+        (r'죄송합니다\b', '미안해'),
+        (r'\b입니다\b', '야'),
+        (r'\b습니다\b', '어'),
+        (r'좋습니다\b', '좋아'),
+        (r'\b합니다\b', '해'),
+        (r'\b입니까\b', '일까'),
+        (r'\b인가요\b', '일까'),
+        (r'\b할겁니까\b', '할까'),
+        (r'\b할까요\b', '할까'),
+        (r'\b예요\b', '야'),
+        (r'\b어요\b', '어'),
+        (r'\b해요\b', '해'),
+        (r'\b가요\b', '가'),
+        (r'\b봐요\b', '봐'),
+        (r'\b주세요\b', '줘'),
+        (r'\b줘요\b', '줘'),
+        (r'\b죠\b', '지'),
+        (r'\b싶어요\b', '싶어'),
+        (r'\b요\b', ''),
+        (r'반가워요\b', '반가워'),
+        (r'계신가요\b', '있어?'),
+        (r'있으신가요\b', '있어?'),
+    ],
+    # 한국어 반말 → 존댓말
+    ("ko", "존댓말"): [
+        (r'\b야\b', '예요'),
+        (r'\b응\b', '예요'),
+        (r'\b해\b', '합니다'),
+        (r'\b어\b', '습니다'),
+        (r'\b지\b', '죠'),
+        (r'\b할까\b', '할까요'),
+        (r'\b일까\b', '입니까'),
+        (r'\b왔어\b', '왔어요'),
+        (r'\b봐\b', '봐요'),
+        (r'\b줘\b', '주세요'),
+        (r'\b싶어\b', '싶어요'),
+    ],
+    ("en", "casual"): [
+        ("I am", "I'm"),
+        ("do not", "don't"),
+        ("cannot", "can't"),
+        ("would like", "wanna"),
+        ("could you", "could you please"),
+    ],
+    ("en", "formal"): [
+        ("I'm", "I am"),
+        ("don't", "do not"),
+        ("can't", "cannot"),
+        ("wanna", "would like to"),
+        ("could you", "could you please"),
+    ],
+    ("ja", "カジュアル"): [
+        ("です", "だよ"),
+        ("ます", "るよ"),
+        ("ございます", "あげるよ"),
+        ("いただきます", "もらうよ"),
+    ],
+    ("ja", "フォーマル"): [
+        ("だよ", "です"),
+        ("るよ", "ます"),
+        ("あげるよ", "ございます"),
+        ("もらうよ", "いただきます"),
+    ],
+    ("zh_CN", "随便"): [
+        ("您好", "嘿"),
+        ("请问", "请"),
+        ("谢谢", "谢谢你"),
+        ("不客气", "没事"),
+    ],
+    ("zh_CN", "正式"): [
+        ("嘿", "您好"),
+        ("请", "请问"),
+        ("谢谢你", "谢谢"),
+        ("没事", "不客气"),
+    ],
+    ("zh_TW", "隨便"): [
+        ("您好", "嘿"),
+        ("請問", "請"),
+        ("謝謝", "謝謝你"),
+        ("不客氣", "沒事"),
+    ],
+    ("zh_TW", "正式"): [
+        ("嘿", "您好"),
+        ("請", "請問"),
+        ("謝謝你", "謝謝"),
+        ("沒事", "不客氣"),
+    ],
+}
+
+# 정규식 규칙을 사용하는 언어 (나머지는 문자열 그대로 매칭)
+REGEX_LANGUAGES = frozenset(["ko"])
+
+# 변환 후 앞뒤 공백을 제거하는 언어 (기존 한국어 변환 동작 유지)
+STRIP_LANGUAGES = frozenset(["ko"])
+
+_WHOLE_WORD = re.compile(r"\\b(\w+)\\b")
+_WORD_SUFFIX = re.compile(r"(\w+)\\b")
+_WORD = re.compile(r"\w+")
+_TRAILING_WORD = re.compile(r"\w*\Z")
+
+def _literal_length(pattern: str) -> int:
+    return len(pattern.replace("\\b", ""))
+
+# 문자열 규칙을 치환할 때 임시로 쓰는 자리표시자 (유니코드 사용자 정의 영역)
+_PLACEHOLDER_BASE = 0xE000
+
+def _literals_overlap(rules: List[Tuple[str, str]]) -> bool:
+    """서로 다른 두 패턴의 앞뒤가 겹치는지 검사 (예: 'ab'와 'bc')"""
+    patterns = [pattern for pattern, _ in rules]
+    for pattern in patterns:
+        for other in patterns:
+            if pattern is other:
+                continue
+            if any(pattern.startswith(other[-k:]) for k in range(1, min(len(pattern), len(other)))):
+                return True
+    return False
+
+def _literals_chain(rules: List[Tuple[str, str]]) -> bool:
+    """패턴이 다른 패턴에 포함되거나 앞선 규칙의 치환 결과에 다시 나타나는지 검사"""
+    for i, (pattern, _) in enumerate(rules):
+        for j, (other, replacement) in enumerate(rules):
+            if i != j and (pattern in other or (j < i and pattern in replacement)):
+                return True
+    return False
+
+class ToneConverter:
+    """
+    말투 변환 규칙을 한 번 컴파일해 두고 응답을 한 번의 스캔으로 치환.
+    - 단어 규칙(\\b단어\\b, 접미사\\b)만 있는 경우: \\w+ 단위로 한 번 스캔하며 사전 조회로 치환
+    - 서로 영향을 주지 않는 문자열 규칙: 결과가 같으므로 str.replace를 차례로 적용
+    - 포함 관계만 있는 문자열 규칙: 긴 패턴부터 자리표시자로 바꾼 뒤 치환 문자열로 되돌림
+    - 그 외: 하나의 교대(alternation) 정규식으로 컴파일
+    같은 위치에서 여러 규칙이 맞으면 더 긴 규칙이 우선하며(예: 'ございます'가 'ます'보다 우선),
+    치환 결과는 다시 검사하지 않으므로 규칙끼리 연쇄 적용되지 않는다.
+    """
+    def __init__(self, rules: List[Tuple[str, str]], regex: bool = True, strip: bool = False):
+        length = _literal_length if regex else len
+        self.rules = rules
+        self.strip = strip
+        self.max_literal_length = max((length(p) for p, _ in rules), default=0)
+        self.pattern = None
+        self.literal_rules = None
+        self.placeholders = None
+        self.whole_words = None
+        self.suffixes = None
+        self.prefixes = None
+
+        ordered = sorted(enumerate(rules), key=lambda item: (-length(item[1][0]), item[0]))
+        if regex and all(_WHOLE_WORD.fullmatch(p) or _WORD_SUFFIX.fullmatch(p) for p, _ in rules):
+            self.whole_words = {}
+            suffixes = []
+            for pattern, replacement in rules:
+                whole = _WHOLE_WORD.fullmatch(pattern)
+                if whole:
+                    self.whole_words.setdefault(whole.group(1), replacement)
+                else:
+                    suffixes.append((_WORD_SUFFIX.fullmatch(pattern).group(1), replacement))
+            # 긴 접미사 우선
+            self.suffixes = sorted(suffixes, key=lambda item: -len(item[0]))
+            self.pattern = _WORD
+            return
+
+        if not regex:
+            # 스트리밍 변환에서 보류할 꼬리를 판단하기 위한 패턴 접두사 집합
+            self.prefixes = {pattern[:k] for pattern, _ in rules for k in range(1, len(pattern))}
+            self.replacements = dict(reversed(rules))
+            if not _literals_overlap(rules):
+                if not _literals_chain(rules):
+                    self.literal_rules = list(rules)
+                else:
+                    self.placeholders = [
+                        (pattern, chr(_PLACEHOLDER_BASE + index), replacement)
+                        for index, (_, (pattern, replacement)) in enumerate(ordered)
+                    ]
+            self.pattern = re.compile("|".join(re.escape(p) for _, (p, _) in ordered)) if rules else None
+            self._replace_match = self._replace_literal
+            return
+
+        self.replacements = {}
+        alternatives = []
+        for index, (pattern, replacement) in ordered:
+            name = f"r{index}"
+            self.replacements[name] = replacement
+            alternatives.append(f"(?P<{name}>{pattern})")
+        self.pattern = re.compile("|".join(alternatives)) if alternatives else None
+        self._replace_match = self._replace
+
+    def _replace(self, match) -> str:
+        return self.replacements[match.lastgroup]
+
+    def _replace_literal(self, match) -> str:
+        return self.replacements[match.group()]
+
+    def _replace_word(self, match) -> str:
+        word = match.group()
+        replacement = self.whole_words.get(word)
+        best = len(word) if replacement is not None else 0
+        for suffix, suffix_replacement in self.suffixes:
+            if len(suffix) <= best:
+                break
+            if word.endswith(suffix):
+                return word[:-len(suffix)] + suffix_replacement
+        return replacement if replacement is not None else word
+
+    def _uses_placeholders(self, content: str) -> bool:
+        return any(placeholder in content for _, placeholder, _ in self.placeholders)
+
+    def convert(self, content: str) -> str:
+        if self.literal_rules is not None:
+            for pattern, replacement in self.literal_rules:
+                content = content.replace(pattern, replacement)
+        elif self.placeholders is not None and not self._uses_placeholders(content):
+            for pattern, placeholder, _ in self.placeholders:
+                content = content.replace(pattern, placeholder)
+            for _, placeholder, replacement in self.placeholders:
+                content = content.replace(placeholder, replacement)
+        elif self.whole_words is not None:
+            content = self.pattern.sub(self._replace_word, content)
+        elif self.pattern is not None:
+            content = self.pattern.sub(self._replace_match, content)
+        return content.strip() if self.strip else content
+
+class IncrementalToneConverter:
+    """
+    토큰 청크를 받아 가며 말투를 변환하는 스트리밍 변환기.
+    아직 규칙에 걸릴 수 있는 최소한의 꼬리만 보류하고 나머지는 즉시 변환해 내보내며,
+    모든 청크를 넣은 뒤 flush()까지의 출력을 이어 붙이면 ToneConverter.convert(전체 응답)과 같다.
+    - 단어 규칙: 아직 끝나지 않은 마지막 단어(\\w+)만 보류
+    - 문자열 규칙: 어떤 패턴의 앞부분과 일치하는 꼬리만 보류
+    - 그 외 정규식 규칙: 가장 긴 규칙 길이 + 1(단어 경계 판정)만큼 보류
+    strip 언어는 앞 공백을 버리고, 뒤 공백은 다음 글자가 올 때까지 보류한다.
+    """
+    def __init__(self, converter: ToneConverter):
+        self.converter = converter
+        self._buffer = ""
+        self._context = ""  # 단어 경계 판정을 위한 직전 한 글자
+        self._pending_space = ""
+        self._started = False
+
+    def _scan(self, text: str, offset: int, cut: int) -> Tuple[str, int]:
+        """text[offset:cut] 안에서 시작하는 규칙을 치환하고 (변환 결과, 확정된 위치)를 반환"""
+        converter = self.converter
+        parts = []
+        last = offset
+        for match in converter.pattern.finditer(text, offset):
+            if match.start() >= cut:
+                break
+            parts.append(text[last:match.start()])
+            parts.append(converter._replace_match(match))
+            last = match.end()
+        if cut > last:
+            parts.append(text[last:cut])
+            last = cut
+        return "".join(parts), last
+
+    def _hold_back_from(self, text: str, offset: int) -> int:
+        """text에서 아직 확정할 수 없는 꼬리의 시작 위치"""
+        converter = self.converter
+        if converter.prefixes is not None:
+            for start in range(max(offset, len(text) - converter.max_literal_length + 1), len(text)):
+                if text[start:] in converter.prefixes:
+                    return start
+            return len(text)
+        return max(offset, len(text) - converter.max_literal_length)
+
+    def _emit(self, converted: str, final: bool = False) -> str:
+        if not self.converter.strip:
+            return converted
+        if not self._started:
+            converted = converted.lstrip()
+            if not converted:
+                return ""
+            self._started = True
+        converted = self._pending_space + converted
+        if final:
+            self._pending_space = ""
+            return converted.rstrip()
+        stripped = converted.rstrip()
+        self._pending_space = converted[len(stripped):]
+        return stripped
+
+    def _convert(self, final: bool) -> str:
+        converter = self.converter
+        buffer = self._buffer
+        if converter.pattern is None:
+            self._buffer = ""
+            return buffer
+        if converter.whole_words is not None:
+            end = len(buffer) if final else _TRAILING_WORD.search(buffer).start()
+            self._buffer = buffer[end:]
+            return converter.pattern.sub(converter._replace_word, buffer[:end])
+
+        text = self._context + buffer
+        offset = len(self._context)
+        cut = len(text) if final else self._hold_back_from(text, offset)
+        converted, last = self._scan(text, offset, cut)
+        if last > offset:
+            self._context = text[last - 1]
+        self._buffer = text[last:]
+        return converted
+
+    def feed(self, chunk: str) -> str:
+        """청크를 추가하고 지금 확정할 수 있는 변환 결과를 반환"""
+        if not chunk:
+            return ""
+        self._buffer += chunk
+        return self._emit(self._convert(final=False))
+
+    def flush(self) -> str:
+        """응답이 끝났을 때 보류 중인 꼬리를 변환해 반환하고 상태를 초기화"""
+        converted = self._emit(self._convert(final=True), final=True)
+        self._buffer = ""
+        self._context = ""
+        self._pending_space = ""
+        self._started = False
+        return converted
+
+    def stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """청크 이터러블을 받아 변환된 조각을 생성"""
+        for chunk in chunks:
+            converted = self.feed(chunk)
+            if converted:
+                yield converted
+        tail = self.flush()
+        if tail:
+            yield tail
+
+@lru_cache(maxsize=None)
+def get_tone_converter(language: str, tone: str):
+    """(언어, 말투)에 해당하는 컴파일된 변환기. 규칙이 없으면 None"""
+    rules = TONE_RULES.get((language, tone))
+    if rules is None:
+        return None
+    return ToneConverter(rules, regex=language in REGEX_LANGUAGES, strip=language in STRIP_LANGUAGES)
+
+def convert_tone(content: str, language: str, tone: str) -> str:
+    """한 번의 스캔으로 말투를 변환. 규칙이 없는 조합은 그대로 반환"""
+    converter = get_tone_converter(language, tone)
+    if converter is None:
+        return content
+    return converter.convert(content)
+
+def create_incremental_converter(language: str, tone: str):
+    """(언어, 말투)에 해당하는 스트리밍 변환기. 규칙이 없으면 None"""
+    converter = get_tone_converter(language, tone)
+    if converter is None:
+        return None
+    return IncrementalToneConverter(converter)
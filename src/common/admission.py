@@ -0,0 +1,172 @@
+# admission.py
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# 모델별 동시 실행 수/대기열 길이 설정 파일 (없으면 전역 인자 값 사용)
+# {"Qwen/Qwen2.5-7B-Instruct": {"max_concurrent": 2, "max_queue": 16}}
+ADMISSION_CONFIG_PATH = os.path.join("./models", "admission_config.json")
+
+# 대기 중 취소/마감 여부를 다시 확인하는 간격(초)
+_POLL_INTERVAL = 0.2
+
+class AdmissionRejected(Exception):
+    """대기열이 가득 차거나 대기 중 요청이 취소/만료되어 입장이 거부됨"""
+    pass
+
+class AdmissionController:
+    """
+    모델 핸들러 하나에 대한 입장 제어.
+    최대 max_concurrent개의 생성을 동시에 실행하고, 나머지는 도착 순서(FIFO)대로 대기시킨다.
+    대기 중인 요청이 max_queue개를 넘으면 새 요청은 즉시 거부(AdmissionRejected)한다.
+    """
+    def __init__(self, name, max_concurrent=1, max_queue=8):
+        self.name = name
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.active = 0
+        self.rejected = 0
+        self._waiting = deque()
+        self._cond = threading.Condition()
+
+    def position(self, ticket):
+        """대기열에서의 순번 (1부터 시작, 대기 중이 아니면 0)"""
+        with self._cond:
+            try:
+                return self._waiting.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "name": self.name,
+                "active": self.active,
+                "waiting": len(self._waiting),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "rejected": self.rejected,
+            }
+
+    def _can_enter(self, ticket):
+        return self.active < self.max_concurrent and self._waiting and self._waiting[0] is ticket
+
+    @contextmanager
+    def admit(self, control=None, ticket=None):
+        """
+        차례가 올 때까지 대기한 뒤 블록을 실행.
+        control(GenerationControl)이 주어지면 대기 중에도 중단/마감을 검사하고, 대기 시간을 control.queue_wait에 기록한다.
+        """
+        ticket = ticket if ticket is not None else object()
+        start = time.monotonic()
+        with self._cond:
+            if len(self._waiting) >= self.max_queue and not (self.active < self.max_concurrent and not self._waiting):
+                self.rejected += 1
+                raise AdmissionRejected(f"'{self.name}' 모델의 대기열이 가득 찼습니다. ({len(self._waiting)}/{self.max_queue})")
+            self._waiting.append(ticket)
+            try:
+                while not self._can_enter(ticket):
+                    if control is not None and control.should_stop():
+                        raise AdmissionRejected(f"'{self.name}' 모델 대기 중 요청이 중단되었습니다. ({control.stop_reason})")
+                    self._cond.wait(_POLL_INTERVAL)
+            except BaseException:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+                raise
+            self._waiting.popleft()
+            self.active += 1
+        wait = time.monotonic() - start
+        if control is not None:
+            control.queue_wait = wait
+        if wait > 1.0:
+            logger.info(f"[*] '{self.name}' 입장 대기 {wait:.2f}초")
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
+
+def load_admission_config(config_path=ADMISSION_CONFIG_PATH):
+    if not os.path.isfile(config_path):
+        return {}
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"입장 제어 설정 파일을 읽을 수 없습니다: {config_path} ({e})")
+        return {}
+
+class AdmissionRegistry:
+    """모델 캐시 키별 AdmissionController와 세션별 대기 티켓을 관리"""
+    def __init__(self, max_concurrent=1, max_queue=8, config=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.config = config if config is not None else load_admission_config()
+        self._controllers = {}
+        self._tickets = {}
+        self._lock = threading.Lock()
+
+    def controller(self, key, model_id=None):
+        with self._lock:
+            if key not in self._controllers:
+                options = self.config.get(model_id, {})
+                self._controllers[key] = AdmissionController(
+                    model_id or key,
+                    max_concurrent=options.get("max_concurrent", self.max_concurrent),
+                    max_queue=options.get("max_queue", self.max_queue)
+                )
+            return self._controllers[key]
+
+    @contextmanager
+    def admit(self, key, model_id=None, session_id=None, control=None):
+        controller = self.controller(key, model_id)
+        ticket = object()
+        with self._lock:
+            self._tickets[session_id] = (controller, ticket)
+        try:
+            with controller.admit(control=control, ticket=ticket):
+                with self._lock:
+                    self._tickets.pop(session_id, None)
+                yield controller
+        finally:
+            with self._lock:
+                if self._tickets.get(session_id, (None, None))[1] is ticket:
+                    del self._tickets[session_id]
+
+    def queue_position(self, session_id):
+        """세션 요청의 (모델 이름, 대기 순번). 대기 중이 아니면 None"""
+        with self._lock:
+            entry = self._tickets.get(session_id)
+        if entry is None:
+            return None
+        controller, ticket = entry
+        position = controller.position(ticket)
+        return (controller.name, position) if position else None
+
+    def snapshot(self):
+        with self._lock:
+            controllers = list(self._controllers.values())
+        return [controller.snapshot() for controller in controllers]
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_admission_registry():
+    """전역 인자(--max-concurrent-generations, --max-queue-size)로 초기화된 레지스트리"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from src.common.default_load_options import default_max_concurrent_generations, default_max_queue_size
+            _registry = AdmissionRegistry(
+                max_concurrent=default_max_concurrent_generations,
+                max_queue=default_max_queue_size
+            )
+        return _registry
@@ -45,4 +45,103 @@ def parse_args():
         help="애플리케이션의 기본 언어를 지정합니다. (default: %(default)s)"
     )
     
+    parser.add_argument(
+        "--cpu-quantization",
+        type=str,
+        default="none",
+        choices=["none", "dynamic-int8", "torchao-int8-wo"],
+        help="transformers 모델을 CPU에서 로드할 때 Linear 레이어에 적용할 int8 양자화를 지정합니다. (default: %(default)s)"
+    )
+    
+    parser.add_argument(
+        "--attn-implementation",
+        type=str,
+        default="auto",
+        choices=["auto", "eager", "sdpa"],
+        help="transformers 모델의 어텐션 구현을 지정합니다. auto는 모델 기본값을 사용합니다. (default: %(default)s)"
+    )
+    
+    parser.add_argument(
+        "--compile-generation",
+        action="store_true",
+        help="지원되는 transformers 모델(Qwen/GLM/기타)에서 정적 KV 캐시와 torch.compile을 사용해 디코딩합니다. 컴파일 결과는 ./models/.compile_cache에 저장됩니다."
+    )
+    
+    parser.add_argument(
+        "--onnx-provider",
+        type=str,
+        default="CPUExecutionProvider",
+        choices=["CPUExecutionProvider", "OpenVINOExecutionProvider"],
+        help="onnx 모델 유형에 사용할 ONNX Runtime 실행 공급자를 지정합니다. (default: %(default)s)"
+    )
+    
+    parser.add_argument(
+        "--speculative-decoding",
+        action="store_true",
+        help="추측 디코딩을 사용합니다. 모델별 드래프트 모델이 설정되어 있으면 보조 생성, 없으면 프롬프트 조회 디코딩을 사용합니다. (설정: ./models/speculative_config.json)"
+    )
+    
+    parser.add_argument(
+        "--generation-timeout",
+        type=float,
+        default=0,
+        help="요청 하나의 최대 생성 시간(초)을 지정합니다. 시간을 넘기면 생성을 중단하고 그때까지의 결과를 반환합니다. 0이면 제한하지 않습니다. (default: %(default)s)"
+    )
+    
+    parser.add_argument(
+        "--session-token-budget",
+        type=int,
+        default=0,
+        help="세션별로 생성할 수 있는 최대 토큰 수를 지정합니다. 0이면 제한하지 않습니다. (default: %(default)d)"
+    )
+    
+    parser.add_argument(
+        "--max-concurrent-generations",
+        type=int,
+        default=1,
+        help="로컬 모델 하나에서 동시에 실행할 수 있는 최대 생성 수를 지정합니다. 나머지 요청은 도착 순서대로 대기합니다. (모델별 설정: ./models/admission_config.json) (default: %(default)d)"
+    )
+    
+    parser.add_argument(
+        "--max-queue-size",
+        type=int,
+        default=8,
+        help="로컬 모델 하나에 대기할 수 있는 최대 요청 수를 지정합니다. 초과한 요청은 즉시 거부됩니다. (default: %(default)d)"
+    )
+    
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=0,
+        help="Prometheus 형식의 /metrics 엔드포인트를 제공할 포트 번호를 지정합니다. 0이면 사용하지 않습니다. (default: %(default)d)"
+    )
+    
+    parser.add_argument(
+        "--max-speech-sessions",
+        type=int,
+        default=256,
+        help="메모리에 유지할 세션별 캐릭터 말투 상태의 최대 개수를 지정합니다. 초과하면 가장 오래 사용하지 않은 세션을 persona_state.db에 저장하고 내보냅니다. (default: %(default)d)"
+    )
+    
+    parser.add_argument(
+        "--speech-session-idle-timeout",
+        type=float,
+        default=1800,
+        help="지정한 시간(초) 동안 사용하지 않은 세션의 말투 상태를 저장하고 메모리에서 내보냅니다. 0이면 시간 제한을 두지 않습니다. (default: %(default)s)"
+    )
+    
+    parser.add_argument(
+        "--db-write-batch-size",
+        type=int,
+        default=64,
+        help="채팅 기록 저장 대기열에 이만큼의 세션 기록이 쌓이면 한 트랜잭션으로 즉시 기록합니다. (default: %(default)d)"
+    )
+    
+    parser.add_argument(
+        "--db-write-interval",
+        type=float,
+        default=0.5,
+        help="채팅 기록 저장 대기열을 데이터베이스에 기록하는 최대 간격(초)을 지정합니다. 0이면 응답마다 바로 동기식으로 저장합니다. (default: %(default)s)"
+    )
+    
     return parser.parse_args()
\ No newline at end of file
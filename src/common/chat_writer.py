@@ -0,0 +1,188 @@
+# chat_writer.py
+
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+from src.common.database import save_chat_history_db, save_chat_histories_batch
+from src.common.default_load_options import default_db_write_batch_size, default_db_write_interval
+
+logger = logging.getLogger(__name__)
+
+# 세션별 연속 저장 실패를 이 횟수까지 허용하고, 넘으면 남은 사본을 dead_letters로 옮긴다.
+MAX_WRITE_ATTEMPTS = 5
+# 저장을 포기한 사본을 보관할 최대 개수
+DEAD_LETTER_SIZE = 100
+
+class ChatHistoryWriter:
+    """
+    채팅 기록 write-behind 저장 대기열.
+    - submit은 히스토리 사본을 대기열에 넣고 바로 반환하므로 응답 경로에서 DB 지연이 사라진다.
+    - 단일 기록 스레드가 flush_interval(초)마다, 또는 대기 중인 세션이 batch_size개에 이르면
+      모든 세션의 기록을 한 트랜잭션으로 저장한다.
+    - 같은 세션의 새 사본이 이전 사본을 그대로 포함하면(누적된 히스토리) 이전 사본은 대기열에서 대체한다.
+    - 세션을 읽거나 지우기 전에는 flush로 대기 중인 기록을 먼저 반영하고, 종료 시 close로 남은 기록을 모두 저장한다.
+    - chat_history에 직접 쓰는 호출은 write_through로 감싸 대기 중인 기록보다 나중에 적용되도록 한다.
+    - 일괄 저장이 실패하면 세션별로 save_chat_history_db를 다시 시도하고, 그래도 실패한 세션의 사본은
+      대기열 앞에 되돌려 다음 기록 때 재시도한다. max_attempts번 연속 실패하면 dead_letters로 옮기고 버린다.
+    - flush_interval이 0이면 대기열 없이 save_chat_history_db로 바로 저장한다.
+    """
+    def __init__(self, batch_size: int = 64, flush_interval: float = 0.5, max_attempts: int = MAX_WRITE_ATTEMPTS):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_attempts = max(1, max_attempts)
+        self._pending: Dict[str, List[List[Dict[str, str]]]] = {}  # session_id -> 저장할 히스토리 사본 목록
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # 기록 스레드와 flush 호출이 동시에 쓰지 않도록 직렬화
+        self._attempts: Dict[str, int] = {}  # session_id -> 연속 저장 실패 횟수 (기록 잠금 안에서만 변경)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.batches = 0
+        self.writes = 0
+        self.failures = 0
+        self.dead_letters = deque(maxlen=DEAD_LETTER_SIZE)  # 저장을 포기한 (session_id, history)
+
+    @property
+    def enabled(self):
+        return self.flush_interval > 0 and not self._closed
+
+    def _ensure_thread(self):
+        """첫 submit 때 기록 스레드 시작 (잠금 안에서 호출)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="chat-history-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, history, session_id: str) -> bool:
+        """히스토리 저장을 예약. 대기열을 쓰지 않으면 바로 저장하고 결과를 반환"""
+        if not self.enabled:
+            return save_chat_history_db(history, session_id=session_id)
+        snapshot = [{"role": msg.get("role"), "content": msg.get("content")} for msg in history]
+        with self._cond:
+            snapshots = self._pending.setdefault(session_id, [])
+            if snapshots and snapshot[:len(snapshots[-1])] == snapshots[-1]:
+                snapshots[-1] = snapshot
+            else:
+                snapshots.append(snapshot)
+            self._ensure_thread()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _take(self):
+        """대기 중인 기록을 모두 꺼냄 (잠금 안에서 호출)"""
+        batch = [(session_id, snapshot) for session_id, snapshots in self._pending.items() for snapshot in snapshots]
+        self._pending.clear()
+        return batch
+
+    def _write(self, batch):
+        """batch를 저장 (기록 잠금 안에서 호출)"""
+        if not batch:
+            return
+        if save_chat_histories_batch(batch):
+            self.batches += 1
+            self.writes += len(batch)
+            for session_id, _ in batch:
+                self._attempts.pop(session_id, None)
+            return
+        self.failures += 1
+        logger.warning(f"채팅 기록 {len(batch)}건 일괄 저장 실패, 세션별로 다시 저장합니다.")
+        by_session: Dict[str, List[List[Dict[str, str]]]] = {}
+        for session_id, history in batch:
+            by_session.setdefault(session_id, []).append(history)
+        restored = {}
+        for session_id, snapshots in by_session.items():
+            # 메시지를 추가만 하므로 같은 세션의 사본은 순서대로 저장하고, 실패하면 남은 사본을 모두 보류한다.
+            for index, history in enumerate(snapshots):
+                if not save_chat_history_db(history, session_id=session_id):
+                    remaining = snapshots[index:]
+                    break
+                self.writes += 1
+            else:
+                self._attempts.pop(session_id, None)
+                continue
+            attempts = self._attempts.get(session_id, 0) + 1
+            if attempts < self.max_attempts:
+                self._attempts[session_id] = attempts
+                restored[session_id] = remaining
+                logger.error(f"세션 {session_id}의 채팅 기록 저장 실패 ({attempts}/{self.max_attempts}), 다음 기록 때 다시 시도합니다.")
+                continue
+            self._attempts.pop(session_id, None)
+            for history in remaining:
+                self.dead_letters.append((session_id, history))
+                logger.error(f"세션 {session_id}의 채팅 기록 저장을 {attempts}번 실패하여 버립니다. (메시지 {len(history)}개)")
+        if not restored:
+            return
+        with self._cond:
+            # 실패한 사본을 그사이 들어온 사본보다 앞에 되돌려 놓는다.
+            for session_id, snapshots in self._pending.items():
+                restored.setdefault(session_id, []).extend(snapshots)
+            self._pending = restored
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            with self._write_lock:
+                with self._cond:
+                    batch = self._take()
+                self._write(batch)
+            if closed:
+                return
+
+    def flush(self, session_id: Optional[str] = None):
+        """대기 중인 기록(session_id를 주면 해당 세션만)을 지금 저장"""
+        with self._write_lock:
+            with self._cond:
+                if session_id is None:
+                    batch = self._take()
+                elif session_id in self._pending:
+                    batch = [(session_id, snapshot) for snapshot in self._pending.pop(session_id)]
+                else:
+                    batch = []
+            self._write(batch)
+
+    def write_through(self, session_id: str, write, *args, **kwargs):
+        """
+        대기 중인 해당 세션의 기록을 먼저 저장한 뒤 write(*args, **kwargs)를 바로 실행하고 결과를 반환.
+        save_chat_history_db / update_system_message_in_db처럼 chat_history에 직접 쓰는 호출에 사용한다.
+        (대기열의 오래된 사본이 나중에 기록되어 방금 교체한 system 메시지 등을 되살리지 않도록)
+        """
+        with self._write_lock:
+            with self._cond:
+                snapshots = self._pending.pop(session_id, [])
+            self._write([(session_id, snapshot) for snapshot in snapshots])
+            return write(*args, **kwargs)
+
+    def discard(self, session_id: Optional[str] = None):
+        """대기 중인 기록(session_id가 없으면 전체)을 저장하지 않고 버림 (세션 초기화/삭제용)"""
+        with self._write_lock:
+            with self._cond:
+                if session_id is None:
+                    self._pending.clear()
+                    self._attempts.clear()
+                else:
+                    self._pending.pop(session_id, None)
+                    self._attempts.pop(session_id, None)
+
+    def close(self, timeout: float = 10.0):
+        """기록 스레드를 멈추고 남은 기록을 모두 저장 (종료 시 호출)"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+chat_history_writer = ChatHistoryWriter(batch_size=default_db_write_batch_size, flush_interval=default_db_write_interval)
+atexit.register(chat_history_writer.close)
@@ -8,9 +8,26 @@ import json
 from datetime import datetime
 import csv
 from pathlib import Path
+import threading
+import hashlib
+
+from src.common.migrations import run_migrations, MigrationError
 
 logger = logging.getLogger(__name__)
 
+# 언어별 프리셋 캐시 {language: {name: content}}
+# 처음 조회할 때 DB에서 채우고, 프리셋을 추가/수정/삭제하면 해당 언어(기본 프리셋 삽입 시 전체)를 무효화한다.
+_preset_cache: Dict[str, Dict[str, str]] = {}
+_preset_cache_lock = threading.Lock()
+
+def invalidate_preset_cache(language: Optional[str] = None) -> None:
+    """프리셋 캐시를 무효화합니다. language가 없으면 모든 언어를 무효화합니다."""
+    with _preset_cache_lock:
+        if language is None:
+            _preset_cache.clear()
+        else:
+            _preset_cache.pop(language, None)
+
 @dataclass
 class PresetConfig:
     """프리셋 설정을 위한 데이터 클래스"""
@@ -37,6 +54,25 @@ class SessionResult:
     message: str
     affected_rows: int = 0
 
+@dataclass
+class SessionInfo:
+    """세션 목록 항목을 나타내는 데이터 클래스"""
+    id: str
+    title: Optional[str]
+    message_count: int
+    last_activity: Optional[str]
+
+@dataclass
+class SearchHit:
+    """채팅 기록 검색 결과 항목을 나타내는 데이터 클래스"""
+    session_id: str
+    message_id: int
+    seq: Optional[int]
+    role: str
+    snippet: str
+    timestamp: Optional[str]
+    session_title: Optional[str]
+
 class DatabaseInitError(Exception):
     """데이터베이스 초기화 관련 커스텀 예외"""
     pass
@@ -64,6 +100,9 @@ class DatabaseError(Exception):
     """Custom exception for database operations"""
     pass
 
+# 세션의 다음 메시지 순번 (chat_history.seq, (session_id, seq) 인덱스로 조회)
+NEXT_SEQ_SQL = "(SELECT COALESCE(MAX(seq), 0) + 1 FROM chat_history WHERE session_id = ?)"
+
 @contextmanager
 def get_db_connection():
     """Context manager for database connections"""
@@ -98,73 +137,14 @@ def initialize_database() -> None:
     """데이터베이스와 필요한 테이블들을 초기화합니다.
     
     이 함수는 앱 시작 시 항상 실행되어야 합니다.
+    테이블/열/인덱스 변경은 migrations.MIGRATIONS에서 PRAGMA user_version 기준으로 한 번씩 적용됩니다.
     """
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 시스템 프리셋 테이블 생성
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS system_presets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    language TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(name, language)
-                )
-            """)
-            
-            # 채팅 히스토리 테이블 생성
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS chat_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # 세션 관리 테이블 생성
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id TEXT PRIMARY KEY,
-                    name TEXT,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_activity DATETIME
-                )
-            """)
-            
-            # 인덱스 생성
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_chat_history_session
-                ON chat_history(session_id)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_system_presets_lang
-                ON system_presets(language)
-            """)
-            
-            cursor.execute("PRAGMA table_info(chat_history)")
-            columns = [info[1] for info in cursor.fetchall()]
-            if 'timestamp' not in columns:
-                cursor.execute("ALTER TABLE chat_history ADD COLUMN timestamp DATETIME DEFAULT (CURRENT_TIMESTAMP)")
-                logger.info("'chat_history' 테이블에 'timestamp' 열 추가 완료.")
-                backfill_timestamps()
-            else:
-                logger.info("'chat_history' 테이블에 'timestamp' 열이 이미 존재합니다.")
-                
-            conn.commit()
-            logger.info("Database initialized successfully")
+            version = run_migrations(conn)
+            logger.info(f"Database initialized successfully (schema version {version})")
             
-    except sqlite3.Error as e:
+    except (sqlite3.Error, DatabaseError, MigrationError) as e:
         logger.error(f"Database initialization error: {e}")
         raise DatabaseInitError(f"Failed to initialize database: {e}")
     except Exception as e:
@@ -189,8 +169,8 @@ def ensure_demo_session() -> None:
                 
                 # 기본 시스템 메시지 추가
                 cursor.execute("""
-                    INSERT INTO chat_history (session_id, role, content)
-                    VALUES (?, 'system', '당신은 유용한 AI 비서입니다.')
+                    INSERT INTO chat_history (session_id, role, content, seq)
+                    VALUES (?, 'system', '당신은 유용한 AI 비서입니다.', 1)
                 """, ('demo_session',))
                 
                 conn.commit()
@@ -212,98 +192,150 @@ def initialize_app(translation_manager) -> None:
         raise
     
 def initialize_presets_db() -> None:
-    """Initialize system message presets table"""
+    """Initialize system message presets table (마이그레이션으로 전체 스키마를 초기화)"""
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS system_presets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    language TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    UNIQUE(name, language)
-                )
-            """)
-            conn.commit()
+            run_migrations(conn)
             logger.info("System message presets table initialized.")
-    except DatabaseError as e:
+    except (DatabaseError, MigrationError) as e:
         logger.error(f"Failed to initialize presets DB: {e}")
         raise
 
+# 기본 프리셋 설정 (프리셋 이름, translation_manager의 캐릭터 키)
+DEFAULT_PRESET_CONFIGS = [
+    PresetConfig("AI_ASSISTANT_PRESET", "ai_assistant"),
+    PresetConfig("MINAMI_ASUKA_PRESET", "minami_asuka"),
+    PresetConfig("MAKOTONO_AOI_PRESET", "makotono_aoi"),
+    PresetConfig("AINO_KOITO_PRESET", "aino_koito")
+]
 
-# 앱 시작 시 DB 초기화 함수 호출
-initialize_presets_db()
+# app_meta 테이블에 저장하는 마지막으로 삽입한 기본 프리셋의 해시 키
+DEFAULT_PRESETS_HASH_KEY = "default_presets_hash"
 
-# database.py
+def _ensure_meta_table(cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
 
-def insert_default_presets(translation_manager, overwrite=True) -> None:
+def get_meta_value(cursor, key: str) -> Optional[str]:
+    """app_meta 테이블에서 값을 읽습니다. 테이블이나 키가 없으면 None"""
+    try:
+        cursor.execute("SELECT value FROM app_meta WHERE key = ?", (key,))
+    except sqlite3.OperationalError:
+        return None
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def set_meta_value(cursor, key: str, value: str) -> None:
+    """app_meta 테이블에 값을 저장합니다. (커밋은 호출하는 쪽에서)"""
+    _ensure_meta_table(cursor)
+    cursor.execute("""
+        INSERT INTO app_meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (key, value))
+
+def default_preset_rows(translation_manager) -> List[Tuple[str, str, str]]:
+    """삽입할 기본 프리셋 (이름, 언어, 내용) 목록"""
+    languages = translation_manager.get_available_languages()
+    rows = []
+    for preset_config in DEFAULT_PRESET_CONFIGS:
+        for lang in languages:
+            # translation_manager에서 프리셋 내용 가져오기
+            content = translation_manager.get_character_setting(preset_config.character_key)
+            rows.append((preset_config.name, lang, content))
+    return rows
+
+def _preset_rows_hash(rows) -> str:
+    payload = json.dumps(sorted(rows), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _default_presets_up_to_date(cursor, rows, digest: str, overwrite: bool) -> bool:
+    """
+    저장된 해시가 같고 DB의 기본 프리셋이 기대한 상태이면 True (읽기만 수행).
+    overwrite이면 내용까지, 아니면 존재 여부만 확인한다.
+    """
+    if get_meta_value(cursor, DEFAULT_PRESETS_HASH_KEY) != digest:
+        return False
+    names = sorted({name for name, _, _ in rows})
+    placeholders = ", ".join("?" for _ in names)
+    cursor.execute(f"""
+        SELECT name, language, content
+        FROM system_presets
+        WHERE name IN ({placeholders})
+    """, names)
+    existing = {(name, language): content for name, language, content in cursor.fetchall()}
+    if overwrite:
+        return all(existing.get((name, lang)) == content for name, lang, content in rows)
+    return all((name, lang) in existing for name, lang, _ in rows)
+
+def insert_default_presets(translation_manager, overwrite=True, force=False) -> None:
     """기본 프리셋을 데이터베이스에 삽입 또는 업데이트
     
+    삽입한 기본 프리셋의 해시를 app_meta에 저장해 두고, 다음 시작 시 해시와 DB 내용이 그대로이면
+    아무것도 쓰지 않고 건너뜁니다.
+    
     Args:
         translation_manager: 번역 관리자 인스턴스
         overwrite (bool): 기존 프리셋을 덮어쓸지 여부
+        force (bool): 해시가 같아도 다시 삽입할지 여부
     """
-    # 프리셋 설정 정의
-    preset_configs = [
-        PresetConfig("AI_ASSISTANT_PRESET", "ai_assistant"),
-        PresetConfig("MINAMI_ASUKA_PRESET", "minami_asuka"),
-        PresetConfig("MAKOTONO_AOI_PRESET", "makotono_aoi"),
-        PresetConfig("AINO_KOITO_PRESET", "aino_koito")
-    ]
-    
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            languages = translation_manager.get_available_languages()
+            rows = default_preset_rows(translation_manager)
+            digest = _preset_rows_hash(rows)
+            if not force and _default_presets_up_to_date(cursor, rows, digest, overwrite):
+                logger.info("Default presets unchanged, skipping insertion")
+                return
             
-            for preset_config in preset_configs:
-                for lang in languages:
-                    try:
-                        # translation_manager에서 프리셋 내용 가져오기
-                        content = translation_manager.get_character_setting(preset_config.character_key)
-                        
-                        if overwrite:
-                            # 프리셋 업데이트
-                            cursor.execute("""
-                                UPDATE system_presets 
-                                SET content = ?
-                                WHERE name = ? AND language = ?
-                            """, (content, preset_config.name, lang))
-                            if cursor.rowcount == 0:
-                                # 존재하지 않으면 삽입
-                                cursor.execute("""
-                                    INSERT INTO system_presets (name, language, content)
-                                    VALUES (?, ?, ?)
-                                """, (preset_config.name, lang, content))
-                                logger.info(f"Inserted default preset: {preset_config.name} (language: {lang})")
-                            else:
-                                logger.info(f"Updated default preset: {preset_config.name} (language: {lang})")
-                        else:
-                            # 덮어쓰기 없이 삽입
+            for preset_name, lang, content in rows:
+                try:
+                    if overwrite:
+                        # 프리셋 업데이트
+                        cursor.execute("""
+                            UPDATE system_presets 
+                            SET content = ?
+                            WHERE name = ? AND language = ?
+                        """, (content, preset_name, lang))
+                        if cursor.rowcount == 0:
+                            # 존재하지 않으면 삽입
                             cursor.execute("""
-                                INSERT INTO system_presets (name, language, content) 
+                                INSERT INTO system_presets (name, language, content)
                                 VALUES (?, ?, ?)
-                            """, (preset_config.name, lang, content))
-                            logger.info(f"Inserted default preset: {preset_config.name} (language: {lang})")
-                    
-                    except sqlite3.IntegrityError as e:
-                        logger.warning(
-                            f"Preset already exists: {preset_config.name} "
-                            f"(language: {lang}): {e}"
-                        )
-                        continue
-                    
-                    except Exception as e:
-                        logger.error(
-                            f"Error inserting preset {preset_config.name} "
-                            f"for language {lang}: {e}"
-                        )
-                        raise PresetInsertionError(
-                            f"Failed to insert preset {preset_config.name}: {e}"
-                        )
+                            """, (preset_name, lang, content))
+                            logger.info(f"Inserted default preset: {preset_name} (language: {lang})")
+                        else:
+                            logger.info(f"Updated default preset: {preset_name} (language: {lang})")
+                    else:
+                        # 덮어쓰기 없이 삽입
+                        cursor.execute("""
+                            INSERT INTO system_presets (name, language, content) 
+                            VALUES (?, ?, ?)
+                        """, (preset_name, lang, content))
+                        logger.info(f"Inserted default preset: {preset_name} (language: {lang})")
+                
+                except sqlite3.IntegrityError as e:
+                    logger.warning(
+                        f"Preset already exists: {preset_name} "
+                        f"(language: {lang}): {e}"
+                    )
+                    continue
+                
+                except Exception as e:
+                    logger.error(
+                        f"Error inserting preset {preset_name} "
+                        f"for language {lang}: {e}"
+                    )
+                    raise PresetInsertionError(
+                        f"Failed to insert preset {preset_name}: {e}"
+                    )
             
+            set_meta_value(cursor, DEFAULT_PRESETS_HASH_KEY, digest)
             conn.commit()
+            invalidate_preset_cache()
             logger.info("All default presets inserted/updated successfully")
             
     except PresetInsertionError:
@@ -312,8 +344,8 @@ def insert_default_presets(translation_manager, overwrite=True) -> None:
         logger.error(f"Unexpected error during preset insertion: {e}")
         raise PresetInsertionError(f"Failed to insert/update default presets: {e}")
     
-def load_system_presets(language: str) -> Dict[str, str]:
-    """시스템 메시지 프리셋을 불러옵니다."""
+def _fetch_system_presets(language: str) -> Optional[Dict[str, str]]:
+    """DB에서 언어별 프리셋을 읽습니다. 오류 시 None"""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -328,9 +360,28 @@ def load_system_presets(language: str) -> Dict[str, str]:
             logger.debug(f"Loaded presets for language {language}: {list(presets.keys())}")
             return presets
             
-    except sqlite3.Error as e:
+    except (sqlite3.Error, DatabaseError) as e:
         logger.error(f"Error loading presets for language {language}: {e}")
-        return {}
+        return None
+
+def _cached_system_presets(language: str) -> Optional[Dict[str, str]]:
+    """캐시된 언어별 프리셋 (캐시에 없으면 DB에서 채움). DB 오류 시 None이며 캐시하지 않음"""
+    presets = _preset_cache.get(language)
+    if presets is not None:
+        return presets
+    with _preset_cache_lock:
+        presets = _preset_cache.get(language)
+        if presets is None:
+            presets = _fetch_system_presets(language)
+            if presets is not None:
+                _preset_cache[language] = presets
+        return presets
+
+def load_system_presets(language: str) -> Dict[str, str]:
+    """시스템 메시지 프리셋을 불러옵니다. (언어별 캐시 사용)"""
+    presets = _cached_system_presets(language)
+    # 호출하는 쪽에서 수정해도 캐시에 영향이 없도록 복사본 반환
+    return dict(presets) if presets is not None else {}
 
 
 def add_system_preset(
@@ -372,6 +423,7 @@ def add_system_preset(
                 operation = "added"
             
             conn.commit()
+            invalidate_preset_cache(language)
             logger.info(f"Preset {name} ({language}) successfully {operation}")
             return PresetResult(True, f"프리셋이 성공적으로 {operation}되었습니다.")
             
@@ -418,6 +470,7 @@ def delete_system_preset(name: str, language: str) -> PresetResult:
                 return PresetResult(False, message)
             
             conn.commit()
+            invalidate_preset_cache(language)
             logger.info(f"Preset {name} ({language}) successfully deleted")
             return PresetResult(True, "프리셋이 성공적으로 삭제되었습니다.")
             
@@ -438,41 +491,14 @@ def preset_exists(name: str, language: str) -> bool:
     Returns:
         bool: 프리셋 존재 여부
     """
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM system_presets 
-                WHERE name = ? AND language = ?
-            """, (name, language))
-            return cursor.fetchone()[0] > 0
-            
-    except sqlite3.Error as e:
-        logger.error(f"Database error checking preset existence: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error checking preset existence: {e}")
-        return False
+    presets = _cached_system_presets(language)
+    return presets is not None and name in presets
     
 def get_preset_choices(language: str) -> List[str]:
     """프리셋 선택 목록을 가져옵니다."""
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT name 
-                FROM system_presets 
-                WHERE language = ? 
-                ORDER BY name ASC
-            """, (language,))
-            results = cursor.fetchall()
-            # 이름 목록만 반환
-            return [name[0] for name in results] if results else []
-            
-    except sqlite3.Error as e:
-        logger.error(f"Error getting preset choices for language {language}: {e}")
-        return []
+    presets = _cached_system_presets(language)
+    # 캐시는 DB에서 이름순(ORDER BY name ASC)으로 채워지므로 순서가 유지된다.
+    return list(presets) if presets is not None else []
 
 # 프리셋 추가 핸들러
 def handle_add_preset(name, language, content, confirm_overwrite=False):
@@ -505,66 +531,202 @@ def handle_delete_preset(name, language):
         return message, gr.update(choices=get_preset_choices(language))
     
 def get_existing_sessions() -> List[str]:
-    """Get list of existing session IDs"""
+    """Get list of existing session IDs (메시지가 있는 세션, sessions 테이블 기준)"""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT session_id FROM chat_history ORDER BY session_id ASC")
+            cursor.execute("SELECT id FROM sessions WHERE message_count > 0 ORDER BY id ASC")
             return [row[0] for row in cursor.fetchall()]
             
     except DatabaseError as e:
         logger.error(f"Error retrieving sessions: {e}")
         return []
+
+def _like_pattern(text: str) -> str:
+    """부분 일치 LIKE 패턴 (ESCAPE '\\'와 함께 사용)"""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+# 세션 목록 한 페이지의 기본 크기
+SESSION_PAGE_SIZE = 50
+
+def list_sessions(
+    limit: int = SESSION_PAGE_SIZE,
+    after: Optional[Tuple[str, str]] = None,
+    query: Optional[str] = None
+) -> Tuple[List[SessionInfo], Optional[Tuple[str, str]]]:
+    """최근 활동순 세션 목록을 한 페이지씩 불러옵니다.
+
+    (last_activity, id) 인덱스를 이용한 키셋 페이지네이션으로, 페이지가 뒤로 갈수록 느려지지 않습니다.
+
+    Args:
+        limit: 페이지 크기
+        after: 이전 페이지가 반환한 다음 페이지 커서 (없으면 첫 페이지)
+        query: 세션 ID/제목 검색어 (부분 일치)
+
+    Returns:
+        Tuple[List[SessionInfo], Optional[Tuple[str, str]]]: (세션 목록, 다음 페이지 커서 또는 None)
+    """
+    conditions = ["message_count > 0"]
+    params: List[Any] = []
+    if after is not None:
+        conditions.append("(last_activity < ? OR (last_activity = ? AND id < ?))")
+        params.extend([after[0], after[0], after[1]])
+    if query and query.strip():
+        pattern = _like_pattern(query.strip())
+        conditions.append("(title LIKE ? ESCAPE '\\' OR id LIKE ? ESCAPE '\\')")
+        params.extend([pattern, pattern])
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, title, message_count, last_activity
+                FROM sessions
+                WHERE {" AND ".join(conditions)}
+                ORDER BY last_activity DESC, id DESC
+                LIMIT ?
+            """, (*params, limit + 1))
+            rows = cursor.fetchall()
+    except DatabaseError as e:
+        logger.error(f"Error listing sessions: {e}")
+        return [], None
+
+    sessions = [SessionInfo(*row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = sessions[-1]
+        next_cursor = (last.last_activity or "", last.id)
+    return sessions, next_cursor
     
-def save_chat_history_db(history, session_id="demo_session") -> bool:
-    """Save chat history to SQLite database"""
+# 검색 결과 한 페이지의 기본 크기
+SEARCH_PAGE_SIZE = 20
+# 검색 결과 미리보기 길이 (FTS5 snippet 토큰 수 / LIKE 대체 경로의 앞뒤 글자 수)
+SNIPPET_TOKENS = 32
+SNIPPET_CONTEXT_CHARS = 40
+
+_fts_tokenizer: Optional[str] = None
+
+def _get_fts_tokenizer(cursor) -> str:
+    """마이그레이션이 선택한 전문 검색 토크나이저 ('trigram', 'unicode61' 또는 'none')"""
+    global _fts_tokenizer
+    if _fts_tokenizer is None:
+        _fts_tokenizer = get_meta_value(cursor, "fts_tokenizer") or "none"
+    return _fts_tokenizer
+
+def _fts_query(terms: List[str], tokenizer: str) -> Optional[str]:
+    """
+    사용자 검색어를 FTS5 MATCH 식으로 변환 (모든 단어를 포함하는 메시지).
+    trigram은 3글자 미만 단어를 색인으로 찾을 수 없으므로 None을 반환해 LIKE 검색을 쓰게 한다.
+    """
+    if tokenizer == "none" or (tokenizer == "trigram" and any(len(term) < 3 for term in terms)):
+        return None
+    suffix = "*" if tokenizer != "trigram" else ""  # 단어 토크나이저는 접두사 일치
+    return " ".join('"' + term.replace('"', '""') + '"' + suffix for term in terms)
+
+def _make_snippet(content: str, terms: List[str]) -> str:
+    """LIKE 검색 결과용 미리보기: 첫 일치 위치 앞뒤를 잘라 일치 부분을 굵게 표시"""
+    lowered = content.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [pos for pos in positions if pos >= 0]
+    start = max(min(positions, default=0) - SNIPPET_CONTEXT_CHARS, 0)
+    end = min(start + SNIPPET_CONTEXT_CHARS * 3, len(content))
+    snippet = content[start:end]
+    for term in terms:
+        index = snippet.lower().find(term.lower())
+        if index >= 0:
+            snippet = snippet[:index] + "**" + snippet[index:index + len(term)] + "**" + snippet[index + len(term):]
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(content) else "")
+
+def search_chat_history(
+    query: str,
+    limit: int = SEARCH_PAGE_SIZE,
+    offset: int = 0,
+    session_id: Optional[str] = None
+) -> Tuple[List[SearchHit], bool]:
+    """모든 세션의 채팅 기록에서 검색어를 포함하는 메시지를 찾습니다.
+
+    FTS5 인덱스(chat_history_fts)가 있으면 bm25 관련도순으로, 없거나 trigram으로 찾을 수 없는
+    짧은 검색어이면 LIKE 검색으로 최신 메시지순으로 반환합니다.
+
+    Args:
+        query: 검색어 (공백으로 구분한 모든 단어를 포함)
+        limit: 페이지 크기
+        offset: 건너뛸 결과 수
+        session_id: 특정 세션으로 제한 (없으면 전체)
+
+    Returns:
+        Tuple[List[SearchHit], bool]: (검색 결과, 다음 페이지 존재 여부)
+    """
+    terms = query.split() if query else []
+    if not terms:
+        return [], False
+    session_filter = " AND h.session_id = ?" if session_id else ""
+    session_params = [session_id] if session_id else []
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS chat_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id TEXT PRIMARY KEY,
-                    name TEXT,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_activity DATETIME
-                )
-            """)
-            
-            # 세션 존재 여부 확인
-            cursor.execute("SELECT COUNT(*) FROM sessions WHERE id = ?", (session_id,))
-            if cursor.fetchone()[0] == 0:
-                # 세션이 존재하지 않으면 생성
-                current_time = datetime.now().isoformat()
-                cursor.execute("""
-                    INSERT INTO sessions (id, name, created_at, updated_at, last_activity)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (session_id, f"Session {session_id}", current_time, current_time, current_time))
-                logger.info(f"Created new session: {session_id}")
-            
-            for msg in history:
-                cursor.execute("""
-                    SELECT COUNT(*) FROM chat_history
-                    WHERE session_id = ? AND role = ? AND content = ?
-                """, (session_id, msg.get("role"), msg.get("content")))
-                count = cursor.fetchone()[0]
+            match = _fts_query(terms, _get_fts_tokenizer(cursor))
+            if match is not None:
+                cursor.execute(f"""
+                    SELECT h.session_id, h.id, h.seq, h.role,
+                           snippet(chat_history_fts, 0, '**', '**', '…', {SNIPPET_TOKENS}),
+                           h.timestamp, s.title
+                    FROM chat_history_fts
+                    JOIN chat_history h ON h.id = chat_history_fts.rowid
+                    LEFT JOIN sessions s ON s.id = h.session_id
+                    WHERE chat_history_fts MATCH ?{session_filter}
+                    ORDER BY bm25(chat_history_fts)
+                    LIMIT ? OFFSET ?
+                """, (match, *session_params, limit + 1, offset))
+                rows = cursor.fetchall()
+            else:
+                conditions = " AND ".join("h.content LIKE ? ESCAPE '\\'" for _ in terms)
+                cursor.execute(f"""
+                    SELECT h.session_id, h.id, h.seq, h.role, h.content, h.timestamp, s.title
+                    FROM chat_history h
+                    LEFT JOIN sessions s ON s.id = h.session_id
+                    WHERE {conditions}{session_filter}
+                    ORDER BY h.id DESC
+                    LIMIT ? OFFSET ?
+                """, (*[_like_pattern(term) for term in terms], *session_params, limit + 1, offset))
+                rows = [row[:4] + (_make_snippet(row[4], terms),) + row[5:] for row in cursor.fetchall()]
+    except DatabaseError as e:
+        logger.error(f"Error searching chat history for '{query}': {e}")
+        return [], False
+
+    return [SearchHit(*row) for row in rows[:limit]], len(rows) > limit
 
-                if count == 0:
-                    cursor.execute("""
-                        INSERT INTO chat_history (session_id, role, content)
-                        VALUES (?, ?, ?)
-                    """, (session_id, msg.get("role"), msg.get("content")))
+def _write_history(cursor, history, session_id):
+    """세션이 없으면 만들고, 아직 저장되지 않은 메시지만 추가 (트랜잭션 안에서 호출)"""
+    # 세션 존재 여부 확인
+    cursor.execute("SELECT COUNT(*) FROM sessions WHERE id = ?", (session_id,))
+    if cursor.fetchone()[0] == 0:
+        # 세션이 존재하지 않으면 생성
+        current_time = datetime.now().isoformat()
+        cursor.execute("""
+            INSERT INTO sessions (id, name, created_at, updated_at, last_activity)
+            VALUES (?, ?, ?, ?, ?)
+        """, (session_id, f"Session {session_id}", current_time, current_time, current_time))
+        logger.info(f"Created new session: {session_id}")
+    
+    for msg in history:
+        cursor.execute("""
+            SELECT COUNT(*) FROM chat_history
+            WHERE session_id = ? AND role = ? AND content = ?
+        """, (session_id, msg.get("role"), msg.get("content")))
+        count = cursor.fetchone()[0]
+
+        if count == 0:
+            cursor.execute(f"""
+                INSERT INTO chat_history (session_id, role, content, seq)
+                VALUES (?, ?, ?, {NEXT_SEQ_SQL})
+            """, (session_id, msg.get("role"), msg.get("content"), session_id))
 
+def save_chat_history_db(history, session_id="demo_session") -> bool:
+    """Save chat history to SQLite database"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            _write_history(cursor, history, session_id)
             conn.commit()
             logger.info(f"DB에 채팅 히스토리 저장 완료 (session_id={session_id})")
             return True
@@ -574,6 +736,37 @@ def save_chat_history_db(history, session_id="demo_session") -> bool:
     except Exception as e:
         logger.error(f"Error saving chat history to DB: {e}")
         return False
+
+def save_chat_histories_batch(batch: List[Tuple[str, List[Dict[str, str]]]]) -> bool:
+    """여러 세션의 채팅 히스토리를 한 트랜잭션으로 저장합니다.
+
+    Args:
+        batch: (session_id, history) 목록
+
+    Returns:
+        bool: 저장 성공 여부 (실패 시 전체가 롤백됨)
+    """
+    if not batch:
+        return True
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                for session_id, history in batch:
+                    _write_history(cursor, history, session_id)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            logger.debug(f"DB에 채팅 히스토리 {len(batch)}건 일괄 저장 완료")
+            return True
+    except sqlite3.OperationalError as e:
+        logger.error(f"DB 일괄 저장 중 오류: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"Error saving chat history batch to DB: {e}")
+        return False
     
 def save_chat_history(history):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -617,8 +810,12 @@ def save_chat_button_click(history):
     else:
         return f"✅ 채팅 기록이 저장되었습니다: {saved_path}"
     
+HISTORY_PAGE_SIZE = 100
+
 def load_chat_from_db(session_id: str) -> List[Dict[str, str]]:
-    """특정 세션의 채팅 기록을 데이터베이스에서 불러옵니다.
+    """특정 세션의 채팅 기록 전체를 데이터베이스에서 불러옵니다.
+
+    긴 세션을 화면에 표시할 때는 load_chat_window를 사용하세요.
 
     Args:
         session_id: 불러올 세션의 ID
@@ -633,23 +830,14 @@ def load_chat_from_db(session_id: str) -> List[Dict[str, str]]:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT role, content, timestamp 
+                SELECT role, content
                 FROM chat_history 
                 WHERE session_id = ? 
-                ORDER BY id ASC
+                ORDER BY seq ASC, id ASC
             """, (session_id,))
             
-            history = []
-            for row in cursor.fetchall():
-                role, content, timestamp = row
-                message = ChatMessage(
-                    role=role,
-                    content=content,
-                    timestamp=datetime.fromisoformat(timestamp) if timestamp else None
-                )
-                history.append({"role": message.role, "content": message.content})
-            
-            logger.info(f"Successfully loaded {len(history)} messages from session '{session_id}'")
+            history = [{"role": role, "content": content} for role, content in cursor]
+            logger.debug(f"Loaded {len(history)} messages from session '{session_id}'")
             return history
             
     except sqlite3.Error as e:
@@ -659,6 +847,77 @@ def load_chat_from_db(session_id: str) -> List[Dict[str, str]]:
         logger.error(f"Unexpected error loading session '{session_id}': {e}")
         return []
 
+def load_chat_window(
+    session_id: str,
+    limit: int = HISTORY_PAGE_SIZE,
+    before_seq: Optional[int] = None
+) -> Tuple[List[Dict[str, str]], Optional[int]]:
+    """세션의 최근 메시지 limit개(또는 before_seq 이전의 limit개)를 불러옵니다.
+
+    (session_id, seq) 인덱스를 역순으로 읽으므로 세션 길이와 무관하게 창 크기만큼만 읽습니다.
+    첫 창(before_seq 없음)에 system 메시지가 포함되지 않으면 세션의 최신 system 메시지를 앞에 붙입니다.
+
+    Args:
+        session_id: 불러올 세션의 ID
+        limit: 불러올 최대 메시지 수
+        before_seq: 이 seq보다 앞선 메시지만 불러옴 (이전 페이지 요청 시 사용)
+
+    Returns:
+        Tuple[List[Dict[str, str]], Optional[int]]: (시간순 메시지 목록, 더 이전 페이지를 위한 before_seq 또는 None)
+
+    Raises:
+        SessionManagementError: 채팅 기록 로딩 중 오류 발생 시
+    """
+    limit = max(1, int(limit))
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            if before_seq is None:
+                cursor.execute("""
+                    SELECT seq, role, content
+                    FROM chat_history
+                    WHERE session_id = ?
+                    ORDER BY seq DESC
+                    LIMIT ?
+                """, (session_id, limit + 1))
+            else:
+                cursor.execute("""
+                    SELECT seq, role, content
+                    FROM chat_history
+                    WHERE session_id = ? AND seq < ?
+                    ORDER BY seq DESC
+                    LIMIT ?
+                """, (session_id, before_seq, limit + 1))
+            rows = cursor.fetchall()
+
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            rows.reverse()
+            next_before_seq = rows[0][0] if has_more else None
+            history = [{"role": role, "content": content} for _, role, content in rows]
+
+            if before_seq is None and has_more and not any(msg["role"] == "system" for msg in history):
+                cursor.execute("""
+                    SELECT content
+                    FROM chat_history
+                    WHERE session_id = ? AND role = 'system' AND seq < ?
+                    ORDER BY seq DESC
+                    LIMIT 1
+                """, (session_id, next_before_seq))
+                system_row = cursor.fetchone()
+                if system_row:
+                    history.insert(0, {"role": "system", "content": system_row[0]})
+
+            logger.debug(f"Loaded {len(history)} messages from session '{session_id}' (before_seq={before_seq})")
+            return history, next_before_seq
+
+    except sqlite3.Error as e:
+        logger.error(f"Database error loading session '{session_id}': {e}")
+        raise SessionManagementError(f"Failed to load session history: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error loading session '{session_id}': {e}")
+        return [], None
+
 def delete_session_history(session_id: str) -> SessionResult:
     """특정 세션의 모든 채팅 기록을 삭제합니다.
 
@@ -764,10 +1023,10 @@ def update_system_message_in_db(session_id: str, new_system_message: str):
             """, (session_id,))
             
             # 새 system 메시지 삽입
-            cursor.execute("""
-                INSERT INTO chat_history (session_id, role, content, timestamp)
-                VALUES (?, 'system', ?, CURRENT_TIMESTAMP)
-            """, (session_id, new_system_message))
+            cursor.execute(f"""
+                INSERT INTO chat_history (session_id, role, content, timestamp, seq)
+                VALUES (?, 'system', ?, CURRENT_TIMESTAMP, {NEXT_SEQ_SQL})
+            """, (session_id, new_system_message, session_id))
             
             conn.commit()
         logger.info(f"[update_system_message_in_db] 세션 {session_id}의 system 메시지가 업데이트되었습니다.")
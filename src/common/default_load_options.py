@@ -0,0 +1,17 @@
+from src.common.args import parse_args
+
+args=parse_args()
+
+default_cpu_quantization = args.cpu_quantization
+default_attn_implementation = args.attn_implementation
+default_compile_generation = args.compile_generation
+default_onnx_provider = args.onnx_provider
+default_speculative_decoding = args.speculative_decoding
+default_generation_timeout = args.generation_timeout
+default_session_token_budget = args.session_token_budget
+default_max_concurrent_generations = args.max_concurrent_generations
+default_max_queue_size = args.max_queue_size
+default_max_speech_sessions = args.max_speech_sessions
+default_speech_session_idle_timeout = args.speech_session_idle_timeout
+default_db_write_batch_size = args.db_write_batch_size
+default_db_write_interval = args.db_write_interval
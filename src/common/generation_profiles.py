@@ -0,0 +1,158 @@
+# generation_profiles.py
+
+import os
+import json
+import copy
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 사용자 정의 프로필 파일 (없으면 아래 기본값만 사용)
+# {
+#   "default": {...},
+#   "families": {"qwen": {...}, "gguf": {"n_ctx": 4096, "n_threads": 8}},
+#   "models": {"Qwen/Qwen2.5-7B-Instruct": {"max_new_tokens": 256, "stop": ["</answer>"]}}
+# }
+GENERATION_PROFILES_PATH = "./generation_profiles.json"
+
+# 값이 None인 항목은 백엔드/모델 기본값을 그대로 사용한다.
+DEFAULT_PROFILE = {
+    "max_new_tokens": 1024,   # 생성할 최대 토큰 수
+    "max_length": None,       # 프롬프트를 포함한 최대 길이 (설정 시 max_new_tokens 대신 사용, 뒤 단계에서 max_new_tokens만 지정하면 해제)
+    "do_sample": True,
+    "temperature": None,
+    "top_p": None,
+    "top_k": None,
+    "repetition_penalty": None,
+    "stop": [],               # 종료 문자열 목록
+    "n_ctx": 2048,            # llama.cpp 컨텍스트 크기
+    "n_threads": 4,           # llama.cpp 스레드 수
+}
+
+# 핸들러 계열별 기본값 (기존 하드코딩 값 유지)
+FAMILY_PROFILES = {
+    "other": {"max_new_tokens": 1024, "temperature": 0.6, "top_p": 0.9},
+    "onnx": {"max_new_tokens": 1024, "temperature": 0.6, "top_p": 0.9},
+    "qwen": {"max_new_tokens": 512, "do_sample": None},
+    "glm4": {"max_new_tokens": None, "max_length": 2500, "top_k": 1},
+    "glm4-hf": {"max_new_tokens": 128, "do_sample": False},
+    "glm4v": {"max_new_tokens": 1024, "temperature": 0.6, "top_p": 0.8, "repetition_penalty": 1.2},
+    "aya23": {"max_new_tokens": 1024, "temperature": 0.3, "top_p": 0.75, "top_k": 0},
+    "vision": {"max_new_tokens": 1024, "temperature": 0.6, "top_p": 0.9},
+    "minicpm": {"temperature": 0.7},
+    "gguf": {"max_new_tokens": 128, "n_ctx": 2048, "n_threads": 4},
+    "mlx": {"max_new_tokens": 1024},
+    "openai": {"max_new_tokens": 1024, "temperature": 0.7, "top_p": 0.9},
+    "anthropic": {"max_new_tokens": 1024, "temperature": 0.7},
+}
+
+_lock = threading.Lock()
+_file_cache = {"mtime": None, "data": {}}
+
+def _load_profile_file(path=GENERATION_PROFILES_PATH):
+    """프로필 파일을 읽어 캐시. 파일이 수정되면 다시 읽는다."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    with _lock:
+        if _file_cache["mtime"] != mtime:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    _file_cache["data"] = json.load(f)
+            except Exception as e:
+                logger.error(f"생성 프로필 파일을 읽을 수 없습니다: {path} ({e})")
+                _file_cache["data"] = {}
+            _file_cache["mtime"] = mtime
+        return _file_cache["data"]
+
+def _merge(profile, overrides):
+    overrides = overrides or {}
+    for key, value in overrides.items():
+        if key not in DEFAULT_PROFILE:
+            logger.warning(f"알 수 없는 생성 프로필 항목 무시: {key}")
+            continue
+        profile[key] = value
+    # 더 구체적인 단계(파일/요청)에서 max_new_tokens를 지정하면 앞 단계의 max_length보다 우선한다.
+    if overrides.get("max_new_tokens") is not None and "max_length" not in overrides:
+        profile["max_length"] = None
+    return profile
+
+def resolve_profile(model_id=None, family=None, overrides=None, path=GENERATION_PROFILES_PATH):
+    """
+    생성 프로필을 결정: 기본값 ← 계열 기본값 ← 파일(default/families/models) ← 요청별 overrides
+    overrides의 None 값은 무시된다. (UI에서 설정하지 않은 항목)
+    """
+    data = _load_profile_file(path)
+    profile = copy.deepcopy(DEFAULT_PROFILE)
+    _merge(profile, data.get("default"))
+    _merge(profile, FAMILY_PROFILES.get(family))
+    _merge(profile, data.get("families", {}).get(family))
+    _merge(profile, data.get("models", {}).get(model_id))
+    _merge(profile, {k: v for k, v in (overrides or {}).items() if v is not None})
+    return profile
+
+def to_hf_generate_kwargs(profile):
+    """transformers model.generate 인자로 변환 (종료 문자열은 핸들러가 stopping_criteria로 처리)"""
+    kwargs = {}
+    if profile["max_length"] is not None:
+        kwargs["max_length"] = profile["max_length"]
+    elif profile["max_new_tokens"] is not None:
+        kwargs["max_new_tokens"] = profile["max_new_tokens"]
+    if profile["do_sample"] is not None:
+        kwargs["do_sample"] = profile["do_sample"]
+    # 탐욕적 디코딩에서 샘플링 인자를 넘기면 경고가 발생하므로 제외
+    if profile["do_sample"] is not False:
+        for key in ("temperature", "top_p", "top_k"):
+            if profile[key] is not None:
+                kwargs[key] = profile[key]
+    if profile["repetition_penalty"] is not None:
+        kwargs["repetition_penalty"] = profile["repetition_penalty"]
+    return kwargs
+
+def truncate_at_stop(text, stop_strings):
+    """생성된 텍스트를 가장 먼저 나타나는 종료 문자열 앞에서 자른다."""
+    cut = len(text)
+    for stop in stop_strings or []:
+        index = text.find(stop)
+        if index != -1:
+            cut = min(cut, index)
+    return text[:cut]
+
+def to_llama_cpp_kwargs(profile):
+    """llama-cpp-python 호출 인자로 변환"""
+    kwargs = {"max_tokens": profile["max_new_tokens"]}
+    if profile["do_sample"] is False:
+        kwargs["temperature"] = 0.0
+    elif profile["temperature"] is not None:
+        kwargs["temperature"] = profile["temperature"]
+    if profile["top_p"] is not None:
+        kwargs["top_p"] = profile["top_p"]
+    if profile["top_k"] is not None:
+        kwargs["top_k"] = profile["top_k"]
+    if profile["repetition_penalty"] is not None:
+        kwargs["repeat_penalty"] = profile["repetition_penalty"]
+    if profile["stop"]:
+        kwargs["stop"] = list(profile["stop"])
+    return kwargs
+
+# API 요청에 max_tokens가 없을 때 사용할 값 (Anthropic은 max_tokens가 필수)
+API_DEFAULT_MAX_TOKENS = 1024
+
+def to_api_kwargs(profile, provider="openai"):
+    """OpenAI / Anthropic 요청 인자로 변환"""
+    max_tokens = profile["max_new_tokens"]
+    kwargs = {"max_tokens": max_tokens if max_tokens is not None else API_DEFAULT_MAX_TOKENS}
+    if profile["do_sample"] is False:
+        # API에는 샘플링 여부 인자가 없으므로 탐욕적 디코딩은 temperature 0으로 요청
+        kwargs["temperature"] = 0.0
+    elif profile["temperature"] is not None:
+        kwargs["temperature"] = profile["temperature"]
+    if profile["top_p"] is not None:
+        kwargs["top_p"] = profile["top_p"]
+    if profile["stop"]:
+        kwargs["stop_sequences" if provider == "anthropic" else "stop"] = list(profile["stop"])
+    if provider == "anthropic" and profile["top_k"] is not None:
+        kwargs["top_k"] = profile["top_k"]
+    return kwargs
@@ -0,0 +1,203 @@
+# metrics.py
+
+import time
+import logging
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# 최근 요청 기록 개수 (링 버퍼)
+RECENT_REQUESTS_SIZE = 256
+
+# 요청별로 합계/개수를 누적하는 지표 (Prometheus summary 형식으로 노출)
+_SUMMARY_METRICS = {
+    "ttft_seconds": "요청 시작부터 첫 토큰까지의 시간",
+    "queue_wait_seconds": "모델 대기열에서 기다린 시간",
+    "decode_tokens_per_second": "첫 토큰 이후 디코딩 속도",
+    "request_duration_seconds": "요청 전체 처리 시간",
+    "model_load_seconds": "모델 로드 시간 (캐시 미스 시)",
+}
+
+# 추측 디코딩 통계 키 -> 모델별 누적 카운터 이름
+_SPECULATIVE_COUNTERS = {
+    "proposed_tokens": "speculative_proposed_tokens_total",
+    "accepted_tokens": "speculative_accepted_tokens_total",
+    "verify_steps": "speculative_verify_steps_total",
+    "new_tokens": "speculative_generated_tokens_total",
+}
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def request_record(model, model_type, control, status):
+    """GenerationControl에 기록된 값으로 요청 하나의 지표를 계산"""
+    finished = control.finished_at or time.monotonic()
+    ttft = control.first_token_at - control.started_at if control.first_token_at is not None else None
+    decode_tps = None
+    if control.first_token_at is not None and control.generated_tokens > 1 and finished > control.first_token_at:
+        decode_tps = (control.generated_tokens - 1) / (finished - control.first_token_at)
+    return {
+        "time": time.time(),
+        "model": model,
+        "model_type": model_type,
+        "status": status,
+        "prompt_tokens": control.prompt_tokens,
+        "generated_tokens": control.generated_tokens,
+        "ttft_seconds": ttft,
+        "decode_tokens_per_second": decode_tps,
+        "queue_wait_seconds": control.queue_wait,
+        "request_duration_seconds": finished - control.started_at,
+        "model_load_seconds": control.model_load_time,
+        "cache_hit": control.cache_hit,
+    }
+
+class MetricsRegistry:
+    """
+    추론 지표 저장소.
+    모델별 누적 카운터/합계와 최근 요청 링 버퍼만 유지하며, 기록은 잠금 한 번과 dict 갱신으로 끝난다.
+    """
+    def __init__(self, recent_size=RECENT_REQUESTS_SIZE):
+        self.recent = deque(maxlen=recent_size)
+        self._counters = {}
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def _inc(self, name, labels, value=1):
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def _observe(self, name, labels, value):
+        total, count = self._summaries.get((name, labels), (0.0, 0))
+        self._summaries[(name, labels)] = (total + value, count + 1)
+
+    def record(self, record):
+        model_labels = (("model", record["model"]), ("model_type", record["model_type"]))
+        with self._lock:
+            self.recent.append(record)
+            self._inc("requests_total", model_labels + (("status", record["status"]),))
+            self._inc("generated_tokens_total", model_labels, record["generated_tokens"] or 0)
+            if record["prompt_tokens"] is not None:
+                self._inc("prompt_tokens_total", model_labels, record["prompt_tokens"])
+            if record["cache_hit"] is not None:
+                self._inc("model_cache_hits_total" if record["cache_hit"] else "model_cache_misses_total", model_labels)
+            for name in _SUMMARY_METRICS:
+                if record[name] is not None:
+                    self._observe(name, model_labels, record[name])
+
+    def record_speculative(self, model, stats):
+        """추측 디코딩 생성 1회의 통계(제안/수락 토큰, 검증 패스 수)를 모델별 카운터에 누적"""
+        labels = (("model", model), ("mode", stats["mode"] or "unknown"))
+        with self._lock:
+            for key, name in _SPECULATIVE_COUNTERS.items():
+                self._inc(name, labels, stats[key])
+
+    def speculative_summary(self):
+        """모델/모드별 누적 추측 디코딩 통계와 수락률, 검증 패스당 토큰 수"""
+        with self._lock:
+            totals = {}
+            for (name, labels), value in self._counters.items():
+                for key, counter in _SPECULATIVE_COUNTERS.items():
+                    if name == counter:
+                        totals.setdefault(labels, dict.fromkeys(_SPECULATIVE_COUNTERS, 0))[key] = value
+        summary = []
+        for labels, stats in sorted(totals.items()):
+            entry = dict(labels)
+            entry.update(stats)
+            entry["acceptance_rate"] = stats["accepted_tokens"] / stats["proposed_tokens"] if stats["proposed_tokens"] else None
+            entry["tokens_per_verify_step"] = stats["new_tokens"] / stats["verify_steps"] if stats["verify_steps"] else None
+            summary.append(entry)
+        return summary
+
+    def recent_requests(self, limit=20):
+        with self._lock:
+            return list(self.recent)[-limit:][::-1]
+
+    def render_prometheus(self, extra_gauges=()):
+        """Prometheus 텍스트 노출 형식으로 변환. extra_gauges: (이름, 라벨 튜플, 값) 목록"""
+        with self._lock:
+            counters = dict(self._counters)
+            summaries = dict(self._summaries)
+        lines = []
+        for name in sorted({key[0] for key in counters}):
+            lines.append(f"# TYPE easyllm_{name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"easyllm_{name}{self._labels(labels)} {value}")
+        for name, help_text in _SUMMARY_METRICS.items():
+            entries = [(labels, value) for (metric, labels), value in sorted(summaries.items()) if metric == name]
+            if not entries:
+                continue
+            lines.append(f"# HELP easyllm_{name} {help_text}")
+            lines.append(f"# TYPE easyllm_{name} summary")
+            for labels, (total, count) in entries:
+                lines.append(f"easyllm_{name}_sum{self._labels(labels)} {total}")
+                lines.append(f"easyllm_{name}_count{self._labels(labels)} {count}")
+        gauge_names = []
+        for name, labels, value in extra_gauges:
+            if name not in gauge_names:
+                gauge_names.append(name)
+                lines.append(f"# TYPE easyllm_{name} gauge")
+            lines.append(f"easyllm_{name}{self._labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ""
+        return "{" + ",".join(f"{key}=\"{_escape(value)}\"" for key, value in labels) + "}"
+
+metrics = MetricsRegistry()
+
+def record_request(model, model_type, control, status):
+    try:
+        metrics.record(request_record(model, model_type, control, status))
+    except Exception as e:
+        # 지표 기록 실패가 응답 생성에 영향을 주지 않도록 한다.
+        logger.warning(f"요청 지표 기록 실패: {e}")
+
+def record_speculative(model, stats):
+    try:
+        metrics.record_speculative(model, stats)
+    except Exception as e:
+        logger.warning(f"추측 디코딩 지표 기록 실패: {e}")
+
+def _runtime_gauges():
+    """대기열/모델 캐시 상태를 gauge로 노출"""
+    from src.common.admission import get_admission_registry
+    from src.common.cache import models_cache
+    gauges = [("loaded_models", (), len(models_cache))]
+    for snapshot in get_admission_registry().snapshot():
+        labels = (("model", snapshot["name"]),)
+        gauges.append(("active_generations", labels, snapshot["active"]))
+        gauges.append(("queued_requests", labels, snapshot["waiting"]))
+        gauges.append(("rejected_requests", labels, snapshot["rejected"]))
+    return gauges
+
+def render_metrics():
+    return metrics.render_prometheus(_runtime_gauges())
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 스크레이프 요청마다 로그를 남기지 않는다.
+        pass
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """/metrics 엔드포인트를 별도 데몬 스레드에서 제공"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"[*] Prometheus 지표 엔드포인트: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,284 @@
+# migrations.py
+import logging
+import sqlite3
+from typing import Callable, List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+class MigrationError(Exception):
+    """스키마 마이그레이션 관련 커스텀 예외"""
+    pass
+
+def _columns(cursor, table: str) -> List[str]:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [info[1] for info in cursor.fetchall()]
+
+def _add_missing_columns(cursor, table: str, columns) -> None:
+    """
+    기존 DB에 없는 열을 추가. SQLite는 ALTER TABLE ADD COLUMN에 CURRENT_TIMESTAMP 같은
+    비상수 기본값을 허용하지 않으므로 기본값 없이 추가한 뒤 backfill 값으로 채운다.
+    """
+    existing = _columns(cursor, table)
+    for name, column_type, backfill in columns:
+        if name in existing:
+            continue
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+        if backfill is not None:
+            cursor.execute(f"UPDATE {table} SET {name} = {backfill} WHERE {name} IS NULL")
+        logger.info(f"'{table}' 테이블에 '{name}' 열 추가 완료.")
+
+def _baseline_schema(cursor) -> None:
+    """기존 initialize_database / initialize_presets_db / save_chat_history_db의 테이블 정의를 하나로 통합"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS system_presets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            language TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(name, language)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chat_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_activity DATETIME
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+    # 예전 정의로 만들어진 테이블에 빠진 열 보충
+    _add_missing_columns(cursor, "system_presets", [
+        ("created_at", "DATETIME", "CURRENT_TIMESTAMP"),
+        ("updated_at", "DATETIME", "CURRENT_TIMESTAMP"),
+    ])
+    _add_missing_columns(cursor, "chat_history", [
+        ("timestamp", "DATETIME", "CURRENT_TIMESTAMP"),
+        ("created_at", "DATETIME", "CURRENT_TIMESTAMP"),
+        ("updated_at", "DATETIME", "CURRENT_TIMESTAMP"),
+    ])
+    cursor.execute("UPDATE chat_history SET timestamp = CURRENT_TIMESTAMP WHERE timestamp IS NULL")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_history_session ON chat_history(session_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_system_presets_lang ON system_presets(language)")
+
+def _chat_history_seq(cursor) -> None:
+    """
+    세션 안의 메시지 순번(seq) 열 추가.
+    기존 행은 세션별 id 순서대로 1부터 채우고, (session_id, seq) 인덱스로 세션 내 정렬/범위 조회를 처리한다.
+    """
+    _add_missing_columns(cursor, "chat_history", [("seq", "INTEGER", None)])
+    cursor.execute("SELECT id, session_id FROM chat_history ORDER BY session_id, id")
+    updates = []
+    previous_session, seq = None, 0
+    for row_id, session_id in cursor.fetchall():
+        seq = seq + 1 if session_id == previous_session else 1
+        previous_session = session_id
+        updates.append((seq, row_id))
+    cursor.executemany("UPDATE chat_history SET seq = ? WHERE id = ?", updates)
+    # session_id 단독 인덱스는 (session_id, seq)의 접두사로 대체된다.
+    cursor.execute("DROP INDEX IF EXISTS idx_chat_history_session")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_chat_history_session_seq ON chat_history(session_id, seq)")
+
+def _activity_and_role_indexes(cursor) -> None:
+    """최근 사용 세션 조회(last_activity)와 역할별 조회(role)용 인덱스"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions(last_activity)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_history_role ON chat_history(role)")
+
+# 세션 제목으로 쓸 첫 사용자 메시지 길이
+SESSION_TITLE_LENGTH = 80
+
+# SQLite CURRENT_TIMESTAMP와 같은 형식(UTC)에 밀리초를 더한 시각
+_NOW_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+def _session_metadata(cursor) -> None:
+    """
+    sessions 테이블에 메시지 수/제목을 두고 chat_history 트리거로 유지.
+    세션 목록을 chat_history 전체 스캔 대신 sessions 테이블과 (last_activity, id) 인덱스로 조회한다.
+    """
+    _add_missing_columns(cursor, "sessions", [
+        ("message_count", "INTEGER NOT NULL DEFAULT 0", None),
+        ("title", "TEXT", None),
+    ])
+    # chat_history에만 있던 세션도 sessions에 등록
+    cursor.execute("""
+        INSERT OR IGNORE INTO sessions (id, name, created_at, updated_at)
+        SELECT session_id, 'Session ' || session_id, MIN(timestamp), MIN(timestamp)
+        FROM chat_history
+        GROUP BY session_id
+    """)
+    cursor.execute(f"""
+        UPDATE sessions SET
+            message_count = (SELECT COUNT(*) FROM chat_history WHERE session_id = sessions.id),
+            title = (
+                SELECT substr(content, 1, {SESSION_TITLE_LENGTH}) FROM chat_history
+                WHERE session_id = sessions.id AND role = 'user'
+                ORDER BY seq LIMIT 1
+            ),
+            last_activity = COALESCE(
+                (SELECT MAX(timestamp) FROM chat_history WHERE session_id = sessions.id),
+                replace(last_activity, 'T', ' '),
+                replace(created_at, 'T', ' ')
+            )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_chat_history_insert_session
+        AFTER INSERT ON chat_history
+        BEGIN
+            INSERT OR IGNORE INTO sessions (id, name, created_at, updated_at)
+            VALUES (NEW.session_id, 'Session ' || NEW.session_id, {_NOW_SQL}, {_NOW_SQL});
+            UPDATE sessions SET
+                message_count = message_count + 1,
+                last_activity = {_NOW_SQL},
+                title = COALESCE(title, CASE WHEN NEW.role = 'user' THEN substr(NEW.content, 1, {SESSION_TITLE_LENGTH}) END)
+            WHERE id = NEW.session_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_chat_history_delete_session
+        AFTER DELETE ON chat_history
+        BEGIN
+            UPDATE sessions SET message_count = message_count - 1
+            WHERE id = OLD.session_id;
+        END
+    """)
+    # 최근 활동순 키셋 페이지네이션용 (v3의 last_activity 단독 인덱스를 대체)
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_last_activity")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_activity_id ON sessions(last_activity, id)")
+
+# 전문 검색 토크나이저 후보 (앞에서부터 사용 가능한 것을 선택)
+# trigram은 띄어쓰기가 없는 일본어/중국어와 한국어 조사 붙은 단어도 부분 일치로 찾을 수 있다. (SQLite 3.34+)
+FTS_TOKENIZERS = ["trigram", "unicode61 remove_diacritics 2"]
+
+def _chat_history_fts(cursor) -> None:
+    """
+    chat_history.content에 대한 FTS5 외부 콘텐츠 인덱스와 동기화 트리거.
+    인덱스만 저장하고 본문은 chat_history를 참조하므로 저장 공간이 두 배가 되지 않는다.
+    """
+    for tokenizer in FTS_TOKENIZERS:
+        try:
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS chat_history_fts USING fts5(
+                    content,
+                    content='chat_history',
+                    content_rowid='id',
+                    tokenize='{tokenizer}'
+                )
+            """)
+            break
+        except sqlite3.OperationalError as e:
+            logger.info(f"FTS5 토크나이저 '{tokenizer}'를 사용할 수 없습니다: {e}")
+    else:
+        tokenizer = None
+    cursor.execute("""
+        INSERT INTO app_meta (key, value) VALUES ('fts_tokenizer', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (tokenizer.split()[0] if tokenizer else "none",))
+    if tokenizer is None:
+        # 검색은 LIKE 스캔으로 대체된다. (database.search_chat_history)
+        logger.warning("SQLite에 FTS5 지원이 없어 전문 검색 인덱스를 만들지 않습니다.")
+        return
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_chat_history_fts_insert
+        AFTER INSERT ON chat_history
+        BEGIN
+            INSERT INTO chat_history_fts (rowid, content) VALUES (NEW.id, NEW.content);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_chat_history_fts_delete
+        AFTER DELETE ON chat_history
+        BEGIN
+            INSERT INTO chat_history_fts (chat_history_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_chat_history_fts_update
+        AFTER UPDATE OF content ON chat_history
+        BEGIN
+            INSERT INTO chat_history_fts (chat_history_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+            INSERT INTO chat_history_fts (rowid, content) VALUES (NEW.id, NEW.content);
+        END
+    """)
+    # 기존 메시지 색인
+    cursor.execute("INSERT INTO chat_history_fts (chat_history_fts) VALUES ('rebuild')")
+
+# 새 스키마 변경은 항상 목록 끝에 다음 버전 번호로 추가한다. (이미 배포된 항목은 수정하지 않는다)
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline schema", _baseline_schema),
+    Migration(2, "chat_history.seq + (session_id, seq) index", _chat_history_seq),
+    Migration(3, "sessions.last_activity / chat_history.role indexes", _activity_and_role_indexes),
+    Migration(4, "sessions.message_count / title + chat_history triggers", _session_metadata),
+    Migration(5, "chat_history_fts full-text index", _chat_history_fts),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """
+    PRAGMA user_version보다 새로운 마이그레이션을 차례로 적용하고 최종 버전을 반환.
+    각 마이그레이션은 user_version 갱신과 함께 하나의 트랜잭션으로 커밋되며,
+    실패하면 해당 마이그레이션만 롤백되고 MigrationError를 발생시킨다.
+    여러 프로세스가 동시에 시작해도 BEGIN IMMEDIATE로 한 번만 적용된다.
+    """
+    version = get_schema_version(conn)
+    if version > LATEST_VERSION:
+        logger.warning(f"DB 스키마 버전({version})이 앱이 아는 최신 버전({LATEST_VERSION})보다 높습니다.")
+        return version
+
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # 트랜잭션을 직접 관리
+    try:
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # 잠금을 얻는 동안 다른 프로세스가 적용했을 수 있으므로 다시 확인
+                version = get_schema_version(conn)
+                if migration.version <= version:
+                    cursor.execute("COMMIT")
+                    continue
+                migration.apply(cursor)
+                cursor.execute(f"PRAGMA user_version = {migration.version}")
+                cursor.execute("COMMIT")
+            except Exception as e:
+                cursor.execute("ROLLBACK")
+                logger.error(f"DB 마이그레이션 {migration.version} ({migration.description}) 실패: {e}")
+                raise MigrationError(f"Migration {migration.version} failed: {e}")
+            version = migration.version
+            logger.info(f"DB 마이그레이션 {migration.version} 적용: {migration.description}")
+    finally:
+        conn.isolation_level = previous_isolation
+    return version
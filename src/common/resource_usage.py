@@ -0,0 +1,24 @@
+# resource_usage.py
+
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def get_peak_rss_mb() -> float:
+    """
+    현재 프로세스의 최대 RSS(Resident Set Size)를 MB 단위로 반환하는 함수
+    """
+    if resource is None:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 ** 2)
+        except Exception:
+            return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, Linux는 KB 단위로 보고함
+    if sys.platform == "darwin":
+        return peak / (1024 ** 2)
+    return peak / 1024
@@ -15,7 +15,7 @@ from huggingface_hub import (
     login
 )
 from llama_cpp import Llama
-from model_converter import convert_model_to_float8, convert_model_to_int8, convert_model_to_int4
+from model_converter import convert_model_to_float8, convert_model_to_int8, convert_model_to_int4, convert_model_streaming, convert_model_multi_variant_subprocess, STREAMING_QTYPES
 import platform
 import gc
 from src.common.cache import models_cache
@@ -50,7 +50,7 @@ def scan_local_models(root="./models", model_type=None):
         os.makedirs(root, exist_ok=True)
 
     local_model_ids = []
-    subdirs = ['transformers', 'gguf', 'mlx'] if not model_type else [model_type]
+    subdirs = ['transformers', 'gguf', 'mlx', 'onnx'] if not model_type else [model_type]
     for subdir in subdirs:
         subdir_path = os.path.join(root, subdir)
         if not os.path.isdir(subdir_path):
@@ -69,10 +69,12 @@ def get_all_local_models():
     transformers = [m["model_id"] for m in models if m["model_type"] == "transformers"]
     gguf = [m["model_id"] for m in models if m["model_type"] == "gguf"]
     mlx = [m["model_id"] for m in models if m["model_type"] == "mlx"]
+    onnx = [m["model_id"] for m in models if m["model_type"] == "onnx"]
     return {
         "transformers": transformers,
         "gguf": gguf,
-        "mlx": mlx
+        "mlx": mlx,
+        "onnx": onnx
     }
     
 def remove_hf_cache(model_id):
@@ -108,9 +110,9 @@ def get_model_list_from_hf_hub():
 def download_model_from_hf(hf_repo_id: str, target_dir: str, model_type: str = "transformers", quantization_bit: str = None) -> str:
     """
     동기식 모델 다운로드
-    model_type: "transformers", "gguf", "mlx" 중 선택
+    model_type: "transformers", "gguf", "mlx", "onnx" 중 선택
     """
-    if model_type not in ["transformers", "gguf", "mlx"]:
+    if model_type not in ["transformers", "gguf", "mlx", "onnx"]:
         model_type = "transformers"  # 기본값 설정
 
     target_base_dir = os.path.join("./models", model_type)
@@ -239,25 +241,52 @@ def ensure_model_available(model_id, local_model_path=None, model_type=None):
 def get_terminators(tokenizer):
     """
     모델별 종료 토큰 ID를 반환하는 함수
+    - 토크나이저에 없는 특수 토큰(None 또는 unk로 변환되는 경우)은 제외
+    - 중복 제거, 순서 유지
     """
     if "glm" in str(tokenizer.__class__).lower():
         # GLM 모델용 특수 처리
-        return [tokenizer.eos_token_id]  # GLM의 EOS 토큰 사용
+        candidates = [tokenizer.eos_token_id]  # GLM의 EOS 토큰 사용
     else:
         # 기존 다른 모델들을 위한 처리
-        return [
+        candidates = [
             tokenizer.convert_tokens_to_ids("<|end_of_text|>"),
             tokenizer.convert_tokens_to_ids("<|eot_id|>"),
-            tokenizer.eos_token_id if hasattr(tokenizer, 'eos_token_id') else None
+            getattr(tokenizer, 'eos_token_id', None)
         ]
+    unk_token_id = getattr(tokenizer, "unk_token_id", None)
+    terminators = []
+    for token_id in candidates:
+        if token_id is None or (token_id == unk_token_id and token_id != getattr(tokenizer, "eos_token_id", None)):
+            continue
+        if token_id not in terminators:
+            terminators.append(token_id)
+    return terminators
         
-def convert_and_save(model_id, output_dir, push_to_hub, quant_type, model_type="transformers"):
+def convert_and_save(model_id, output_dir, push_to_hub, quant_type, model_type="transformers", streaming=False):
     if not model_id:
         return "모델 ID를 입력해주세요."
 
     base_output_dir = os.path.join("./models", model_type)
     os.makedirs(base_output_dir, exist_ok=True)
 
+    if streaming:
+        # 샤드 단위 스트리밍 변환: 전체 모델을 메모리에 올리지 않음
+        if quant_type not in STREAMING_QTYPES:
+            return "지원되지 않는 변환 유형입니다."
+        if quant_type == 'float8' and platform.system() == 'Darwin':
+            return "MacOS에서는 float8 변환을 지원하지 않습니다."
+        if not output_dir:
+            output_dir = os.path.join(base_output_dir, f"{model_id.replace('/', '__')}-{quant_type}")
+        report = convert_model_streaming(model_id, output_dir, quant_type, push_to_hub=push_to_hub)
+        if report["success"]:
+            return (
+                f"모델이 스트리밍 방식으로 {quant_type} 변환되었습니다: {output_dir} "
+                f"(샤드 {len(report['shards'])}개, {report['elapsed_sec']:.1f}초, 최대 RSS {report['peak_rss_mb']:.0f} MB)"
+            )
+        else:
+            return f"모델 변환에 실패했습니다: {report.get('error')}"
+
     if quant_type == 'float8':
         if not output_dir:
             output_dir = os.path.join(base_output_dir, f"{model_id.replace('/', '__')}-float8")
@@ -288,23 +317,52 @@ def convert_and_save(model_id, output_dir, push_to_hub, quant_type, model_type="
     else:
         return "지원되지 않는 변환 유형입니다."
     
-def build_model_cache_key(model_id: str, model_type: str, quantization_bit: str = None, local_path: str = None) -> str:
+def convert_and_save_multi(model_id, quant_types, model_type="transformers"):
+    """
+    원본 모델을 한 번만 읽어 여러 양자화 변형(int8/int4/float8)을 생성하고 결과 요약을 반환
+    """
+    if not model_id:
+        return "모델 ID를 입력해주세요."
+    if not quant_types:
+        return "변환 유형을 하나 이상 선택해주세요."
+    if 'float8' in quant_types and platform.system() == 'Darwin':
+        return "MacOS에서는 float8 변환을 지원하지 않습니다."
+
+    base_output_dir = os.path.join("./models", model_type)
+    os.makedirs(base_output_dir, exist_ok=True)
+    # 프로세스 풀은 앱 프로세스가 아닌 별도 변환 프로세스에서 생성 (spawn 워커가 app.py를 다시 실행하지 않도록)
+    manifest = convert_model_multi_variant_subprocess(model_id, output_base_dir=base_output_dir, quant_types=quant_types)
+    if not manifest["success"]:
+        return f"모델 변환에 실패했습니다: {manifest.get('error')}"
+
+    lines = [f"모델이 {len(manifest['variants'])}개 변형으로 변환되었습니다. ({manifest['timings']['total_sec']:.1f}초, 최대 RSS {manifest['peak_rss_mb']:.0f} MB)"]
+    for quant_type, variant in manifest["variants"].items():
+        lines.append(f"- {quant_type}: {variant['output_dir']} ({variant['total_size_bytes'] / (1024**3):.2f} GB)")
+    lines.append(f"매니페스트: {manifest['manifest_path']}")
+    return "\n".join(lines)
+
+def build_model_cache_key(model_id: str, model_type: str, quantization_bit: str = None, local_path: str = None, load_options: str = None) -> str:
     """
     models_cache에 사용될 key를 구성.
     - 만약 model_id == 'Local (Custom Path)' 이고 local_path가 주어지면 'local::{local_path}'
     - 그 외에는 'auto::{model_type}::{local_dir}::hf::{model_id}::{quantization_bit}' 형태.
+    - load_options(CPU 양자화/어텐션 구현 등)가 주어지면 '::{load_options}'를 덧붙여
+      같은 모델의 양자화/비양자화 핸들러가 함께 캐시될 수 있도록 한다.
     """
     if model_id == "Local (Custom Path)" and local_path:
-        return f"local::{local_path}"
+        key = f"local::{local_path}"
     elif model_type == "api":
         return f"api::{model_id}"
     else:
         local_dirname = make_local_dir_name(model_id)
         local_dirpath = os.path.join("./models", model_type, local_dirname)
         if quantization_bit:
-            return f"auto::{model_type}::{local_dirpath}::hf::{model_id}::{quantization_bit}"
+            key = f"auto::{model_type}::{local_dirpath}::hf::{model_id}::{quantization_bit}"
         else:
-            return f"auto::{model_type}::{local_dirpath}::hf::{model_id}"
+            key = f"auto::{model_type}::{local_dirpath}::hf::{model_id}"
+    if load_options:
+        key = f"{key}::{load_options}"
+    return key
 
 def clear_model_cache(model_id: str, local_path: str = None) -> str:
     """
@@ -319,9 +377,12 @@ def clear_model_cache(model_id: str, local_path: str = None) -> str:
         # 로컬 모델의 기본 유형을 transformers로 설정 (필요 시 수정)
         model_type = "transformers"
     key = build_model_cache_key(model_id, model_type, local_path)
-    if key in models_cache:
-        del models_cache[key]
-        msg = f"[cache] 모델 캐시 제거: {key}"
+    # 로드 옵션별로 캐시된 변형(예: '...::cpuq=dynamic-int8')도 함께 제거
+    keys = [k for k in models_cache if k == key or k.startswith(f"{key}::")]
+    if keys:
+        for k in keys:
+            del models_cache[k]
+        msg = f"[cache] 모델 캐시 제거: {', '.join(keys)}"
         logger.info(msg)
         return msg
     else:
@@ -9,6 +9,7 @@ from .other import OtherModelHandler
 from .gguf_handler import GGUFModelHandler
 from .mlx_handler import MlxModelHandler
 from .mlx_vision import MlxVisionHandler
+from .onnx_handler import OnnxModelHandler
 
 __all__ = [
     "GGUFModelHandler",
@@ -22,4 +23,5 @@ __all__ = [
     "QwenHandler",
     "MlxModelHandler",
     "MlxVisionHandler",
+    "OnnxModelHandler",
 ]
\ No newline at end of file
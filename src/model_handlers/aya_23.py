@@ -4,15 +4,20 @@ import logging
 import traceback
 from transformers import AutoTokenizer, AutoModelForCausalLM, QuantoConfig
 from src.common.utils import make_local_dir_name
+from src.model_handlers.load_options import resolve_load_options, model_load_kwargs, apply_cpu_quantization
+from src.model_handlers.stopping_criteria import request_stopping_criteria
+from src.common.generation_profiles import resolve_profile, to_hf_generate_kwargs, truncate_at_stop
 
 logger = logging.getLogger(__name__)
 
 class Aya23Handler:
-    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu'):
+    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu', cpu_quantization=None, attn_implementation=None):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.tokenizer = None
         self.model = None
         self.device = device
+        self.cpu_quantization, self.attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
         self.load_model()
 
     def load_model(self):
@@ -36,9 +41,11 @@ class Aya23Handler:
             else:
                 self.model = AutoModelForCausalLM.from_pretrained(
                     self.model_dir,
+                    **model_load_kwargs(self.device, self.cpu_quantization, self.attn_implementation, torch_dtype=None),
                     trust_remote_code=True,
                     device_map="auto"
                 ).to(self.device)
+                self.model = apply_cpu_quantization(self.model, self.cpu_quantization, self.device)
             logger.info(f"[*] Model loaded successfully: {self.model_dir}")
         except Exception as e:
             logger.error(f"Failed to load GLM4 Model: {str(e)}\n\n{traceback.format_exc()}")
@@ -56,27 +63,40 @@ class Aya23Handler:
     def generate_answer(
             self,
             prompts,
-            temperature=0.3,
-            top_p=0.75,
-            top_k=0,
-            max_new_tokens=1024,
-            verbose=False
+            temperature=None,
+            top_p=None,
+            top_k=None,
+            max_new_tokens=None,
+            verbose=False,
+            generation_overrides=None
         ):
         """
         Generate answers for the given prompts using the loaded model.
         
         Args:
             prompts (list): List of input prompts
-            temperature (float): Sampling temperature (default: 0.3)
-            top_p (float): Nucleus sampling parameter (default: 0.75)
-            top_k (int): Top-k sampling parameter (default: 0)
-            max_new_tokens (int): Maximum number of tokens to generate (default: 1024)
+            temperature (float): Sampling temperature (default: profile, 0.3)
+            top_p (float): Nucleus sampling parameter (default: profile, 0.75)
+            top_k (int): Top-k sampling parameter (default: profile, 0)
+            max_new_tokens (int): Maximum number of tokens to generate (default: profile, 1024)
             verbose (bool): Whether to print prompt-response pairs (default: False)
+            generation_overrides (dict): Per-request generation profile overrides
             
         Returns:
             list: Generated responses for each prompt
         """
         try:
+            # 명시적으로 넘긴 인자가 요청별 overrides보다 우선
+            explicit = {"temperature": temperature, "top_p": top_p, "top_k": top_k, "max_new_tokens": max_new_tokens}
+            profile = resolve_profile(
+                self.model_id,
+                "aya23",
+                {**(generation_overrides or {}), **{k: v for k, v in explicit.items() if v is not None}}
+            )
+            gen_kwargs = to_hf_generate_kwargs(profile)
+            stopping_criteria = request_stopping_criteria(self.tokenizer, profile["stop"])
+            if stopping_criteria is not None:
+                gen_kwargs["stopping_criteria"] = stopping_criteria
             messages = self._get_message_format(prompts)
             
             input_ids = self.tokenizer.apply_chat_template(
@@ -91,16 +111,15 @@ class Aya23Handler:
 
             gen_tokens = self.model.generate(
                 input_ids,
-                temperature=temperature,
-                top_p=top_p,
-                top_k=top_k,
-                max_new_tokens=max_new_tokens,
-                do_sample=True
+                **gen_kwargs
             )
 
             # Get only generated tokens
             gen_tokens = [gt[prompt_padded_len:] for gt in gen_tokens]
-            generations = self.tokenizer.batch_decode(gen_tokens, skip_special_tokens=True)
+            generations = [
+                truncate_at_stop(text, profile["stop"])
+                for text in self.tokenizer.batch_decode(gen_tokens, skip_special_tokens=True)
+            ]
 
             if verbose:
                 for prompt, response in zip(prompts, generations):
@@ -0,0 +1,141 @@
+# model_handlers/chat_template_cache.py
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import torch
+from transformers import BatchEncoding
+
+logger = logging.getLogger(__name__)
+
+# 접두사 안정성 검사에 사용할 가상 대화
+_PROBE_MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "안녕하세요?"},
+    {"role": "assistant", "content": "안녕하세요! 무엇을 도와드릴까요?"},
+    {"role": "user", "content": "Tell me a joke."},
+]
+
+def _message_hashes(messages):
+    """메시지 접두사별 누적 콘텐츠 해시 목록 (hashes[k] = messages[:k+1]의 해시)"""
+    hashes = []
+    digest = hashlib.sha1()
+    for msg in messages:
+        digest.update(f"{msg['role']}\0{msg['content']}\0".encode("utf-8"))
+        hashes.append(digest.copy().hexdigest())
+    return hashes
+
+class ChatTemplateCache:
+    """
+    채팅 템플릿 증분 렌더러.
+    이전 턴에서 렌더링/토큰화한 히스토리 접두사를 콘텐츠 해시로 LRU 캐시해 두고,
+    새로 추가된 메시지만 렌더링/토큰화하여 이어 붙인다.
+
+    새 메시지 구간은 캐시된 접두사의 마지막 메시지를 기준(anchor)으로 렌더링한 결과에서
+    기준 메시지만 렌더링한 결과를 잘라내어 구한다. 로드 시 가상 대화로 전체 렌더링과
+    증분 렌더링 결과(텍스트/토큰)가 일치하는지 검사하여, 접두사가 안정적이지 않은 템플릿은
+    항상 전체 렌더링을 사용한다. 증분 렌더링 중 오류가 나도 전체 렌더링으로 대체한다.
+    """
+    def __init__(self, tokenizer, max_entries=64):
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generation_suffix = None
+        self.generation_suffix_ids = None
+        self.prefix_stable = self._probe()
+        if not self.prefix_stable:
+            logger.info(f"[*] 채팅 템플릿이 접두사 안정적이지 않아 전체 렌더링을 사용합니다: {tokenizer.__class__.__name__}")
+
+    def _render(self, messages, add_generation_prompt):
+        return self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=add_generation_prompt)
+
+    def _tokenize(self, text):
+        return self.tokenizer.encode(text, add_special_tokens=False)
+
+    def _render_delta(self, anchor, new_messages):
+        """anchor 뒤에 이어지는 new_messages 구간의 렌더링 결과 (생성 프롬프트 제외)"""
+        base = self._render([anchor], False)
+        extended = self._render([anchor] + new_messages, False)
+        if not extended.startswith(base):
+            raise ValueError("템플릿 출력이 접두사 안정적이지 않습니다.")
+        return extended[len(base):]
+
+    def _probe(self):
+        try:
+            base = self._render([_PROBE_MESSAGES[-1]], False)
+            with_prompt = self._render([_PROBE_MESSAGES[-1]], True)
+            if not with_prompt.startswith(base):
+                return False
+            self.generation_suffix = with_prompt[len(base):]
+            self.generation_suffix_ids = self._tokenize(self.generation_suffix)
+
+            full_text = self._render(_PROBE_MESSAGES, True)
+            prefix_text = self._render(_PROBE_MESSAGES[:2], False)
+            delta = self._render_delta(_PROBE_MESSAGES[1], _PROBE_MESSAGES[2:])
+            if prefix_text + delta + self.generation_suffix != full_text:
+                return False
+            incremental_ids = self._tokenize(prefix_text) + self._tokenize(delta) + self.generation_suffix_ids
+            return incremental_ids == self._tokenize(full_text)
+        except Exception as e:
+            logger.debug(f"채팅 템플릿 접두사 안정성 검사 실패: {e}")
+            return False
+
+    def _lookup(self, hashes):
+        """캐시에 있는 가장 긴 접두사의 (길이, 텍스트, 토큰) 반환"""
+        with self._lock:
+            for k in range(len(hashes), 0, -1):
+                entry = self._entries.get(hashes[k - 1])
+                if entry is not None:
+                    self._entries.move_to_end(hashes[k - 1])
+                    return (k,) + entry
+        return 0, None, None
+
+    def _store(self, key, text, ids):
+        with self._lock:
+            self._entries[key] = (text, ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def render_ids(self, messages, add_generation_prompt=True):
+        """messages 전체를 렌더링/토큰화한 토큰 ID 리스트를 반환 (가능하면 증분 처리)"""
+        messages = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+        if not self.prefix_stable or not messages:
+            return self._tokenize(self._render(messages, add_generation_prompt))
+
+        hashes = _message_hashes(messages)
+        k, text, ids = self._lookup(hashes)
+        try:
+            if k == 0:
+                self.misses += 1
+                text = self._render(messages, False)
+                ids = self._tokenize(text)
+            elif k < len(messages):
+                self.hits += 1
+                delta = self._render_delta(messages[k - 1], messages[k:])
+                text = text + delta
+                ids = ids + self._tokenize(delta)
+            else:
+                self.hits += 1
+        except Exception as e:
+            logger.warning(f"증분 템플릿 렌더링 실패, 전체 렌더링으로 대체합니다: {e}")
+            return self._tokenize(self._render(messages, add_generation_prompt))
+
+        self._store(hashes[-1], text, ids)
+        if add_generation_prompt:
+            return ids + self.generation_suffix_ids
+        return list(ids)
+
+    def encode(self, messages, add_generation_prompt=True):
+        """model.generate에 바로 넘길 수 있는 input_ids/attention_mask BatchEncoding 반환"""
+        input_ids = torch.tensor([self.render_ids(messages, add_generation_prompt)], dtype=torch.long)
+        return BatchEncoding({"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)})
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
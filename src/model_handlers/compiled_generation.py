@@ -0,0 +1,108 @@
+# model_handlers/compiled_generation.py
+
+import os
+import logging
+import traceback
+import torch
+
+logger = logging.getLogger(__name__)
+
+# torch.compile(inductor) 산출물을 재시작 간에 재사용하기 위한 디스크 캐시 위치
+COMPILE_CACHE_DIR = os.path.join("./models", ".compile_cache")
+
+def resolve_compile_generation(compile_generation=None):
+    """None이면 전역 기본값(--compile-generation)을 사용"""
+    if compile_generation is None:
+        from src.common.default_load_options import default_compile_generation
+        return default_compile_generation
+    return bool(compile_generation)
+
+def enable_compile_cache(cache_dir=COMPILE_CACHE_DIR):
+    """
+    inductor FX 그래프 캐시를 디스크에 저장하도록 설정.
+    환경 변수는 첫 컴파일 전에만 의미가 있으므로 이미 설정된 값은 덮어쓰지 않는다.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.abspath(cache_dir))
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+    os.environ.setdefault("TORCHINDUCTOR_AUTOGRAD_CACHE", "1")
+    try:
+        import torch._inductor.config as inductor_config
+        inductor_config.fx_graph_cache = True
+    except Exception:
+        pass
+
+def _has_builtin_compile():
+    """transformers가 정적 캐시 사용 시 디코딩 forward를 자체적으로 컴파일하는지 여부 (4.48+)"""
+    try:
+        from transformers import GenerationConfig
+        return hasattr(GenerationConfig(), "compile_config")
+    except Exception:
+        return False
+
+class CompiledGenerator:
+    """
+    정적 KV 캐시 + 컴파일된 forward로 model.generate를 실행하는 래퍼.
+    - 정적 캐시를 지원하지 않는 아키텍처(원격 코드 모델, 양자화된 모델 등)는 eager로 실행
+    - 컴파일/실행 중 오류가 나면 원래 forward를 복원하고 eager로 재시도한 뒤 이후에도 eager 유지
+    """
+    def __init__(self, model, enabled=False, warmup_tokens=4):
+        self.model = model
+        self.enabled = False
+        self._original_forward = None
+        self._builtin = False
+        if enabled:
+            self.enabled = self._prepare()
+            if self.enabled and warmup_tokens:
+                self._warmup(warmup_tokens)
+
+    def _prepare(self):
+        model = self.model
+        if not getattr(model, "_supports_static_cache", False):
+            logger.warning(f"[*] {model.__class__.__name__}은(는) 정적 캐시를 지원하지 않아 컴파일 생성 모드를 사용하지 않습니다.")
+            return False
+        if any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in model.modules()):
+            logger.warning("[*] 동적 int8 양자화 모델은 컴파일 생성 모드를 사용하지 않습니다.")
+            return False
+        try:
+            enable_compile_cache()
+            model.generation_config.cache_implementation = "static"
+            self._builtin = _has_builtin_compile()
+            if not self._builtin:
+                self._original_forward = model.forward
+                model.forward = torch.compile(
+                    model.forward,
+                    mode="reduce-overhead" if model.device.type == "cuda" else None,
+                    fullgraph=False,
+                )
+            logger.info(f"[*] Compiled generation enabled (static cache, cache dir: {os.environ.get('TORCHINDUCTOR_CACHE_DIR')})")
+            return True
+        except Exception as e:
+            logger.warning(f"컴파일 생성 모드 준비 실패, eager로 실행합니다: {str(e)}")
+            self._restore()
+            return False
+
+    def _warmup(self, max_new_tokens):
+        """첫 요청이 컴파일 비용을 떠안지 않도록 로드 시점에 짧게 생성해 둔다."""
+        try:
+            input_ids = torch.tensor([[self.model.config.bos_token_id or 0]], device=self.model.device)
+            self.generate(input_ids=input_ids, attention_mask=torch.ones_like(input_ids), max_new_tokens=max_new_tokens, do_sample=False)
+        except Exception as e:
+            logger.warning(f"컴파일 워밍업 실패: {str(e)}")
+
+    def _restore(self):
+        if self._original_forward is not None:
+            self.model.forward = self._original_forward
+            self._original_forward = None
+        self.model.generation_config.cache_implementation = None
+        self.enabled = False
+
+    def generate(self, *args, **kwargs):
+        if not self.enabled:
+            return self.model.generate(*args, **kwargs)
+        try:
+            return self.model.generate(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"컴파일 생성 실패, eager로 전환합니다: {str(e)}\n\n{traceback.format_exc()}")
+            self._restore()
+            return self.model.generate(*args, **kwargs)
@@ -0,0 +1,214 @@
+# model_handlers/generation_control.py
+
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import torch
+from transformers import StoppingCriteria
+
+logger = logging.getLogger(__name__)
+
+# 중단 사유
+STOP_CANCELLED = "cancelled"
+STOP_DEADLINE = "deadline"
+STOP_BUDGET = "budget"
+
+class GenerationControl:
+    """
+    요청 하나의 생성 제어 상태.
+    - cancel(): 중지 버튼 등 다른 스레드에서 호출하면 다음 토큰 단계에서 생성이 멈춘다.
+    - deadline: time.monotonic() 기준 마감 시각 (None이면 제한 없음)
+    - max_new_tokens: 세션 토큰 예산에서 남은 토큰 수 (None이면 제한 없음)
+    토큰 단계마다 호출되므로 요청 지표(프롬프트 토큰 수, 첫 토큰 시각, 대기/로드 시간)도 함께 기록한다.
+    """
+    def __init__(self, session_id=None, timeout=None, max_new_tokens=None):
+        self.session_id = session_id
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + timeout if timeout else None
+        self.max_new_tokens = max_new_tokens
+        self.generated_tokens = 0
+        self.prompt_tokens = None
+        self.first_token_at = None
+        self.finished_at = None
+        self.queue_wait = 0.0
+        self.model_load_time = None
+        self.cache_hit = None
+        self.stop_reason = None
+        self.error = None  # 생성이 실패했을 때의 오류 메시지 (요청 지표의 status="error")
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def remaining_time(self):
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def fail(self, message):
+        """실패로 기록하고 사용자에게 보여줄 메시지를 그대로 반환"""
+        self.error = message
+        return message
+
+    def mark_first_token(self, prompt_tokens=None):
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+            if prompt_tokens is not None:
+                self.prompt_tokens = prompt_tokens
+
+    def should_stop(self, generated_tokens=None):
+        """중단 여부를 검사하고 사유를 기록. generated_tokens가 주어지면 생성 토큰 수도 갱신한다."""
+        if generated_tokens is not None:
+            self.generated_tokens = generated_tokens
+        if self.stop_reason is None:
+            if self._cancelled.is_set():
+                self.stop_reason = STOP_CANCELLED
+            elif self.deadline is not None and time.monotonic() >= self.deadline:
+                self.stop_reason = STOP_DEADLINE
+            elif self.max_new_tokens is not None and self.generated_tokens >= self.max_new_tokens:
+                self.stop_reason = STOP_BUDGET
+        return self.stop_reason is not None
+
+    def stopping_criteria(self):
+        return ControlStoppingCriteria(self)
+
+    def llama_cpp_stopping_criteria(self):
+        """llama-cpp-python stopping_criteria용 콜러블 (input_ids, logits) -> bool"""
+        prompt_len = []
+        def criteria(input_ids, logits):
+            if not prompt_len:
+                prompt_len.append(len(input_ids))
+                self.mark_first_token(len(input_ids))
+            return self.should_stop(len(input_ids) - prompt_len[0] + 1)
+        return criteria
+
+class ControlStoppingCriteria(StoppingCriteria):
+    """GenerationControl을 매 토큰 단계마다 검사하는 StoppingCriteria. 중단 시 배치 전체를 멈춘다."""
+    def __init__(self, control):
+        super().__init__()
+        self.control = control
+        self.prompt_len = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if self.prompt_len is None:
+            # 첫 호출 시점에는 이미 토큰 1개가 생성되어 있다.
+            self.prompt_len = input_ids.shape[-1] - 1
+            self.control.mark_first_token(self.prompt_len)
+        stop = self.control.should_stop(input_ids.shape[-1] - self.prompt_len)
+        return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
+
+_current_control = contextvars.ContextVar("generation_control", default=None)
+
+def current_generation_control():
+    """현재 요청에 적용 중인 GenerationControl (없으면 None)"""
+    return _current_control.get()
+
+def generation_failed(message):
+    """핸들러가 예외 대신 오류 메시지를 반환할 때 사용. 현재 요청을 실패로 기록하고 메시지를 그대로 반환"""
+    control = _current_control.get()
+    if control is not None:
+        control.fail(message)
+    return message
+
+class GenerationControlRegistry:
+    """
+    세션별 진행 중인 생성 요청과 누적 토큰 사용량을 관리.
+    세션 토큰 예산(session_token_budget)이 0이면 예산 제한을 두지 않는다.
+    """
+    def __init__(self, session_token_budget=0, default_timeout=0):
+        self.session_token_budget = session_token_budget
+        self.default_timeout = default_timeout
+        self._active = {}
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    def remaining_budget(self, session_id):
+        if not self.session_token_budget:
+            return None
+        with self._lock:
+            return max(self.session_token_budget - self._usage.get(session_id, 0), 0)
+
+    def usage(self, session_id):
+        with self._lock:
+            return self._usage.get(session_id, 0)
+
+    def record_usage(self, session_id, tokens):
+        if not tokens:
+            return
+        with self._lock:
+            self._usage[session_id] = self._usage.get(session_id, 0) + tokens
+
+    def reset_usage(self, session_id=None):
+        with self._lock:
+            if session_id is None:
+                self._usage.clear()
+            else:
+                self._usage.pop(session_id, None)
+
+    def cancel(self, session_id):
+        """세션에서 진행 중인 생성을 중단. 중단할 요청이 있었으면 True"""
+        with self._lock:
+            control = self._active.get(session_id)
+        if control is None:
+            return False
+        control.cancel()
+        logger.info(f"[*] 생성 중단 요청: session={session_id}")
+        return True
+
+    @contextmanager
+    def track(self, session_id=None, timeout=None):
+        """
+        요청 하나의 GenerationControl을 만들어 현재 컨텍스트에 설정.
+        블록이 끝나면 생성된 토큰 수를 세션 사용량에 반영한다.
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        # 세션이 없는 요청은 다른 요청과 구분할 수 없으므로 이전 요청 중단과 예산 계산에서 제외 (마감 시간만 적용)
+        tracked = session_id is not None
+        control = GenerationControl(session_id, timeout=timeout, max_new_tokens=self.remaining_budget(session_id) if tracked else None)
+        previous = None
+        if tracked:
+            with self._lock:
+                previous = self._active.get(session_id)
+                self._active[session_id] = control
+        if previous is not None:
+            # 같은 세션의 이전 요청이 아직 실행 중이면 중단
+            previous.cancel()
+        token = _current_control.set(control)
+        try:
+            yield control
+        finally:
+            _current_control.reset(token)
+            control.finished_at = time.monotonic()
+            if tracked:
+                with self._lock:
+                    if self._active.get(session_id) is control:
+                        del self._active[session_id]
+                self.record_usage(session_id, control.generated_tokens)
+            if control.stop_reason is not None:
+                logger.info(f"[*] 생성 중단: session={session_id}, reason={control.stop_reason}, tokens={control.generated_tokens}")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_generation_registry():
+    """전역 인자(--generation-timeout, --session-token-budget)로 초기화된 레지스트리"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from src.common.default_load_options import default_generation_timeout, default_session_token_budget
+            _registry = GenerationControlRegistry(
+                session_token_budget=default_session_token_budget,
+                default_timeout=default_generation_timeout
+            )
+        return _registry
+
+def cancel_generation(session_id):
+    return get_generation_registry().cancel(session_id)
@@ -1,12 +1,17 @@
 # model_handlers/gguf_handler.py
 
+import time
 import logging
-from llama_cpp import Llama # gguf 모델을 로드하기 위한 라이브러리
+from llama_cpp import Llama, StoppingCriteriaList # gguf 모델을 로드하기 위한 라이브러리
 from llama_cpp.llama_tokenizer import LlamaHFTokenizer
 import os
+from src.model_handlers.speculative import get_speculative_config, load_gguf_draft, resolve_speculative, summarize_stats, new_speculative_stats
+from src.common.generation_profiles import resolve_profile, to_llama_cpp_kwargs
+from src.model_handlers.generation_control import current_generation_control, generation_failed
+from src.common.metrics import record_speculative
 
 class GGUFModelHandler:
-    def __init__(self, model_id, quantization_bit="qint8", local_model_path=None, model_type="gguf"):
+    def __init__(self, model_id, quantization_bit="qint8", local_model_path=None, model_type="gguf", speculative=None):
         """
         GGUF 모델 핸들러 초기화
         """
@@ -15,6 +20,10 @@ class GGUFModelHandler:
         self.model_type = model_type
         self.local_model_path = local_model_path or os.path.join("./models", model_type, self.make_local_dir_name(model_id, quantization_bit))
         self.llm = None
+        self.speculative_enabled = resolve_speculative(speculative, model_id)
+        self.draft_model = None
+        self.speculative_stats = new_speculative_stats()
+        self.last_speculative_stats = None
         self.load_model()
     
     def make_local_dir_name(self, model_id, quantization_bit):
@@ -29,10 +38,18 @@ class GGUFModelHandler:
         """
         logging.info(f"GGUF 모델 로드 시작: {self.local_model_path}")
         try:
+            # 컨텍스트 크기/스레드 수는 생성 프로필에서 결정 (모델별 설정 가능)
+            profile = resolve_profile(self.model_id, "gguf")
+            llama_kwargs = {"n_ctx": profile["n_ctx"], "n_threads": profile["n_threads"]}
+            if self.speculative_enabled:
+                # 드래프트 GGUF가 설정되어 있으면 드래프트 모델, 아니면 프롬프트 조회 디코딩
+                self.draft_model = load_gguf_draft(self.model_id, get_speculative_config(self.model_id), llama_kwargs)
+                self.speculative_stats["mode"] = self.draft_model.mode
+                logging.info(f"GGUF 추측 디코딩 사용: {self.draft_model.mode}")
             self.llm = Llama(
                 model_path=self.local_model_path,
-                n_ctx=2048,
-                n_threads=4,
+                draft_model=self.draft_model,
+                **llama_kwargs,
                 # 필요에 따라 추가 매개변수 설정
             )
             logging.info("GGUF 모델 로드 성공")
@@ -40,18 +57,50 @@ class GGUFModelHandler:
             logging.error(f"GGUF 모델 로드 실패: {str(e)}")
             raise e
     
-    def generate_answer(self, history):
+    def generate_answer(self, history, generation_overrides=None):
         """
         사용자 히스토리를 기반으로 답변 생성
         """
         prompt = self.history_to_prompt(history)
+        profile = resolve_profile(self.model_id, "gguf", generation_overrides)
         try:
-            response = self.llm(prompt, max_tokens=128)
+            if self.draft_model is not None:
+                self.draft_model.reset_counts()
+            llama_kwargs = to_llama_cpp_kwargs(profile)
+            control = current_generation_control()
+            if control is not None:
+                # 중지 버튼/마감 시각/토큰 예산을 토큰마다 검사
+                llama_kwargs["stopping_criteria"] = StoppingCriteriaList([control.llama_cpp_stopping_criteria()])
+            start = time.perf_counter()
+            response = self.llm(prompt, **llama_kwargs)
+            if control is not None:
+                control.prompt_tokens = response["usage"]["prompt_tokens"]
+                control.generated_tokens = response["usage"]["completion_tokens"]
+            if self.draft_model is not None:
+                self._record_speculative_stats(response, time.perf_counter() - start)
             return response
         except Exception as e:
             logging.error(f"GGUF 모델 추론 오류: {str(e)}")
-            return f"오류 발생: {str(e)}"
+            return generation_failed(f"오류 발생: {str(e)}")
     
+    def _record_speculative_stats(self, response, elapsed):
+        """드래프트 호출 수로 수락된 토큰 수를 추정하여 누적 통계에 반영"""
+        new_tokens = response["usage"]["completion_tokens"]
+        last = {
+            "mode": self.draft_model.mode,
+            "generations": 1,
+            "new_tokens": new_tokens,
+            "verify_steps": self.draft_model.calls,
+            "proposed_tokens": self.draft_model.proposed,
+            "accepted_tokens": max(new_tokens - self.draft_model.calls, 0),
+            "elapsed_sec": elapsed,
+        }
+        for key in ("generations", "new_tokens", "verify_steps", "proposed_tokens", "accepted_tokens", "elapsed_sec"):
+            self.speculative_stats[key] += last[key]
+        self.last_speculative_stats = summarize_stats(last)
+        record_speculative(self.model_id, last)
+        logging.info(f"GGUF 추측 디코딩 통계: {self.last_speculative_stats}")
+
     def history_to_prompt(self, history):
         """
         대화 히스토리를 프롬프트로 변환
@@ -1,20 +1,33 @@
 import os
-import torch
 import logging
 import traceback
 from transformers import AutoTokenizer, AutoModelForCausalLM, QuantoConfig
 
 from optimum.quanto import QuantizedModelForCausalLM
 from src.common.utils import make_local_dir_name
+from src.model_handlers.load_options import resolve_load_options, model_load_kwargs, apply_cpu_quantization
+from src.model_handlers.compiled_generation import CompiledGenerator, resolve_compile_generation
+from src.model_handlers.speculative import SpeculativeDecoder, resolve_speculative
+from src.model_handlers.chat_template_cache import ChatTemplateCache
+from src.model_handlers.stopping_criteria import request_stopping_criteria
+from src.common.generation_profiles import resolve_profile, to_hf_generate_kwargs, truncate_at_stop
+from src.model_handlers.generation_control import generation_failed
 
 logger = logging.getLogger(__name__)
 
 class GLM4HfHandler:
-    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu'):
+    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu', cpu_quantization=None, attn_implementation=None, compile_generation=None, speculative=None):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.tokenizer = None
+        self.template_cache = None
         self.model = None
         self.device = device
+        self.cpu_quantization, self.attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
+        self.compile_generation = resolve_compile_generation(compile_generation)
+        self.speculative_enabled = resolve_speculative(speculative, model_id)
+        self.generator = None
+        self.speculative = None
         self.load_model()
 
     def load_model(self):
@@ -23,6 +36,7 @@ class GLM4HfHandler:
             self.tokenizer = AutoTokenizer.from_pretrained(
                 self.model_dir
             )
+            self.template_cache = ChatTemplateCache(self.tokenizer)
             logger.info(f"[*] Loading model from {self.model_dir}")
             if "float8" in self.model_dir or "int8" in self.model_dir or "int4" in self.model_dir:
                 self.model=QuantizedModelForCausalLM.from_pretrained(
@@ -31,39 +45,40 @@ class GLM4HfHandler:
             else:
                 self.model = AutoModelForCausalLM.from_pretrained(
                     self.model_dir,
-                    torch_dtype=torch.bfloat16,
+                    **model_load_kwargs(self.device, self.cpu_quantization, self.attn_implementation),
                 ).to(self.device)
+                self.model = apply_cpu_quantization(self.model, self.cpu_quantization, self.device)
+            self.speculative = SpeculativeDecoder(self.model_id, self.model, self.device, enabled=self.speculative_enabled)
+            # 보조 생성은 정적 캐시와 함께 쓸 수 없으므로 추측 디코딩이 켜져 있으면 컴파일 모드를 사용하지 않는다.
+            self.generator = CompiledGenerator(self.model, enabled=self.compile_generation and not self.speculative.enabled)
             logger.info(f"[*] Model loaded successfully: {self.model_dir}")
         except Exception as e:
             logger.error(f"Failed to load GLM4 Model: {str(e)}\n\n{traceback.format_exc()}")
             raise
-    def generate_answer(self, history):
+    def generate_answer(self, history, generation_overrides=None):
         try:
             # 메시지 처리
             prompt_messages = [{"role": msg['role'], "content": msg['content']} for msg in history]
             logger.info(f"[*] Prompt messages for GLM: {prompt_messages}")
             
-            inputs = self.tokenizer.apply_chat_template(
-                conversation=prompt_messages,
-                add_generation_prompt=True, 
-                tokenize=True, 
-                return_tensors="pt",
-                return_dict=True
-            ).to(self.model.device)
+            inputs = self.template_cache.encode(prompt_messages).to(self.model.device)
             logger.info("[*] GLM input template applied successfully")
                 
             input_len = inputs['input_ids'].shape[1]
                 
-            # 생성 설정
+            # 생성 설정 (생성 프로필)
+            profile = resolve_profile(self.model_id, "glm4-hf", generation_overrides)
             generation_config = {
                 "input_ids": inputs['input_ids'],
                 "attention_mask": inputs['attention_mask'],
-                "max_new_tokens": 128,
-                "do_sample": False,
+                **to_hf_generate_kwargs(profile),
             }
+            stopping_criteria = request_stopping_criteria(self.tokenizer, profile["stop"])
+            if stopping_criteria is not None:
+                generation_config["stopping_criteria"] = stopping_criteria
                 
             # 텍스트 생성
-            outputs = self.model.generate(**generation_config)
+            outputs = self.speculative.generate(self.generator.generate, **generation_config)
             logger.info("[*] GLM model generated the response")
                 
             # 결과 처리
@@ -73,9 +88,9 @@ class GLM4HfHandler:
             )
             logger.info(f"[*] Generated text: {generated_text}")
                 
-            return generated_text.strip()
+            return truncate_at_stop(generated_text, profile["stop"]).strip()
             
         except Exception as e:
             error_msg = f"Error during GLM answer generation: {str(e)}\n\n{traceback.format_exc()}"
             logger.error(error_msg)
-            return error_msg
\ No newline at end of file
+            return generation_failed(error_msg)
\ No newline at end of file
@@ -4,29 +4,25 @@ import os
 import torch
 import logging
 import traceback
-from transformers import AutoTokenizer, AutoModelForCausalLM, StoppingCriteria, StoppingCriteriaList
+from transformers import AutoTokenizer, AutoModelForCausalLM, StoppingCriteriaList
 from PIL import Image
 from src.common.utils import make_local_dir_name
+from src.model_handlers.load_options import resolve_load_options, model_load_kwargs, apply_cpu_quantization
+from src.model_handlers.stopping_criteria import build_stopping_criteria, request_stopping_criteria
+from src.common.generation_profiles import resolve_profile, to_hf_generate_kwargs, truncate_at_stop
+from src.model_handlers.generation_control import generation_failed
 
 logger = logging.getLogger(__name__)
 
-class StopOnTokens(StoppingCriteria):
-    def __init__(self, stop_token_ids):
-        super().__init__()
-        self.stop_token_ids = stop_token_ids
-
-    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
-        for stop_ids in self.stop_token_ids:
-            if input_ids[0][-1] in stop_ids:
-                return True
-        return False
-
 class GLM4VHandler:
-    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu'):
+    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu', cpu_quantization=None, attn_implementation=None):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.tokenizer = None
         self.model = None
+        self.stopping_criteria = None
         self.device = device
+        self.cpu_quantization, self.attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
         self.load_model()
 
     def load_model(self):
@@ -52,25 +48,28 @@ class GLM4VHandler:
             else:
                 self.model = AutoModelForCausalLM.from_pretrained(
                     self.model_dir,
-                    torch_dtype=torch.bfloat16,
+                    **model_load_kwargs(self.device, self.cpu_quantization, self.attn_implementation),
                     low_cpu_mem_usage=True,
                     trust_remote_code=True
                 ).to(self.device).eval()
+                self.model = apply_cpu_quantization(self.model, self.cpu_quantization, self.device)
             logger.info(f"[*] Model loaded successfully: {self.model_dir}")
         except Exception as e:
             logger.error(f"Failed to load GLM4V Model: {str(e)}\n\n{traceback.format_exc()}")
             raise
 
     def get_stopping_criteria(self):
-        """GLM 모델의 실제 stopping 토큰 ID들을 사용"""
-        stop_token_ids = [
-            [self.tokenizer.eos_token_id],  # EOS 토큰
-            [2],  # ChatGLM의 일반적인 종료 토큰
-            [self.tokenizer.pad_token_id] if self.tokenizer.pad_token_id is not None else [],  # PAD 토큰
-        ]
-        return StoppingCriteriaList([StopOnTokens(stop_token_ids)])
+        """GLM 모델의 실제 stopping 토큰 ID들을 사용 (토크나이저당 한 번만 계산)"""
+        if self.stopping_criteria is None:
+            stop_token_ids = [
+                self.tokenizer.eos_token_id,  # EOS 토큰
+                2,  # ChatGLM의 일반적인 종료 토큰
+                self.tokenizer.pad_token_id,  # PAD 토큰 (None이면 제외됨)
+            ]
+            self.stopping_criteria = build_stopping_criteria(self.tokenizer, stop_token_ids)
+        return self.stopping_criteria
 
-    def generate_answer(self, history, image_input=None):
+    def generate_answer(self, history, image_input=None, generation_overrides=None):
         try:
             # 이미지 처리가 필요한 경우 여기에 추가
             if image_input:
@@ -91,16 +90,15 @@ class GLM4VHandler:
             ).to(self.model.device)
             logger.info("[*] GLM input template applied successfully")
             
-            # 생성 설정
+            # 생성 설정 (생성 프로필)
+            profile = resolve_profile(self.model_id, "glm4v", generation_overrides)
             generation_config = {
-                "max_new_tokens": 1024,
-                "do_sample": True,
-                "temperature": 0.6,
-                "top_p": 0.8,
-                "repetition_penalty": 1.2,
+                **to_hf_generate_kwargs(profile),
                 "pad_token_id": self.tokenizer.pad_token_id,
                 "eos_token_id": self.tokenizer.eos_token_id,
-                "stopping_criteria": self.get_stopping_criteria()
+                "stopping_criteria": StoppingCriteriaList(
+                    list(self.get_stopping_criteria()) + list(request_stopping_criteria(self.tokenizer, profile["stop"]) or [])
+                )
             }
             
             # 텍스트 생성
@@ -117,9 +115,9 @@ class GLM4VHandler:
             )
             logger.info(f"[*] Generated text: {generated_text}")
             
-            return generated_text.strip()
+            return truncate_at_stop(generated_text, profile["stop"]).strip()
             
         except Exception as e:
             error_msg = f"Error during GLM answer generation: {str(e)}\n\n{traceback.format_exc()}"
             logger.error(error_msg)
-            return error_msg
\ No newline at end of file
+            return generation_failed(error_msg)
\ No newline at end of file
@@ -4,17 +4,23 @@ import torch
 import logging
 import traceback
 from transformers import AutoTokenizer, AutoProcessor, AutoModel
-from src.common.utils import make_local_dir_name
+from src.common.utils import get_terminators, make_local_dir_name
+from src.model_handlers.load_options import resolve_load_options, model_load_kwargs, apply_cpu_quantization
+from src.model_handlers.stopping_criteria import request_stopping_criteria
+from src.common.generation_profiles import resolve_profile, to_hf_generate_kwargs, truncate_at_stop
+from src.model_handlers.generation_control import generation_failed
 
 logger = logging.getLogger(__name__)
 
 class VisionModelHandler:
-    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu'):
+    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu', cpu_quantization=None, attn_implementation=None):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.tokenizer = None
         self.processor = None
         self.model = None
         self.device = device
+        self.cpu_quantization, self.attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
         self.load_model()
 
     def load_model(self):
@@ -38,15 +44,16 @@ class VisionModelHandler:
             else:
                 self.model = AutoModel.from_pretrained(
                     self.model_dir,
-                    torch_dtype=torch.bfloat16,
+                    **model_load_kwargs(self.device, self.cpu_quantization, self.attn_implementation),
                     trust_remote_code=True
                 ).to(self.device)
+                self.model = apply_cpu_quantization(self.model, self.cpu_quantization, self.device)
             logger.info(f"[*] Model loaded successfully: {self.model_dir}")
         except Exception as e:
             logger.error(f"Failed to load Vision Model: {str(e)}\n\n{traceback.format_exc()}")
             raise
 
-    def generate_answer(self, history, image_input=None):
+    def generate_answer(self, history, image_input=None, generation_overrides=None):
         try:
             prompt_messages = []
             for msg in history:
@@ -85,14 +92,16 @@ class VisionModelHandler:
             
             inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
             terminators = self.get_terminators()
+            profile = resolve_profile(self.model_id, "vision", generation_overrides)
+            gen_kwargs = to_hf_generate_kwargs(profile)
+            stopping_criteria = request_stopping_criteria(self.tokenizer, profile["stop"])
+            if stopping_criteria is not None:
+                gen_kwargs["stopping_criteria"] = stopping_criteria
             
             outputs = self.model.generate(
                 **inputs,
-                max_new_tokens=1024,
                 eos_token_id=terminators,
-                do_sample=True,
-                temperature=0.6,
-                top_p=0.9
+                **gen_kwargs
             )
             logger.info("[*] Model generated the response")
             
@@ -102,13 +111,10 @@ class VisionModelHandler:
             )
             logger.info(f"[*] Generated text: {generated_text}")
             
-            return generated_text.strip()
+            return truncate_at_stop(generated_text, profile["stop"]).strip()
         except Exception as e:
             logger.error(f"Error during answer generation: {str(e)}\n\n{traceback.format_exc()}")
-            return f"Error during answer generation: {str(e)}\n\n{traceback.format_exc()}"
+            return generation_failed(f"Error during answer generation: {str(e)}\n\n{traceback.format_exc()}")
 
     def get_terminators(self):
-        return [
-            self.tokenizer.convert_tokens_to_ids("<|end_of_text|>"),
-            self.tokenizer.convert_tokens_to_ids("<|eot_id|>")
-        ]
\ No newline at end of file
+        return get_terminators(self.tokenizer)
\ No newline at end of file
@@ -0,0 +1,73 @@
+# model_handlers/load_options.py
+
+import logging
+import torch
+
+logger = logging.getLogger(__name__)
+
+# 로드 시점 CPU 추론 최적화 옵션
+CPU_QUANTIZATION_MODES = ["none", "dynamic-int8", "torchao-int8-wo"]
+ATTN_IMPLEMENTATIONS = ["auto", "eager", "sdpa"]
+
+def resolve_load_options(cpu_quantization=None, attn_implementation=None):
+    """
+    모델별로 지정되지 않은(None) 옵션을 전역 기본값(src/common/args.py)으로 채워 반환
+    """
+    from src.common.default_load_options import default_cpu_quantization, default_attn_implementation
+
+    cpu_quantization = cpu_quantization or default_cpu_quantization
+    attn_implementation = attn_implementation or default_attn_implementation
+    if cpu_quantization not in CPU_QUANTIZATION_MODES:
+        raise ValueError(f"지원되지 않는 CPU 양자화 모드: {cpu_quantization}")
+    if attn_implementation not in ATTN_IMPLEMENTATIONS:
+        raise ValueError(f"지원되지 않는 어텐션 구현: {attn_implementation}")
+    return cpu_quantization, attn_implementation
+
+def describe_load_options(cpu_quantization="none", attn_implementation="auto", compile_generation=False, speculative=False):
+    """
+    캐시 키에 기록할 로드 옵션 문자열. 기본값(none/auto/컴파일·추측 디코딩 안 함)이면 None을 반환하여 기존 키와 호환된다.
+    """
+    parts = []
+    if cpu_quantization and cpu_quantization != "none":
+        parts.append(f"cpuq={cpu_quantization}")
+    if attn_implementation and attn_implementation != "auto":
+        parts.append(f"attn={attn_implementation}")
+    if compile_generation:
+        parts.append("compile")
+    if speculative:
+        parts.append("spec")
+    return ",".join(parts) or None
+
+def model_load_kwargs(device, cpu_quantization="none", attn_implementation="auto", torch_dtype=torch.bfloat16):
+    """
+    from_pretrained에 전달할 dtype/어텐션 인자를 구성.
+    동적 int8 양자화는 float32 Linear에만 적용되므로 CPU에서는 float32로 로드한다.
+    """
+    kwargs = {}
+    if cpu_quantization == "dynamic-int8" and device == "cpu":
+        kwargs["torch_dtype"] = torch.float32
+    elif torch_dtype is not None:
+        kwargs["torch_dtype"] = torch_dtype
+    if attn_implementation and attn_implementation != "auto":
+        kwargs["attn_implementation"] = attn_implementation
+    return kwargs
+
+def apply_cpu_quantization(model, cpu_quantization="none", device="cpu"):
+    """
+    로드된 모델의 Linear 레이어에 CPU용 int8 양자화를 적용.
+    - dynamic-int8: PyTorch 동적 양자화 (가중치 int8, 활성값은 실행 시 양자화)
+    - torchao-int8-wo: torchao 가중치 전용 int8 양자화
+    """
+    if not cpu_quantization or cpu_quantization == "none":
+        return model
+    if device != "cpu":
+        logger.warning(f"CPU 양자화 모드 '{cpu_quantization}'는 CPU에서만 적용됩니다. (현재 장치: {device})")
+        return model
+
+    logger.info(f"[*] Applying CPU quantization: {cpu_quantization}")
+    if cpu_quantization == "dynamic-int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif cpu_quantization == "torchao-int8-wo":
+        from torchao.quantization import quantize_, int8_weight_only
+        quantize_(model, int8_weight_only())
+    return model.eval()
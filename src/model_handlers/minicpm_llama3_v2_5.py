@@ -1,20 +1,24 @@
 # model_handlers/minicpm_llama3_v2_5.py
 import os
-import torch
 from transformers import AutoTokenizer, AutoModel, ProcessorMixin
 import traceback
 import logging
 from PIL import Image
 from src.common.utils import make_local_dir_name
+from src.model_handlers.load_options import resolve_load_options, model_load_kwargs, apply_cpu_quantization
+from src.common.generation_profiles import resolve_profile, to_hf_generate_kwargs, truncate_at_stop
+from src.model_handlers.generation_control import current_generation_control, generation_failed
 
 logger = logging.getLogger(__name__)
 
 class MiniCPMLlama3V25Handler:
-    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu'):
+    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu', cpu_quantization=None, attn_implementation=None):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.tokenizer = None
         self.model = None
         self.device = device
+        self.cpu_quantization, self.attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
         self.load_model()
 
     def load_model(self):
@@ -25,15 +29,16 @@ class MiniCPMLlama3V25Handler:
             logger.info(f"[*] Loading model from {self.model_dir}")
             self.model = AutoModel.from_pretrained(
                 self.model_dir,
-                torch_dtype=torch.bfloat16,
+                **model_load_kwargs(self.device, self.cpu_quantization, self.attn_implementation),
                 trust_remote_code=True
             ).to(self.device).eval()
+            self.model = apply_cpu_quantization(self.model, self.cpu_quantization, self.device)
             logger.info(f"[*] Model loaded successfully: {self.model_dir}")
         except Exception as e:
             logger.error(f"Failed to load MiniCPM-Llama3-V-2_5 model: {str(e)}\n\n{traceback.format_exc()}")
             raise
 
-    def generate_answer(self, history, image_input=None):
+    def generate_answer(self, history, image_input=None, generation_overrides=None):
         try:
             # 이미지 처리
             if image_input is not None:
@@ -47,7 +52,7 @@ class MiniCPMLlama3V25Handler:
                     logger.info("[*] Image processed successfully")
                 except Exception as img_error:
                     logger.error(f"Error processing image: {str(img_error)}")
-                    return f"Error processing image: {str(img_error)}"
+                    return generation_failed(f"Error processing image: {str(img_error)}")
             else:
                 logger.info("[*] No image provided")
                 return "이미지가 필요합니다. 이미지를 업로드해주세요."
@@ -64,12 +69,26 @@ class MiniCPMLlama3V25Handler:
             logger.info("[*] Generating response...")
             logger.info(f"Messages: {messages}")
             
+            # 생성 프로필 (MiniCPM chat은 sampling 인자로 샘플링 여부를 받는다)
+            profile = resolve_profile(self.model_id, "minicpm", generation_overrides)
+            gen_kwargs = to_hf_generate_kwargs(profile)
+            gen_kwargs.pop("do_sample", None)
+
+            # MiniCPM chat은 정해진 생성 인자만 generate로 넘기므로 stopping_criteria를 전달할 수 없다.
+            # 시작 전에 중단/마감/예산을 검사하고, 세션 토큰 예산은 max_new_tokens 상한으로 적용한다.
+            control = current_generation_control()
+            if control is not None:
+                if control.should_stop(0):
+                    return ""
+                if control.max_new_tokens is not None:
+                    gen_kwargs.pop("max_length", None)
+                    gen_kwargs["max_new_tokens"] = min(gen_kwargs.get("max_new_tokens") or control.max_new_tokens, control.max_new_tokens)
             outputs = self.model.chat(
                 image,  # PIL Image 직접 전달
                 messages,
                 tokenizer=self.tokenizer,
-                sampling=True,
-                temperature=0.7
+                sampling=profile["do_sample"] is not False,
+                **gen_kwargs
             )
             
             # 결과 텍스트 생성
@@ -80,10 +99,11 @@ class MiniCPMLlama3V25Handler:
             except TypeError:
                 generated_text = outputs
                 
+            generated_text = truncate_at_stop(generated_text, profile["stop"])
             logger.info(f"[*] Generated text: {generated_text}")
             return generated_text
             
         except Exception as e:
             error_msg = f"Error during answer generation: {str(e)}\n\n{traceback.format_exc()}"
             logger.error(error_msg)
-            return error_msg
\ No newline at end of file
+            return generation_failed(error_msg)
\ No newline at end of file
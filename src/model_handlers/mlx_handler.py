@@ -2,6 +2,7 @@ import logging
 import traceback
 import os
 from src.common.utils import make_local_dir_name
+from src.common.generation_profiles import resolve_profile, truncate_at_stop
 
 from mlx_lm import load, generate
 
@@ -9,6 +10,7 @@ logger = logging.getLogger(__name__)
 
 class MlxModelHandler:
     def __init__(self, model_id, local_model_path=None, model_type="mlx"):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.tokenizer = None
         self.model = None
@@ -17,12 +19,13 @@ class MlxModelHandler:
     def load_model(self):
         self.model, self.tokenizer = load(self.model_dir, tokenizer_config={"eos_token": "<|im_end|>"})
     
-    def generate_answer(self, history):
+    def generate_answer(self, history, generation_overrides=None):
         text = self.tokenizer.apply_chat_template(
             conversation=history,
             tokenize=False,
             add_generation_prompt=True
         )
-        response = generate(self.model, self.tokenizer, prompt=text, verbose=True, max_tokens=1024)
+        profile = resolve_profile(self.model_id, "mlx", generation_overrides)
+        response = generate(self.model, self.tokenizer, prompt=text, verbose=True, max_tokens=profile["max_new_tokens"])
         
-        return response
\ No newline at end of file
+        return truncate_at_stop(response, profile["stop"])
\ No newline at end of file
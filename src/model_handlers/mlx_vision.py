@@ -2,6 +2,7 @@ import logging
 import traceback
 import os
 from src.common.utils import make_local_dir_name
+from src.common.generation_profiles import resolve_profile, truncate_at_stop
 
 from mlx_vlm import load, generate
 from mlx_vlm.prompt_utils import apply_chat_template
@@ -11,6 +12,7 @@ logger = logging.getLogger(__name__)
 
 class MlxVisionHandler:
     def __init__(self, model_id, local_model_path=None, model_type="mlx"):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.processor = None
         self.config = None
@@ -21,10 +23,11 @@ class MlxVisionHandler:
         self.model, self.processor = load(self.model_dir)
         self.config = load_config(self.model_dir)
         
-    def generate_answer(self, history, *image_inputs):
+    def generate_answer(self, history, *image_inputs, generation_overrides=None):
         # 1) prompt 문자열 생성 대신 history 그대로 사용
         # prompt = self.history_to_prompt(history)  # 주석 처리 혹은 삭제
         images = image_inputs if image_inputs else []
+        profile = resolve_profile(self.model_id, "mlx", generation_overrides)
         if image_inputs:
             # 2) 'prompt' 대신 'conversation=history' 형태로 전달
             formatted_prompt = apply_chat_template(
@@ -33,8 +36,8 @@ class MlxVisionHandler:
                 prompt=history,   # <-- history 자체를 전달
                 num_images=len(images)
             )
-            output = generate(self.model, self.processor, formatted_prompt, images, verbose=False)
-            return output
+            output = generate(self.model, self.processor, formatted_prompt, images, verbose=False, max_tokens=profile["max_new_tokens"])
+            return truncate_at_stop(output, profile["stop"])
         else:
             formatted_prompt = apply_chat_template(
                 processor=self.processor,
@@ -42,5 +45,5 @@ class MlxVisionHandler:
                 prompt=history,   # <-- history 자체를 전달
                 num_images=0
             )
-            output = generate(self.model, self.processor, formatted_prompt, images=None, verbose=False)
-            return output
\ No newline at end of file
+            output = generate(self.model, self.processor, formatted_prompt, images=None, verbose=False, max_tokens=profile["max_new_tokens"])
+            return truncate_at_stop(output, profile["stop"])
\ No newline at end of file
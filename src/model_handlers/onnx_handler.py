@@ -0,0 +1,123 @@
+import os
+import logging
+import traceback
+from transformers import AutoTokenizer
+from src.common.utils import get_terminators, make_local_dir_name
+from src.model_handlers.chat_template_cache import ChatTemplateCache
+from src.model_handlers.stopping_criteria import request_stopping_criteria
+from src.common.generation_profiles import resolve_profile, to_hf_generate_kwargs, truncate_at_stop
+from src.model_handlers.generation_control import generation_failed
+
+logger = logging.getLogger(__name__)
+
+ONNX_PROVIDERS = ["CPUExecutionProvider", "OpenVINOExecutionProvider"]
+
+class OnnxModelHandler:
+    """
+    ONNX Runtime(선택적으로 OpenVINO EP)로 디코더 모델을 실행하는 핸들러.
+    ./models/onnx/<모델> 에 내보낸 ONNX 파일이 없으면 로컬 transformers 모델(없으면 허브)에서 내보낸 뒤 로드한다.
+    """
+    def __init__(self, model_id, local_model_path=None, model_type="onnx", device="cpu", provider=None):
+        self.model_id = model_id
+        self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
+        self.tokenizer = None
+        self.template_cache = None
+        self.model = None
+        self.device = device
+        self.provider = self._resolve_provider(provider)
+        self.load_model()
+
+    @staticmethod
+    def _resolve_provider(provider=None):
+        if provider is None:
+            from src.common.default_load_options import default_onnx_provider
+            provider = default_onnx_provider
+        if provider not in ONNX_PROVIDERS:
+            raise ValueError(f"지원되지 않는 ONNX 실행 공급자: {provider}")
+        import onnxruntime
+        if provider not in onnxruntime.get_available_providers():
+            logger.warning(f"{provider}를 사용할 수 없어 CPUExecutionProvider로 실행합니다. (onnxruntime-openvino 설치 필요)")
+            provider = "CPUExecutionProvider"
+        return provider
+
+    def _onnx_file_name(self):
+        """양자화된 모델이 있으면 우선 사용"""
+        from model_converter import ONNX_MODEL_NAME, ONNX_QUANTIZED_MODEL_NAME
+        if os.path.isfile(os.path.join(self.model_dir, ONNX_QUANTIZED_MODEL_NAME)):
+            return ONNX_QUANTIZED_MODEL_NAME
+        return ONNX_MODEL_NAME
+
+    def _export_if_missing(self):
+        if os.path.isdir(self.model_dir) and any(f.endswith(".onnx") for f in os.listdir(self.model_dir)):
+            return
+        from model_converter import export_model_to_onnx
+        source = os.path.join("./models", "transformers", make_local_dir_name(self.model_id))
+        if not os.path.isdir(source):
+            source = self.model_id
+        logger.info(f"[*] ONNX 모델이 없어 내보내기를 진행합니다: {source} → {self.model_dir}")
+        report = export_model_to_onnx(source, self.model_dir)
+        if not report["success"]:
+            raise RuntimeError(f"ONNX 내보내기 실패: {report['error']}")
+
+    def load_model(self):
+        try:
+            from optimum.onnxruntime import ORTModelForCausalLM
+
+            self._export_if_missing()
+            logger.info(f"[*] Loading tokenizer from {self.model_dir}")
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir, trust_remote_code=True)
+            self.template_cache = ChatTemplateCache(self.tokenizer)
+            file_name = self._onnx_file_name()
+            logger.info(f"[*] Loading ONNX model from {self.model_dir}/{file_name} ({self.provider})")
+            self.model = ORTModelForCausalLM.from_pretrained(
+                self.model_dir,
+                file_name=file_name,
+                provider=self.provider,
+                use_cache=True,
+                use_io_binding=False,
+            )
+            logger.info(f"[*] Model loaded successfully: {self.model_dir}")
+        except Exception as e:
+            logger.error(f"Failed to load ONNX Model: {str(e)}\n\n{traceback.format_exc()}")
+            raise
+
+    def generate_answer(self, history, generation_overrides=None):
+        prompt_messages = [{"role": msg['role'], "content": msg['content']} for msg in history]
+        logger.info(f"[*] Prompt messages for ONNX models: {prompt_messages}")
+
+        terminators = get_terminators(self.tokenizer)
+        profile = resolve_profile(self.model_id, "onnx", generation_overrides)
+        gen_kwargs = to_hf_generate_kwargs(profile)
+        stopping_criteria = request_stopping_criteria(self.tokenizer, profile["stop"])
+        if stopping_criteria is not None:
+            gen_kwargs["stopping_criteria"] = stopping_criteria
+        try:
+            input_ids = self.template_cache.encode(prompt_messages).input_ids
+            logger.info("[*] 입력 템플릿 적용 완료")
+        except Exception as e:
+            logger.error(f"입력 템플릿 적용 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
+            return generation_failed(f"입력 템플릿 적용 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
+
+        try:
+            outputs = self.model.generate(
+                input_ids,
+                attention_mask=input_ids.new_ones(input_ids.shape),
+                eos_token_id=terminators,
+                **gen_kwargs
+            )
+            logger.info("[*] 모델 생성 완료")
+        except Exception as e:
+            logger.error(f"모델 생성 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
+            return generation_failed(f"모델 생성 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
+
+        try:
+            generated_text = self.tokenizer.decode(
+                outputs[0][input_ids.shape[-1]:],
+                skip_special_tokens=True
+            )
+            logger.info(f"[*] 생성된 텍스트: {generated_text}")
+        except Exception as e:
+            logger.error(f"출력 디코딩 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
+            return generation_failed(f"출력 디코딩 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
+
+        return truncate_at_stop(generated_text, profile["stop"]).strip()
@@ -1,63 +1,80 @@
 # common.py 상단에 추가
 import os
-import torch
 import logging
 import traceback
 from transformers import AutoTokenizer, AutoModelForCausalLM
 from src.common.utils import get_terminators, make_local_dir_name
+from src.model_handlers.load_options import resolve_load_options, model_load_kwargs, apply_cpu_quantization
+from src.model_handlers.compiled_generation import CompiledGenerator, resolve_compile_generation
+from src.model_handlers.speculative import SpeculativeDecoder, resolve_speculative
+from src.model_handlers.chat_template_cache import ChatTemplateCache
+from src.model_handlers.stopping_criteria import request_stopping_criteria
+from src.common.generation_profiles import resolve_profile, to_hf_generate_kwargs, truncate_at_stop
+from src.model_handlers.generation_control import generation_failed
 
 logger = logging.getLogger(__name__)
 
 class OtherModelHandler:
-    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu'):
+    def __init__(self, model_id, local_model_path=None, model_type="transformers", device='cpu', cpu_quantization=None, attn_implementation=None, compile_generation=None, speculative=None):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.tokenizer = None
+        self.template_cache = None
         self.model = None
         self.device = device
+        self.cpu_quantization, self.attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
+        self.compile_generation = resolve_compile_generation(compile_generation)
+        self.speculative_enabled = resolve_speculative(speculative, model_id)
+        self.generator = None
+        self.speculative = None
         self.load_model()
     def load_model(self):
         try:
             logger.info(f"[*] Loading tokenizer from {self.model_dir}")
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir, trust_remote_code=True)
+            self.template_cache = ChatTemplateCache(self.tokenizer)
             logger.info(f"[*] Loading model from {self.model_dir}")
             self.model = AutoModelForCausalLM.from_pretrained(
                 self.model_dir,
-                torch_dtype=torch.bfloat16,
+                **model_load_kwargs(self.device, self.cpu_quantization, self.attn_implementation),
                 trust_remote_code=True
             ).to(self.device)
+            self.model = apply_cpu_quantization(self.model, self.cpu_quantization, self.device)
+            self.speculative = SpeculativeDecoder(self.model_id, self.model, self.device, enabled=self.speculative_enabled)
+            # 보조 생성은 정적 캐시와 함께 쓸 수 없으므로 추측 디코딩이 켜져 있으면 컴파일 모드를 사용하지 않는다.
+            self.generator = CompiledGenerator(self.model, enabled=self.compile_generation and not self.speculative.enabled)
             logger.info(f"[*] Model loaded successfully: {self.model_dir}")
         except Exception as e:
             logger.error(f"Failed to load GLM4 Model: {str(e)}\n\n{traceback.format_exc()}")
             raise
-    def generate_answer(self, history):
+    def generate_answer(self, history, generation_overrides=None):
         prompt_messages = [{"role": msg['role'], "content": msg['content']} for msg in history]
         logger.info(f"[*] Prompt messages for other models: {prompt_messages}")
         
         terminators = get_terminators(self.tokenizer)
+        profile = resolve_profile(self.model_id, "other", generation_overrides)
+        gen_kwargs = to_hf_generate_kwargs(profile)
+        stopping_criteria = request_stopping_criteria(self.tokenizer, profile["stop"])
+        if stopping_criteria is not None:
+            gen_kwargs["stopping_criteria"] = stopping_criteria
         try:
-            input_ids = self.tokenizer.apply_chat_template(
-                prompt_messages,
-                add_generation_prompt=True,
-                return_tensors="pt"
-            ).to(self.model.device)
+            input_ids = self.template_cache.encode(prompt_messages).input_ids.to(self.model.device)
             logger.info("[*] 입력 템플릿 적용 완료")
         except Exception as e:
             logger.error(f"입력 템플릿 적용 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
-            return f"입력 템플릿 적용 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+            return generation_failed(f"입력 템플릿 적용 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
 
         try:
-            outputs = self.model.generate(
+            outputs = self.speculative.generate(
+                self.generator.generate,
                 input_ids,
-                max_new_tokens=1024,
                 eos_token_id=terminators,
-                do_sample=True,
-                temperature=0.6,
-                top_p=0.9
+                **gen_kwargs
             )
             logger.info("[*] 모델 생성 완료")
         except Exception as e:
             logger.error(f"모델 생성 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
-            return f"모델 생성 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+            return generation_failed(f"모델 생성 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
 
         try:
             generated_text = self.tokenizer.decode(
@@ -67,6 +84,6 @@ class OtherModelHandler:
             logger.info(f"[*] 생성된 텍스트: {generated_text}")
         except Exception as e:
             logger.error(f"출력 디코딩 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
-            return f"출력 디코딩 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+            return generation_failed(f"출력 디코딩 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
 
-        return generated_text.strip()
\ No newline at end of file
+        return truncate_at_stop(generated_text, profile["stop"]).strip()
\ No newline at end of file
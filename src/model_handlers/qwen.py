@@ -1,25 +1,39 @@
 import os
-import torch
 import logging
 import traceback
 from transformers import AutoTokenizer, AutoModelForCausalLM
 
 from optimum.quanto import QuantizedModelForCausalLM
 from src.common.utils import make_local_dir_name
+from src.model_handlers.load_options import resolve_load_options, model_load_kwargs, apply_cpu_quantization
+from src.model_handlers.compiled_generation import CompiledGenerator, resolve_compile_generation
+from src.model_handlers.speculative import SpeculativeDecoder, resolve_speculative
+from src.model_handlers.chat_template_cache import ChatTemplateCache
+from src.model_handlers.stopping_criteria import request_stopping_criteria
+from src.common.generation_profiles import resolve_profile, to_hf_generate_kwargs, truncate_at_stop
+from src.model_handlers.generation_control import generation_failed
 
 logger = logging.getLogger(__name__)
 
 class QwenHandler:
-    def __init__(self, model_id, local_model_path=None, model_type="transformers", device="cpu"):
+    def __init__(self, model_id, local_model_path=None, model_type="transformers", device="cpu", cpu_quantization=None, attn_implementation=None, compile_generation=None, speculative=None):
+        self.model_id = model_id
         self.model_dir = local_model_path or os.path.join("./models", model_type, make_local_dir_name(model_id))
         self.tokenizer = None
+        self.template_cache = None
         self.model = None
         self.device = device
+        self.cpu_quantization, self.attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
+        self.compile_generation = resolve_compile_generation(compile_generation)
+        self.speculative_enabled = resolve_speculative(speculative, model_id)
+        self.generator = None
+        self.speculative = None
         self.load_model()
     def load_model(self):
         try:
             logger.info(f"[*] Loading tokenizer from {self.model_dir}")
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir, trust_remote_code=True)
+            self.template_cache = ChatTemplateCache(self.tokenizer)
             logger.info(f"[*] Loading model from {self.model_dir}")
             if "float8" in self.model_dir or "int8" in self.model_dir or "int4" in self.model_dir:
                 self.model=QuantizedModelForCausalLM.from_pretrained(
@@ -28,37 +42,42 @@ class QwenHandler:
             else:
                 self.model = AutoModelForCausalLM.from_pretrained(
                     self.model_dir,
-                    torch_dtype=torch.bfloat16,
+                    **model_load_kwargs(self.device, self.cpu_quantization, self.attn_implementation),
                 ).to(self.device)
+                self.model = apply_cpu_quantization(self.model, self.cpu_quantization, self.device)
+            self.speculative = SpeculativeDecoder(self.model_id, self.model, self.device, enabled=self.speculative_enabled)
+            # 보조 생성은 정적 캐시와 함께 쓸 수 없으므로 추측 디코딩이 켜져 있으면 컴파일 모드를 사용하지 않는다.
+            self.generator = CompiledGenerator(self.model, enabled=self.compile_generation and not self.speculative.enabled)
             logger.info(f"[*] Model loaded successfully: {self.model_dir}")
         except Exception as e:
             logger.error(f"Failed to load Qwen Model: {str(e)}\n\n{traceback.format_exc()}")
             raise
-    def generate_answer(self, history):
+    def generate_answer(self, history, generation_overrides=None):
         prompt_messages = [{"role": msg['role'], "content": msg['content']} for msg in history]
         logger.info(f"[*] Prompt messages for other models: {prompt_messages}")
+        profile = resolve_profile(self.model_id, "qwen", generation_overrides)
+        gen_kwargs = to_hf_generate_kwargs(profile)
+        stopping_criteria = request_stopping_criteria(self.tokenizer, profile["stop"])
+        if stopping_criteria is not None:
+            gen_kwargs["stopping_criteria"] = stopping_criteria
         
         try:
-            text = self.tokenizer.apply_chat_template(
-                prompt_messages,
-                add_generation_prompt=True,
-                tokenize=False
-            )
-            model_inputs = self.tokenizer([text], return_tensors="pt").to(self.model.device)
+            model_inputs = self.template_cache.encode(prompt_messages).to(self.model.device)
             logger.info("[*] 입력 템플릿 적용 완료")
         except Exception as e:
             logger.error(f"입력 템플릿 적용 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
-            return f"입력 템플릿 적용 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+            return generation_failed(f"입력 템플릿 적용 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
 
         try:
-            outputs = self.model.generate(
+            outputs = self.speculative.generate(
+                self.generator.generate,
                 **model_inputs,
-                max_new_tokens=512,
+                **gen_kwargs
             )
             logger.info("[*] 모델 생성 완료")
         except Exception as e:
             logger.error(f"모델 생성 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
-            return f"모델 생성 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+            return generation_failed(f"모델 생성 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
 
         try:
             outputs=[
@@ -71,6 +90,6 @@ class QwenHandler:
             logger.info(f"[*] 생성된 텍스트: {generated_text}")
         except Exception as e:
             logger.error(f"출력 디코딩 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
-            return f"출력 디코딩 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+            return generation_failed(f"출력 디코딩 중 오류 발생: {str(e)}\n\n{traceback.format_exc()}")
 
-        return generated_text.strip()
\ No newline at end of file
+        return truncate_at_stop(generated_text, profile["stop"]).strip()
\ No newline at end of file
@@ -0,0 +1,265 @@
+# model_handlers/speculative.py
+
+import os
+import json
+import time
+import logging
+import traceback
+
+from src.common.utils import make_local_dir_name
+from src.common.metrics import record_speculative
+
+logger = logging.getLogger(__name__)
+
+# 대상 모델별 추측 디코딩 설정
+# - draft_model: 같은 토크나이저를 쓰는 작은 모델 (transformers assistant_model / llama.cpp 드래프트)
+# - draft_gguf: GGUF 대상 모델용 드래프트 GGUF 파일 경로 (./models/gguf 기준 상대 경로 가능)
+# - num_assistant_tokens: 한 번에 제안할 드래프트 토큰 수
+# - prompt_lookup_num_tokens: 드래프트 모델이 없을 때 프롬프트 조회 디코딩에 사용할 n-gram 길이
+# - enabled: 이 모델만 추측 디코딩을 켜거나 끔 (없으면 전역 --speculative-decoding 값을 따름)
+DEFAULT_SPECULATIVE_CONFIG = {
+    "Qwen/Qwen2.5-7B-Instruct": {"draft_model": "Qwen/Qwen2.5-0.5B-Instruct", "num_assistant_tokens": 5},
+    "Qwen/Qwen2.5-3B-Instruct": {"draft_model": "Qwen/Qwen2.5-0.5B-Instruct", "num_assistant_tokens": 5},
+    "Qwen/Qwen2.5-14B-Instruct": {"draft_model": "Qwen/Qwen2.5-1.5B-Instruct", "num_assistant_tokens": 5},
+    "Bllossom/llama-3.1-Korean-Bllossom-8B": {"draft_model": "Bllossom/llama-3.2-Korean-Bllossom-3B", "num_assistant_tokens": 4},
+}
+DEFAULT_PROMPT_LOOKUP_TOKENS = 10
+
+# 사용자 설정 파일이 있으면 모델별 항목을 덮어쓴다.
+SPECULATIVE_CONFIG_PATH = os.path.join("./models", "speculative_config.json")
+
+def resolve_speculative(speculative=None, model_id=None):
+    """None이면 모델별 설정의 enabled, 그것도 없으면 전역 기본값(--speculative-decoding)을 사용"""
+    if speculative is None:
+        if model_id is not None:
+            enabled = get_speculative_config(model_id).get("enabled")
+            if enabled is not None:
+                return bool(enabled)
+        from src.common.default_load_options import default_speculative_decoding
+        return default_speculative_decoding
+    return bool(speculative)
+
+def get_speculative_config(model_id, config_path=SPECULATIVE_CONFIG_PATH):
+    """모델 ID에 대한 추측 디코딩 설정을 반환 (기본값 ← 설정 파일)"""
+    config = dict(DEFAULT_SPECULATIVE_CONFIG.get(model_id, {}))
+    if os.path.isfile(config_path):
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                config.update(json.load(f).get(model_id, {}))
+        except Exception as e:
+            logger.warning(f"추측 디코딩 설정 파일을 읽을 수 없습니다: {config_path} ({e})")
+    config.setdefault("prompt_lookup_num_tokens", DEFAULT_PROMPT_LOOKUP_TOKENS)
+    return config
+
+def new_speculative_stats():
+    return {
+        "mode": None,
+        "generations": 0,
+        "new_tokens": 0,
+        "verify_steps": 0,
+        "proposed_tokens": 0,
+        "accepted_tokens": 0,
+        "elapsed_sec": 0.0,
+    }
+
+def summarize_stats(stats):
+    """누적 통계에서 수락률/패스당 토큰 수/처리량을 계산"""
+    summary = dict(stats)
+    summary["acceptance_rate"] = stats["accepted_tokens"] / stats["proposed_tokens"] if stats["proposed_tokens"] else None
+    summary["tokens_per_verify_step"] = stats["new_tokens"] / stats["verify_steps"] if stats["verify_steps"] else None
+    summary["tokens_per_sec"] = stats["new_tokens"] / stats["elapsed_sec"] if stats["elapsed_sec"] else None
+    return summary
+
+class SpeculativeDecoder:
+    """
+    transformers 핸들러용 추측 디코딩 래퍼.
+    - 설정에 draft_model이 있고 로드할 수 있으면 assistant_model로 보조 생성
+    - 없으면 prompt_lookup_num_tokens로 프롬프트 조회 디코딩
+    대상/드래프트 모델의 forward 호출 수를 세어 수락률을 기록한다.
+    보조 생성은 반복마다 대상 모델 forward 1회로 (수락된 드래프트 토큰 + 1)개를 확정하므로
+    수락된 토큰 수 = 생성 토큰 수 - 대상 forward 수로 계산한다.
+    프롬프트 조회는 드래프트 forward가 없으므로 대상 forward에 들어간 후보 토큰 수를 제안 수로 센다.
+    """
+    def __init__(self, model_id, model, device="cpu", enabled=False, config=None):
+        self.model_id = model_id
+        self.model = model
+        self.device = device
+        self.enabled = enabled
+        self.config = config if config is not None else get_speculative_config(model_id)
+        self.draft_model = None
+        self.stats = new_speculative_stats()
+        self.last_stats = None
+        if enabled:
+            self._load_draft()
+            self.stats["mode"] = "assistant_model" if self.draft_model is not None else "prompt_lookup"
+            logger.info(f"[*] Speculative decoding enabled for {model_id}: {self.stats['mode']}")
+
+    def _load_draft(self):
+        draft_id = self.config.get("draft_model")
+        if not draft_id:
+            return
+        try:
+            from transformers import AutoModelForCausalLM
+            draft_dir = os.path.join("./models", "transformers", make_local_dir_name(draft_id))
+            self.draft_model = AutoModelForCausalLM.from_pretrained(
+                draft_dir if os.path.isdir(draft_dir) else draft_id,
+                torch_dtype=self.model.dtype,
+                trust_remote_code=True
+            ).to(self.device).eval()
+            num_assistant_tokens = self.config.get("num_assistant_tokens")
+            if num_assistant_tokens:
+                self.draft_model.generation_config.num_assistant_tokens = num_assistant_tokens
+            logger.info(f"[*] Draft model loaded: {draft_id}")
+        except Exception as e:
+            logger.warning(f"드래프트 모델 로드 실패, 프롬프트 조회 디코딩을 사용합니다: {str(e)}\n\n{traceback.format_exc()}")
+            self.draft_model = None
+
+    def generate_kwargs(self):
+        if not self.enabled:
+            return {}
+        if self.draft_model is not None:
+            return {"assistant_model": self.draft_model}
+        return {"prompt_lookup_num_tokens": self.config["prompt_lookup_num_tokens"]}
+
+    def generate(self, generate_fn, input_ids=None, **kwargs):
+        """generate_fn(model.generate 또는 CompiledGenerator.generate)을 추측 디코딩 인자와 함께 호출"""
+        if not self.enabled:
+            return generate_fn(input_ids, **kwargs) if input_ids is not None else generate_fn(**kwargs)
+        if input_ids is None:
+            input_ids = kwargs.pop("input_ids")
+        counts = {"target": 0, "draft": 0, "candidates": 0, "cached": True}
+        prompt_len = input_ids.shape[-1]
+
+        def count_target(module, args, module_kwargs, output):
+            counts["target"] += 1
+            step_ids = module_kwargs.get("input_ids", args[0] if args else None)
+            if step_ids is None:
+                counts["cached"] = False
+                return
+            if counts["target"] == 1:
+                # 첫 forward: 프롬프트 + 첫 후보
+                counts["candidates"] += max(step_ids.shape[-1] - prompt_len, 0)
+            elif module_kwargs.get("past_key_values") is None:
+                # KV 캐시 없이 전체 시퀀스를 다시 넣으면 후보 수를 구분할 수 없다.
+                counts["cached"] = False
+            else:
+                # 이후 forward: 마지막 확정 토큰 1개 + 후보
+                counts["candidates"] += max(step_ids.shape[-1] - 1, 0)
+
+        hooks = [self.model.register_forward_hook(count_target, with_kwargs=True)]
+        if self.draft_model is not None:
+            hooks.append(self.draft_model.register_forward_hook(lambda *_: counts.__setitem__("draft", counts["draft"] + 1)))
+        start = time.perf_counter()
+        try:
+            outputs = generate_fn(input_ids, **kwargs, **self.generate_kwargs())
+        finally:
+            for hook in hooks:
+                hook.remove()
+        elapsed = time.perf_counter() - start
+
+        new_tokens = outputs.shape[-1] - prompt_len
+        if self.draft_model is not None:
+            # 드래프트 forward 1회당 후보 토큰 1개를 제안
+            proposed = counts["draft"]
+        else:
+            # 캐시 없이 생성했으면 제안 수를 알 수 없으므로 0 (패스당 토큰 수로만 보고)
+            proposed = counts["candidates"] if counts["cached"] else 0
+        last = {
+            "mode": self.stats["mode"],
+            "generations": 1,
+            "new_tokens": new_tokens,
+            "verify_steps": counts["target"],
+            "proposed_tokens": proposed,
+            "accepted_tokens": max(new_tokens - counts["target"], 0),
+            "elapsed_sec": elapsed,
+        }
+        for key in ("generations", "new_tokens", "verify_steps", "proposed_tokens", "accepted_tokens", "elapsed_sec"):
+            self.stats[key] += last[key]
+        self.last_stats = summarize_stats(last)
+        record_speculative(self.model_id, last)
+        logger.info(f"[*] Speculative decoding stats: {self.last_stats}")
+        return outputs
+
+    def summary(self):
+        return summarize_stats(self.stats)
+
+def load_gguf_draft(model_id, config, llama_kwargs):
+    """
+    llama.cpp용 드래프트 모델을 생성.
+    - draft_gguf가 설정되어 있으면 작은 GGUF 모델로 탐욕적 드래프트
+    - 아니면 LlamaPromptLookupDecoding
+    두 경우 모두 CountingDraftModel로 감싸 제안 수를 기록한다.
+    """
+    from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+
+    draft_path = config.get("draft_gguf")
+    if draft_path:
+        if not os.path.isabs(draft_path) and not os.path.isfile(draft_path):
+            draft_path = os.path.join("./models", "gguf", draft_path)
+        try:
+            inner = GGUFDraftModel(draft_path, num_pred_tokens=config.get("num_assistant_tokens", 5), llama_kwargs=llama_kwargs)
+            return CountingDraftModel(inner, mode="gguf_draft")
+        except Exception as e:
+            logger.warning(f"GGUF 드래프트 모델 로드 실패, 프롬프트 조회 디코딩을 사용합니다: {str(e)}")
+    return CountingDraftModel(
+        LlamaPromptLookupDecoding(num_pred_tokens=config.get("prompt_lookup_num_tokens", DEFAULT_PROMPT_LOOKUP_TOKENS)),
+        mode="prompt_lookup",
+    )
+
+try:
+    from llama_cpp.llama_speculative import LlamaDraftModel
+except ImportError:
+    LlamaDraftModel = object
+
+class GGUFDraftModel(LlamaDraftModel):
+    """작은 GGUF 모델로 다음 토큰들을 탐욕적으로 제안. 이전 호출과 공통된 접두사의 KV 캐시는 재사용한다."""
+    def __init__(self, model_path, num_pred_tokens=5, llama_kwargs=None):
+        import numpy as np
+        from llama_cpp import Llama
+        self.np = np
+        self.num_pred_tokens = num_pred_tokens
+        self.llm = Llama(model_path=model_path, verbose=False, **(llama_kwargs or {}))
+
+    def __call__(self, input_ids, **kwargs):
+        np = self.np
+        tokens = input_ids.tolist()
+        cached = self.llm._input_ids.tolist()
+        prefix = 0
+        for a, b in zip(cached, tokens):
+            if a != b:
+                break
+            prefix += 1
+        # 마지막 토큰은 logits를 얻기 위해 항상 다시 평가
+        self.llm.n_tokens = min(prefix, len(tokens) - 1)
+        self.llm.eval(tokens[self.llm.n_tokens:])
+
+        draft = []
+        for _ in range(self.num_pred_tokens):
+            token = int(np.argmax(self.llm.scores[self.llm.n_tokens - 1]))
+            if token == self.llm.token_eos() or self.llm.n_tokens >= self.llm.n_ctx():
+                break
+            draft.append(token)
+            self.llm.eval([token])
+        return np.array(draft, dtype=np.intc)
+
+class CountingDraftModel(LlamaDraftModel):
+    """
+    llama.cpp 드래프트 호출 수와 제안 토큰 수를 기록하는 래퍼.
+    Llama.generate는 드래프트 호출 1회당 (수락된 드래프트 토큰 + 1)개를 확정하므로
+    수락된 토큰 수 = 생성 토큰 수 - 드래프트 호출 수로 계산한다.
+    """
+    def __init__(self, inner, mode):
+        self.inner = inner
+        self.mode = mode
+        self.calls = 0
+        self.proposed = 0
+
+    def __call__(self, input_ids, **kwargs):
+        draft = self.inner(input_ids, **kwargs)
+        self.calls += 1
+        self.proposed += len(draft)
+        return draft
+
+    def reset_counts(self):
+        self.calls = 0
+        self.proposed = 0
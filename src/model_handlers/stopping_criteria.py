@@ -0,0 +1,90 @@
+# model_handlers/stopping_criteria.py
+
+import weakref
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+from src.model_handlers.generation_control import current_generation_control
+
+class StopOnTokens(StoppingCriteria):
+    """
+    종료 토큰 ID와 여러 토큰으로 이루어진 종료 시퀀스를 배치 전체에 대해 텐서 연산으로 검사.
+    - 종료 토큰: 마지막 토큰이 stop_token_ids 중 하나인지 torch.isin으로 검사
+    - 종료 시퀀스: 길이가 다른 시퀀스를 오른쪽 정렬로 패딩한 (S, L) 텐서와 마스크를 미리 만들어 두고,
+      입력의 마지막 L개 토큰과 한 번에 비교
+    반환값은 배치 원소별 BoolTensor (batch,)이며, 장치별 텐서 사본은 첫 호출 시 한 번만 만든다.
+    """
+    def __init__(self, stop_token_ids=(), stop_sequences=()):
+        super().__init__()
+        self.stop_token_ids = torch.tensor(sorted(set(stop_token_ids)), dtype=torch.long)
+        sequences = [list(seq) for seq in stop_sequences if len(seq) > 0]
+        self.max_len = max((len(seq) for seq in sequences), default=0)
+        if sequences:
+            self.sequences = torch.zeros((len(sequences), self.max_len), dtype=torch.long)
+            self.mask = torch.zeros((len(sequences), self.max_len), dtype=torch.bool)
+            for i, seq in enumerate(sequences):
+                self.sequences[i, self.max_len - len(seq):] = torch.tensor(seq, dtype=torch.long)
+                self.mask[i, self.max_len - len(seq):] = True
+        else:
+            self.sequences = None
+            self.mask = None
+        self._device_tensors = {}
+
+    def _tensors(self, device):
+        if device not in self._device_tensors:
+            self._device_tensors[device] = (
+                self.stop_token_ids.to(device),
+                self.sequences.to(device) if self.sequences is not None else None,
+                self.mask.to(device) if self.mask is not None else None,
+            )
+        return self._device_tensors[device]
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        stop_ids, sequences, mask = self._tensors(input_ids.device)
+        done = torch.isin(input_ids[:, -1], stop_ids)
+        if sequences is not None:
+            length = min(self.max_len, input_ids.shape[-1])
+            # 입력이 가장 긴 시퀀스보다 짧으면 앞쪽 위치는 비교하지 않는다.
+            tail = input_ids[:, -length:].unsqueeze(1)
+            matched = (tail == sequences[:, -length:].unsqueeze(0)) | ~mask[:, -length:].unsqueeze(0)
+            fits = mask[:, :self.max_len - length].any(dim=-1).logical_not().unsqueeze(0)
+            done |= (matched.all(dim=-1) & fits).any(dim=-1)
+        return done
+
+def build_stopping_criteria(tokenizer, stop_token_ids=(), stop_strings=()):
+    """
+    토크나이저 기준으로 종료 조건을 한 번 계산하여 StoppingCriteriaList로 반환.
+    핸들러 로드 시점에 만들어 두고 generate 호출마다 재사용한다.
+    종료 문자열은 단일 토큰이면 종료 토큰으로, 여러 토큰이면 종료 시퀀스로 등록된다.
+    """
+    ids = [i for i in stop_token_ids if i is not None]
+    sequences = []
+    for text in stop_strings:
+        encoded = tokenizer.encode(text, add_special_tokens=False)
+        if len(encoded) == 1:
+            ids.append(encoded[0])
+        elif encoded:
+            sequences.append(encoded)
+    return StoppingCriteriaList([StopOnTokens(ids, sequences)])
+
+_stop_strings_cache = weakref.WeakKeyDictionary()
+
+def stop_strings_criteria(tokenizer, stop_strings):
+    """생성 프로필의 종료 문자열용 StoppingCriteriaList. 토크나이저·문자열 조합마다 한 번만 만든다."""
+    if not stop_strings:
+        return None
+    key = tuple(stop_strings)
+    per_tokenizer = _stop_strings_cache.setdefault(tokenizer, {})
+    if key not in per_tokenizer:
+        per_tokenizer[key] = build_stopping_criteria(tokenizer, stop_strings=key)
+    return per_tokenizer[key]
+
+def request_stopping_criteria(tokenizer, stop_strings):
+    """
+    요청 단위 StoppingCriteriaList: 생성 프로필의 종료 문자열 + 현재 요청의 중단/마감/토큰 예산 검사.
+    둘 다 없으면 None.
+    """
+    criteria = list(stop_strings_criteria(tokenizer, stop_strings) or [])
+    control = current_generation_control()
+    if control is not None:
+        criteria.append(control.stopping_criteria())
+    return StoppingCriteriaList(criteria) if criteria else None
@@ -2,4 +2,5 @@ from src.common.utils import get_all_local_models
 local_models_data = get_all_local_models()
 transformers_local = local_models_data["transformers"]
 gguf_local = local_models_data["gguf"]
-mlx_local = local_models_data["mlx"]
\ No newline at end of file
+mlx_local = local_models_data["mlx"]
+onnx_local = local_models_data["onnx"]
\ No newline at end of file
@@ -1,5 +1,6 @@
 # models.py
 
+import time
 import random
 import platform
 import numpy as np
@@ -7,9 +8,17 @@ import torch
 from src.common.cache import models_cache
 from src.model_handlers import (
     GGUFModelHandler, MiniCPMLlama3V25Handler, GLM4Handler, GLM4VHandler, VisionModelHandler,
-    Aya23Handler, GLM4HfHandler, OtherModelHandler, QwenHandler, MlxModelHandler, MlxVisionHandler
+    Aya23Handler, GLM4HfHandler, OtherModelHandler, QwenHandler, MlxModelHandler, MlxVisionHandler,
+    OnnxModelHandler
 )
+from src.model_handlers.load_options import resolve_load_options, describe_load_options
+from src.model_handlers.compiled_generation import resolve_compile_generation
+from src.model_handlers.speculative import resolve_speculative
+from src.common.admission import get_admission_registry, AdmissionRejected
+from src.common.metrics import record_request
 from src.common.utils import ensure_model_available, build_model_cache_key, get_all_local_models
+from src.common.generation_profiles import resolve_profile, to_api_kwargs
+from src.model_handlers.generation_control import get_generation_registry, STOP_CANCELLED, STOP_DEADLINE, STOP_BUDGET
 import gradio as gr
 
 import logging
@@ -49,25 +58,30 @@ def refresh_model_list():
     local_models = (
         new_local_models["transformers"] + 
         new_local_models["gguf"] + 
-        new_local_models["mlx"]
+        new_local_models["mlx"] +
+        new_local_models["onnx"]
     )
     new_choices = api_models + local_models
     new_choices = sorted(list(dict.fromkeys(new_choices)))
     return gr.update(choices=new_choices), "모델 목록을 새로고침했습니다."
 
 
-def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_path=None, api_key=None, device="cpu"):
+def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_path=None, api_key=None, device="cpu", cpu_quantization=None, attn_implementation=None, compile_generation=None, speculative=None):
     """
     모델 로드 함수. 특정 모델에 대한 로드 로직을 외부 핸들러로 분리.
+    cpu_quantization / attn_implementation / compile_generation은 transformers 모델에만 적용되며,
+    None이면 전역 기본값(--cpu-quantization / --attn-implementation / --compile-generation)을 사용한다.
+    compile_generation은 Qwen/GLM/기타 텍스트 핸들러에서만 사용된다.
+    speculative(추측 디코딩)는 Qwen/GLM4-hf/기타 텍스트 핸들러와 GGUF 핸들러에서 사용되며, None이면 speculative_config.json의 모델별 enabled, 없으면 --speculative-decoding을 따른다.
     """
     model_id = selected_model
-    if model_type != "transformers" and model_type != "gguf" and model_type != "mlx" and model_type != "api":
+    if model_type not in ["transformers", "gguf", "mlx", "onnx", "api"]:
         logger.error(f"지원되지 않는 모델 유형: {model_type}")
         return None
     
     # Pass the device to the handler
     handler = None
-    if model_type not in ["transformers", "gguf", "mlx", "api"]:
+    if model_type not in ["transformers", "gguf", "mlx", "onnx", "api"]:
         logger.error(f"지원되지 않는 모델 유형: {model_type}")
         return None
     if model_type == "api":
@@ -82,11 +96,22 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
             model_id=model_id,
             quantization_bit=quantization_bit,
             local_model_path=local_model_path,
-            model_type=model_type
+            model_type=model_type,
+            speculative=speculative
         )
         cache_key = build_model_cache_key(model_id, model_type, quantization_bit, local_model_path)
         models_cache[cache_key] = handler
         return handler
+    elif model_type == "onnx":
+        # 내보낸 ONNX가 없으면 핸들러가 transformers 모델(로컬 또는 허브)에서 직접 내보낸다.
+        handler = OnnxModelHandler(
+            model_id=model_id,
+            local_model_path=local_model_path,
+            model_type=model_type,
+            device=device
+        )
+        models_cache[build_model_cache_key(model_id, model_type)] = handler
+        return handler
     elif model_type == "mlx":
         if "vision" in model_id.lower() or "qwen2-vl" in model_id.lower():
             if not ensure_model_available(model_id, local_model_path, model_type):
@@ -111,6 +136,10 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
             models_cache[build_model_cache_key(model_id, model_type)] = handler
             return handler
     else:
+        cpu_quantization, attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
+        compile_generation = resolve_compile_generation(compile_generation)
+        speculative = resolve_speculative(speculative, model_id)
+        load_options = describe_load_options(cpu_quantization, attn_implementation, compile_generation, speculative)
         if model_id == "openbmb/MiniCPM-Llama3-V-2_5":
             # 모델 존재 확인 및 다운로드
             if not ensure_model_available(model_id, local_model_path, model_type):
@@ -120,9 +149,11 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
                 model_id=model_id,
                 local_model_path=local_model_path,
                 model_type=model_type,
-                device=device
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation
             )
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
         elif model_id in [
             "Bllossom/llama-3.2-Korean-Bllossom-AICA-5B",
@@ -135,9 +166,11 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
                 model_id=model_id,
                 local_model_path=local_model_path,
                 model_type=model_type,
-                device=device
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation
             )
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
         elif model_id == "THUDM/glm-4v-9b":
             # 모델 존재 확인 및 다운로드
@@ -148,9 +181,11 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
                 model_id=model_id,
                 local_model_path=local_model_path,
                 model_type=model_type,
-                device=device
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation
             )
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
         elif model_id == "THUDM/glm-4-9b-chat":
             if not ensure_model_available(model_id, local_model_path, model_type):
@@ -160,9 +195,12 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
                 model_id=model_id,
                 local_model_path=local_model_path,
                 model_type=model_type,
-                device=device
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation,
+                compile_generation=compile_generation
             )
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
         elif model_id in ["THUDM/glm-4-9b-chat-hf", "THUDM/glm-4-9b-chat-1m-hf"]:
             if not ensure_model_available(model_id, local_model_path, model_type):
@@ -172,9 +210,13 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
                 model_id=model_id,  # model_id가 정의되어 있어야 합니다.
                 local_model_path=local_model_path,
                 model_type=model_type,
-                device=device
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation,
+                compile_generation=compile_generation,
+                speculative=speculative
             )
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
         elif model_id in ["bean980310/glm-4-9b-chat-hf_float8", "genai-archive/glm-4-9b-chat-hf_int8"]:
             # 'fp8' 특화 핸들러 로직 추가
@@ -185,9 +227,13 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
                 model_id=model_id,  # model_id가 정의되어 있어야 합니다.
                 local_model_path=local_model_path,
                 model_type=model_type,
-                device=device
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation,
+                compile_generation=compile_generation,
+                speculative=speculative
             )
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
         elif model_id in ["CohereForAI/aya-23-8B", "CohereForAI/aya-23-35B"]:
             if not ensure_model_available(model_id, local_model_path, model_type):
@@ -197,9 +243,11 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
                 model_id=model_id,  # model_id가 정의되어 있어야 합니다.
                 local_model_path=local_model_path,
                 model_type=model_type,
-                device=device
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation
             )
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
         elif "qwen" in model_id.lower():
             if not ensure_model_available(model_id, local_model_path, model_type):
@@ -209,22 +257,88 @@ def load_model(selected_model, model_type, quantization_bit="Q8_0", local_model_
                 model_id=model_id,  # model_id가 정의되어 있어야 합니다.
                 local_model_path=local_model_path,
                 model_type=model_type,
-                device=device
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation,
+                compile_generation=compile_generation,
+                speculative=speculative
             )
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
         else:
             if not ensure_model_available(model_id, local_model_path, model_type):
                 logger.error(f"모델 '{model_id}'을(를) 다운로드할 수 없습니다.")
                 return None
-            handler = OtherModelHandler(model_id, local_model_path=local_model_path, model_type=model_type,device=device)
-            models_cache[build_model_cache_key(model_id, model_type)] = handler
+            handler = OtherModelHandler(
+                model_id,
+                local_model_path=local_model_path,
+                model_type=model_type,
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation,
+                compile_generation=compile_generation,
+                speculative=speculative
+            )
+            models_cache[build_model_cache_key(model_id, model_type, load_options=load_options)] = handler
             return handler
 
-def generate_answer(history, selected_model, model_type, local_model_path=None, image_input=None, api_key=None, device="cpu", seed=42, character_language='ko'):
+# 생성이 중간에 멈췄을 때 답변 뒤에 붙이는 안내
+# MLX 핸들러와 MiniCPM-Llama3-V-2_5는 토큰 단계에서 중단할 수 없어, 시작 전 검사와 최대 토큰 수 제한만 적용된다.
+STOP_NOTICES = {
+    STOP_CANCELLED: "⏹ 사용자가 생성을 중단했습니다.",
+    STOP_DEADLINE: "⏱ 생성 시간 제한을 초과하여 중단했습니다.",
+    STOP_BUDGET: "🪙 세션 토큰 예산에 도달하여 중단했습니다.",
+}
+
+def generate_answer(history, selected_model, model_type, local_model_path=None, image_input=None, api_key=None, device="cpu", seed=42, character_language='ko', cpu_quantization=None, attn_implementation=None, compile_generation=None, speculative=None, generation_overrides=None, session_id=None, timeout=None):
     """
     사용자 히스토리를 기반으로 답변 생성.
+    generation_overrides: 생성 프로필을 요청 단위로 덮어쓸 값 (예: {"max_new_tokens": 256, "temperature": 0.5})
+    session_id: 중지 버튼(cancel_generation)과 세션 토큰 예산에 사용할 세션 ID
+    timeout: 요청 생성 시간 제한(초). None이면 --generation-timeout 값을 사용
     """
+    registry = get_generation_registry()
+    status = "ok"
+    with registry.track(session_id, timeout=timeout) as control:
+        if control.max_new_tokens == 0:
+            logger.warning(f"세션 토큰 예산 소진: session={session_id}")
+            answer = "세션 토큰 예산을 모두 사용했습니다. 세션을 초기화하거나 새 세션을 시작하세요."
+            status = "budget_exhausted"
+        generate_args = (
+            history, selected_model, model_type, local_model_path, image_input, api_key, device, seed,
+            character_language, cpu_quantization, attn_implementation, compile_generation, speculative,
+            generation_overrides, control
+        )
+        try:
+            if status != "ok":
+                pass
+            elif model_type == "api":
+                answer = _generate_answer(*generate_args)
+            else:
+                # 로컬 모델 핸들러는 세션 간에 공유되므로 모델별로 동시 실행 수를 제한하고 FIFO로 대기
+                admission_key = build_model_cache_key(selected_model, model_type, local_path=local_model_path)
+                try:
+                    with get_admission_registry().admit(admission_key, model_id=selected_model, session_id=session_id, control=control):
+                        answer = _generate_answer(*generate_args)
+                except AdmissionRejected as e:
+                    logger.warning(f"입장 거부: {e}")
+                    answer = f"⚠ {e} 잠시 후 다시 시도하세요."
+                    status = "rejected"
+        except Exception as e:
+            # 모델 로드 실패 등 호출자에게 전달되는 예외도 실패로 기록
+            control.fail(str(e))
+            record_request(selected_model, model_type, control, "error")
+            raise
+    if status == "ok" and control.error is not None:
+        status = "error"
+    if status == "ok" and control.stop_reason is not None:
+        status = control.stop_reason
+        if isinstance(answer, str):
+            answer = f"{answer}\n\n{STOP_NOTICES[control.stop_reason]}"
+    record_request(selected_model, model_type, control, status)
+    return answer
+
+def _generate_answer(history, selected_model, model_type, local_model_path, image_input, api_key, device, seed, character_language, cpu_quantization, attn_implementation, compile_generation, speculative, generation_overrides, control):
         
     random.seed(seed)
     np.random.seed(seed)
@@ -243,7 +357,13 @@ def generate_answer(history, selected_model, model_type, local_model_path=None,
         }
         history = [system_message]
     
-    cache_key = build_model_cache_key(selected_model, model_type, local_path=local_model_path)
+    load_options = None
+    if model_type == "transformers":
+        cpu_quantization, attn_implementation = resolve_load_options(cpu_quantization, attn_implementation)
+        compile_generation = resolve_compile_generation(compile_generation)
+        speculative = resolve_speculative(speculative, selected_model)
+        load_options = describe_load_options(cpu_quantization, attn_implementation, compile_generation, speculative)
+    cache_key = build_model_cache_key(selected_model, model_type, local_path=local_model_path, load_options=load_options)
     handler = models_cache.get(cache_key)
     
     last_message = history[-1]
@@ -267,7 +387,7 @@ def generate_answer(history, selected_model, model_type, local_model_path=None,
         if "claude" in selected_model:
             if not api_key:
                 logger.error("Anthropic API Key가 missing.")
-                return "Anthropic API Key가 필요합니다."
+                return control.fail("Anthropic API Key가 필요합니다.")
             
             client = anthropic.Client(api_key=api_key)
             # Anthropic 메시지 형식으로 변환
@@ -286,19 +406,20 @@ def generate_answer(history, selected_model, model_type, local_model_path=None,
                 response = client.messages.create(
                     model=selected_model,
                     messages=messages,
-                    temperature=0.7,
-                    max_tokens=1024
+                    **_api_request_kwargs(selected_model, "anthropic", generation_overrides, control)
                 )
+                control.prompt_tokens = response.usage.input_tokens
+                control.generated_tokens = response.usage.output_tokens
                 answer = response.content[0].text
                 logger.info(f"[*] Anthropic 응답: {answer}")
                 return answer
             except Exception as e:
                 logger.error(f"Anthropic API 오류: {str(e)}\n\n{traceback.format_exc()}")
-                return f"오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+                return control.fail(f"오류 발생: {str(e)}\n\n{traceback.format_exc()}")
         else:
             if not api_key:
                 logger.error("OpenAI API Key가 missing.")
-                return "OpenAI API Key가 필요합니다."
+                return control.fail("OpenAI API Key가 필요합니다.")
             openai.api_key = api_key
             messages = [{"role": msg['role'], "content": msg['content']} for msg in history]
             logger.info(f"[*] OpenAI API 요청: {messages}")
@@ -307,37 +428,59 @@ def generate_answer(history, selected_model, model_type, local_model_path=None,
                 response = openai.chat.completions.create(
                     model=selected_model,
                     messages=messages,
-                    temperature=0.7,
-                    max_tokens=1024,
-                    top_p=0.9
+                    **_api_request_kwargs(selected_model, "openai", generation_overrides, control)
                 )
+                if response.usage is not None:
+                    control.prompt_tokens = response.usage.prompt_tokens
+                    control.generated_tokens = response.usage.completion_tokens
                 answer = response.choices[0].message["content"]
                 logger.info(f"[*] OpenAI 응답: {answer}")
                 return answer
             except Exception as e:
                 logger.error(f"OpenAI API 오류: {str(e)}\n\n{traceback.format_exc()}")
-                return f"오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+                return control.fail(f"오류 발생: {str(e)}\n\n{traceback.format_exc()}")
     
     else:
+        control.cache_hit = handler is not None
         if not handler:
             logger.info(f"[*] 모델 로드 중: {selected_model}")
-            handler = load_model(selected_model, model_type, local_model_path=local_model_path, device=device)
+            load_start = time.perf_counter()
+            handler = load_model(
+                selected_model,
+                model_type,
+                local_model_path=local_model_path,
+                device=device,
+                cpu_quantization=cpu_quantization,
+                attn_implementation=attn_implementation,
+                compile_generation=compile_generation,
+                speculative=speculative
+            )
+            control.model_load_time = time.perf_counter() - load_start
         
         if not handler:
             logger.error("모델 핸들러가 로드되지 않았습니다.")
-            return "모델 핸들러가 로드되지 않았습니다."
+            return control.fail("모델 핸들러가 로드되지 않았습니다.")
         
         logger.info(f"[*] Generating answer using {handler.__class__.__name__}")
         try:
             if isinstance(handler, VisionModelHandler):
-                answer = handler.generate_answer(history, image_input)
+                answer = handler.generate_answer(history, image_input, generation_overrides=generation_overrides)
             else:
-                answer = handler.generate_answer(history)
+                answer = handler.generate_answer(history, generation_overrides=generation_overrides)
             return answer
         except Exception as e:
             logger.error(f"모델 추론 오류: {str(e)}\n\n{traceback.format_exc()}")
-            return f"오류 발생: {str(e)}\n\n{traceback.format_exc()}"
+            return control.fail(f"오류 발생: {str(e)}\n\n{traceback.format_exc()}")
         
+def _api_request_kwargs(selected_model, provider, generation_overrides, control):
+    """생성 프로필을 API 인자로 변환하고 세션 토큰 예산과 남은 시간을 반영"""
+    kwargs = to_api_kwargs(resolve_profile(selected_model, provider, generation_overrides), provider=provider)
+    if control.max_new_tokens is not None:
+        kwargs["max_tokens"] = min(kwargs["max_tokens"], control.max_new_tokens) if kwargs.get("max_tokens") is not None else control.max_new_tokens
+    if control.deadline is not None:
+        kwargs["timeout"] = control.remaining_time()
+    return kwargs
+
 # models.py
 
 def generate_stable_diffusion_prompt_cached(user_input, selected_model, model_type, local_model_path=None, api_key=None, device="cpu", seed=42):
@@ -2,6 +2,8 @@ import gradio as gr
 from src.common.translations import _, translation_manager
 from src.models.models import get_all_local_models
 from src.common.utils import clear_all_model_cache
+from src.common.metrics import metrics
+from src.common.admission import get_admission_registry
 from src.tabs.main_tab import MainTab
 import logging
 
@@ -10,6 +12,49 @@ main_tab=MainTab()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _format_value(value, digits=2):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.{digits}f}"
+    return str(value)
+
+def render_metrics_panel():
+    """대기열 상태와 최근 요청 지표를 Markdown 표로 변환"""
+    lines = ["**모델 대기열**", "", "| 모델 | 실행 중 | 대기 | 거부 |", "|---|---|---|---|"]
+    for snapshot in get_admission_registry().snapshot():
+        lines.append(f"| {snapshot['name']} | {snapshot['active']}/{snapshot['max_concurrent']} | {snapshot['waiting']}/{snapshot['max_queue']} | {snapshot['rejected']} |")
+    lines += [
+        "",
+        "**최근 요청**",
+        "",
+        "| 모델 | 상태 | 프롬프트 토큰 | 생성 토큰 | TTFT(s) | 토큰/s | 대기(s) | 로드(s) | 캐시 |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for record in metrics.recent_requests():
+        cache = "-" if record["cache_hit"] is None else ("hit" if record["cache_hit"] else "miss")
+        lines.append(
+            f"| {record['model']} | {record['status']} | {_format_value(record['prompt_tokens'])} | {record['generated_tokens']} "
+            f"| {_format_value(record['ttft_seconds'])} | {_format_value(record['decode_tokens_per_second'], 1)} "
+            f"| {_format_value(record['queue_wait_seconds'])} | {_format_value(record['model_load_seconds'])} | {cache} |"
+        )
+    speculative = metrics.speculative_summary()
+    if speculative:
+        lines += [
+            "",
+            "**추측 디코딩**",
+            "",
+            "| 모델 | 모드 | 제안 토큰 | 수락 토큰 | 수락률 | 검증 패스 | 패스당 토큰 |",
+            "|---|---|---|---|---|---|---|",
+        ]
+        for entry in speculative:
+            acceptance = "-" if entry["acceptance_rate"] is None else f"{entry['acceptance_rate']:.1%}"
+            lines.append(
+                f"| {entry['model']} | {entry['mode']} | {entry['proposed_tokens']} | {entry['accepted_tokens']} | {acceptance} "
+                f"| {entry['verify_steps']} | {_format_value(entry['tokens_per_verify_step'])} |"
+            )
+    return "\n".join(lines)
+
 def create_cache_tab(model_dropdown, language_dropdown):    
     with gr.Tab(_("cache_tab_title")):
         with gr.Row():
@@ -19,6 +64,16 @@ def create_cache_tab(model_dropdown, language_dropdown):
             with gr.Column():
                 clear_all_btn = gr.Button(_("cache_clear_all_button"))
                 clear_all_result = gr.Textbox(label=_("clear_all_result_label"), interactive=False)
+        with gr.Accordion("추론 지표", open=False):
+            metrics_panel = gr.Markdown(render_metrics_panel())
+            metrics_timer = gr.Timer(2.0)
+        metrics_timer.tick(
+            fn=render_metrics_panel,
+            inputs=[],
+            outputs=[metrics_panel],
+            queue=False,
+            show_progress="hidden"
+        )
 
         def refresh_model_list():
             """
@@ -35,7 +90,7 @@ def create_cache_tab(model_dropdown, language_dropdown):
                 "gpt-4o"
                 # 필요 시 추가
             ]
-            local_models = new_local_models["transformers"] + new_local_models["gguf"] + new_local_models["mlx"]
+            local_models = new_local_models["transformers"] + new_local_models["gguf"] + new_local_models["mlx"] + new_local_models["onnx"]
             new_choices = api_models + local_models
             new_choices = list(dict.fromkeys(new_choices))
             new_choices = sorted(new_choices)  # 정렬 추가
@@ -116,7 +116,7 @@ def create_download_tab():
                         download_info_predefined.update(result)
 
                         # 다운로드 완료 후 모델 목록 업데이트
-                        new_choices = sorted(api_models + get_all_local_models()["transformers"] + get_all_local_models()["gguf"] + get_all_local_models()["mlx"])
+                        new_choices = sorted(api_models + get_all_local_models()["transformers"] + get_all_local_models()["gguf"] + get_all_local_models()["mlx"] + get_all_local_models()["onnx"])
                         return gr.Dropdown.update(choices=new_choices)
 
                     except Exception as e:
@@ -225,7 +225,7 @@ def create_download_tab():
                         download_info_custom.update(result)
 
                         # 다운로드 완료 후 모델 목록 업데이트
-                        new_choices = sorted(api_models + get_all_local_models()["transformers"] + get_all_local_models()["gguf"] + get_all_local_models()["mlx"])
+                        new_choices = sorted(api_models + get_all_local_models()["transformers"] + get_all_local_models()["gguf"] + get_all_local_models()["mlx"] + get_all_local_models()["onnx"])
                         return gr.Dropdown.update(choices=new_choices)
 
                     except Exception as e:
@@ -408,7 +408,7 @@ def create_download_tab():
                         download_info_hub.update(result)
 
                         # 다운로드 완료 후 모델 목록 업데이트
-                        new_choices = sorted(api_models + get_all_local_models()["transformers"] + get_all_local_models()["gguf"] + get_all_local_models()["mlx"])
+                        new_choices = sorted(api_models + get_all_local_models()["transformers"] + get_all_local_models()["gguf"] + get_all_local_models()["mlx"] + get_all_local_models()["onnx"])
                         return gr.Dropdown.update(choices=new_choices)
 
                     except Exception as e:
@@ -1,27 +1,33 @@
 import logging
+import atexit
 import gradio as gr
 import os
 import secrets
 import sqlite3
 
 from src.models.models import get_all_local_models, generate_answer
-from src.common.database import save_chat_history_db, delete_session_history, delete_all_sessions, get_preset_choices, load_system_presets, get_existing_sessions, load_chat_from_db, update_system_message_in_db
+from src.model_handlers.generation_control import cancel_generation, get_generation_registry
+from src.common.admission import get_admission_registry
+from src.common.chat_writer import chat_history_writer
+from src.common.database import save_chat_history_db, delete_session_history, delete_all_sessions, get_preset_choices, load_system_presets, list_sessions, load_chat_window, update_system_message_in_db, HISTORY_PAGE_SIZE
 from src.common.translations import TranslationManager, translation_manager
 
 from src.characters.preset_images import PRESET_IMAGES
 from src.models.api_models import api_models
-from src.models.local_models import transformers_local, gguf_local, mlx_local
+from src.models.local_models import transformers_local, gguf_local, mlx_local, onnx_local
 from src.common.default_language import default_language
 
 import traceback
 from src.characters.persona_speech_manager import PersonaSpeechManager
+from src.characters.speech_manager_registry import PersonaSpeechManagerRegistry
+from src.common.default_load_options import default_max_speech_sessions, default_speech_session_idle_timeout
 from src.common.args import parse_args
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
     
-generator_choices = api_models + transformers_local + gguf_local + mlx_local + ["사용자 지정 모델 경로 변경"]
+generator_choices = api_models + transformers_local + gguf_local + mlx_local + onnx_local + ["사용자 지정 모델 경로 변경"]
 generator_choices = list(dict.fromkeys(generator_choices))  # 중복 제거
 generator_choices = sorted(generator_choices)  # 정렬
 
@@ -55,12 +61,20 @@ characters={
 
 speech_manager = PersonaSpeechManager(translation_manager=translation_manager, characters=characters)
 
-session_speech_managers = {}
+# 세션별 말투 상태 (LRU + 유휴 만료, 내보낸 세션은 persona_state.db에 저장 후 필요할 때 복원)
+session_speech_managers = PersonaSpeechManagerRegistry(
+    factory=lambda: PersonaSpeechManager(translation_manager=translation_manager, characters=characters),
+    max_sessions=default_max_speech_sessions,
+    idle_timeout=default_speech_session_idle_timeout,
+)
+session_speech_managers.start_expiry_timer()
+atexit.register(session_speech_managers.close)
 
 def get_speech_manager(session_id: str) -> PersonaSpeechManager:
-    if session_id not in session_speech_managers:
-        session_speech_managers[session_id] = PersonaSpeechManager(translation_manager=translation_manager, characters=characters)
-    return session_speech_managers[session_id]
+    return session_speech_managers.get(session_id)
+
+# 세션별로 아직 불러오지 않은 이전 메시지의 위치 (session_id -> before_seq, 모두 불러왔으면 항목 없음)
+history_cursors = {}
 
 class MainTab:
     def __init__(self):
@@ -107,7 +121,7 @@ class MainTab:
         else:
             return history, gr.update(value=content), None
 
-    def process_message(self, user_input, session_id, history, system_msg, selected_model, custom_path, image, api_key, device, seed, language, selected_character):
+    def process_message(self, user_input, session_id, history, system_msg, selected_model, custom_path, image, api_key, device, seed, language, selected_character, generation_overrides=None):
         """
         사용자 메시지를 처리하고 봇 응답을 생성하는 통합 함수.
 
@@ -122,6 +136,7 @@ class MainTab:
             api_key (str or None): API 키 (API 모델용).
             device (str): 사용할 장치 ('cpu', 'cuda', 등).
             seed (int): 시드 값.
+            generation_overrides (dict or None): 생성 프로필 덮어쓰기 값.
 
         Returns:
             tuple: 업데이트된 입력 필드, 히스토리, Chatbot 컴포넌트, 상태 메시지.
@@ -169,7 +184,9 @@ class MainTab:
                 api_key=api_key,
                 device=device,
                 seed=seed,
-                character_language=language
+                character_language=language,
+                generation_overrides=generation_overrides or None,
+                session_id=session_id
             )
 
             styled_answer = speech_manager.generate_response(answer)
@@ -177,8 +194,8 @@ class MainTab:
             # 응답을 히스토리에 추가
             history.append({"role": "assistant", "content": styled_answer})
 
-            # 데이터베이스에 히스토리 저장
-            save_chat_history_db(history, session_id=session_id)
+            # 데이터베이스에 히스토리 저장 (write-behind 대기열, 응답을 기다리게 하지 않음)
+            chat_history_writer.submit(history, session_id=session_id)
 
             # 상태 메시지 초기화
             status = ""
@@ -193,6 +210,38 @@ class MainTab:
 
         return "", history, chatbot_history, status
     
+    def stop_generation(self, session_id):
+        """중지 버튼: 세션에서 진행 중인 생성을 다음 토큰 단계에서 중단"""
+        if cancel_generation(session_id):
+            return "⏹ 생성을 중단하는 중입니다..."
+        return "진행 중인 생성이 없습니다."
+
+    def queue_status(self, session_id):
+        """세션 요청이 모델 대기열에서 기다리는 중이면 순번을 표시"""
+        waiting = get_admission_registry().queue_position(session_id)
+        if waiting is None:
+            return ""
+        model_name, position = waiting
+        return f"⏳ '{model_name}' 대기열 {position}번째 (앞선 요청이 끝나면 자동으로 시작됩니다)"
+
+    @staticmethod
+    def build_generation_overrides(enabled, max_new_tokens, temperature, top_p):
+        """고급 설정의 슬라이더 값을 생성 프로필 덮어쓰기 dict로 변환 (체크 해제 시 프로필 값 사용)"""
+        if not enabled:
+            return {}
+        if not temperature or temperature <= 0:
+            # temperature 0은 샘플링 없이 탐욕적 디코딩으로 처리 (HF generate는 샘플링 시 0을 허용하지 않음)
+            return {
+                "max_new_tokens": int(max_new_tokens),
+                "do_sample": False,
+                "top_p": top_p,
+            }
+        return {
+            "max_new_tokens": int(max_new_tokens),
+            "temperature": temperature,
+            "top_p": top_p,
+        }
+
     def determine_model_type(self, selected_model):
         if selected_model in api_models:
             return "api"
@@ -202,6 +251,8 @@ class MainTab:
             return "gguf"
         elif selected_model in mlx_local:
             return "mlx"
+        elif selected_model in onnx_local:
+            return "onnx"
         else:
             return "transformers"
     
@@ -239,7 +290,11 @@ class MainTab:
             language = self.default_language
 
         try:
+            chat_history_writer.discard(session_id)
             success = delete_session_history(session_id)
+            get_generation_registry().reset_usage(session_id)
+            session_speech_managers.discard(session_id)
+            history_cursors.pop(session_id, None)
             if not success:
                 return (
                     gr.update(visible=False),  # reset_modal
@@ -259,7 +314,7 @@ class MainTab:
             new_history = [default_system]
 
             # 새 히스토리 저장
-            save_chat_history_db(new_history, session_id=session_id)
+            chat_history_writer.write_through(session_id, save_chat_history_db, new_history, session_id=session_id)
             
             # chatbot 컴포넌트를 위한 메시지 필터링
             chatbot_history = self.filter_messages_for_chatbot(new_history)
@@ -297,7 +352,11 @@ class MainTab:
             language = self.default_language
 
         try:
+            chat_history_writer.discard()
             success = delete_all_sessions()
+            get_generation_registry().reset_usage()
+            session_speech_managers.discard()
+            history_cursors.clear()
             if not success:
                 return (
                     gr.update(visible=False),  # reset_modal
@@ -317,7 +376,7 @@ class MainTab:
             new_history = [default_system]
 
             # demo_session에 대해 새 히스토리 저장
-            save_chat_history_db(new_history, session_id="demo_session")
+            chat_history_writer.write_through("demo_session", save_chat_history_db, new_history, session_id="demo_session")
             
             # chatbot 컴포넌트를 위한 메시지 필터링
             chatbot_history = self.filter_messages_for_chatbot(new_history)
@@ -351,14 +410,41 @@ class MainTab:
         presets = get_preset_choices(language)
         return gr.update(choices=presets, value=presets[0] if presets else None)
     
+    @staticmethod
+    def session_choices(sessions):
+        """SessionInfo 목록을 Dropdown choices [(표시 이름, 세션 ID), ...]로 변환"""
+        choices = []
+        for info in sessions:
+            title = (info.title or "").replace("\n", " ").strip()
+            label = f"{title[:40]} ({info.id})" if title else info.id
+            choices.append((f"{label} · {info.message_count}개 메시지", info.id))
+        return choices
+
     def refresh_sessions(self):
         """
-        세션 목록을 갱신하고, (Dropdown) choices를 반환합니다.
+        세션 목록을 갱신하고, (Dropdown) choices를 반환합니다. (최근 활동순 첫 페이지)
         """
-        sessions = get_existing_sessions()
+        sessions, _ = list_sessions()
         if not sessions:
             return gr.update(choices=[], value=None), "DB에 세션이 없습니다."
-        return gr.update(choices=sessions, value=sessions[0])
+        return gr.update(choices=self.session_choices(sessions), value=sessions[0].id)
+
+    def search_sessions(self, query, page_cursor=None):
+        """
+        검색어로 세션 목록의 한 페이지를 불러옵니다.
+
+        Returns:
+            tuple: (Dropdown 업데이트, 다음 페이지 커서, 페이지 안내 문구)
+        """
+        sessions, next_cursor = list_sessions(after=page_cursor, query=query)
+        if not sessions:
+            return gr.update(choices=[], value=None), None, "검색 결과가 없습니다." if query else "DB에 세션이 없습니다."
+        info = f"{len(sessions)}개 세션" + (" (다음 페이지 있음)" if next_cursor else "")
+        return gr.update(choices=self.session_choices(sessions), value=sessions[0].id), next_cursor, info
+
+    def next_sessions_page(self, query, page_cursor):
+        """다음 페이지 세션 목록 (마지막 페이지였으면 처음부터 다시)"""
+        return self.search_sessions(query, page_cursor)
 
     def create_new_session(self, system_message_box_value: str):
         """
@@ -372,7 +458,7 @@ class MainTab:
         
         new_history = [system_message]
         # DB에 저장
-        save_chat_history_db(new_history, session_id=new_sid)
+        chat_history_writer.write_through(new_sid, save_chat_history_db, new_history, session_id=new_sid)
         return new_sid, f"현재 세션: {new_sid}", new_history
 
     def apply_session(self, chosen_sid: str):
@@ -381,7 +467,8 @@ class MainTab:
         """
         if not chosen_sid:
             return [], None, "세션 ID를 선택하세요."
-        loaded_history = load_chat_from_db(chosen_sid)
+        chat_history_writer.flush(chosen_sid)
+        loaded_history = self.load_session_window(chosen_sid)
         # last_activity 갱신
         with sqlite3.connect("chat_history.db") as conn:
             cursor = conn.cursor()
@@ -394,6 +481,44 @@ class MainTab:
             
         return loaded_history, chosen_sid, f"세션 {chosen_sid}이 적용되었습니다."
 
+    def load_session_window(self, session_id: str):
+        """
+        세션의 최근 HISTORY_PAGE_SIZE개 메시지만 불러오고, 이전 페이지 위치를 기억합니다.
+        """
+        loaded_history, before_seq = load_chat_window(session_id, limit=HISTORY_PAGE_SIZE)
+        if before_seq is None:
+            history_cursors.pop(session_id, None)
+        else:
+            history_cursors[session_id] = before_seq
+        return loaded_history
+
+    def load_older_history(self, session_id: str, history):
+        """
+        현재 히스토리 앞에 이전 메시지 한 페이지를 불러와 붙입니다.
+
+        Returns:
+            tuple: (new_history, chatbot_history, status)
+        """
+        before_seq = history_cursors.get(session_id)
+        if before_seq is None:
+            return history, self.filter_messages_for_chatbot(history), "더 불러올 이전 대화가 없습니다."
+        chat_history_writer.flush(session_id)
+        older, next_before_seq = load_chat_window(session_id, limit=HISTORY_PAGE_SIZE, before_seq=before_seq)
+        if next_before_seq is None:
+            history_cursors.pop(session_id, None)
+        else:
+            history_cursors[session_id] = next_before_seq
+
+        # system 메시지는 히스토리 맨 앞에 이미 있으므로 그 뒤에 이전 대화를 끼워 넣는다.
+        split = 0
+        while split < len(history) and history[split]["role"] == "system":
+            split += 1
+        if split:
+            older = [msg for msg in older if msg["role"] != "system"]
+        new_history = history[:split] + older + history[split:]
+        status = f"이전 메시지 {len(older)}개를 불러왔습니다." + ("" if next_before_seq is not None else " (처음까지 모두 불러옴)")
+        return new_history, self.filter_messages_for_chatbot(new_history), status
+
     def delete_session(self, chosen_sid: str, current_sid: str):
         """
         특정 세션 삭제 로직
@@ -416,17 +541,20 @@ class MainTab:
             )
             
         try:
+            chat_history_writer.discard(chosen_sid)
             conn = sqlite3.connect("chat_history.db")
             c = conn.cursor()
             c.execute("DELETE FROM chat_history WHERE session_id = ?", (chosen_sid,))
             conn.commit()
             conn.close()
+            session_speech_managers.discard(chosen_sid)
+            history_cursors.pop(chosen_sid, None)
 
-            sessions = get_existing_sessions()
+            sessions, _ = list_sessions()
             return (
                 gr.update(visible=False),  # hide modal
                 f"세션 '{chosen_sid}'이(가) 삭제되었습니다.",  # success message
-                gr.update(choices=sessions, value=sessions[0] if sessions else None)  # update dropdown
+                gr.update(choices=self.session_choices(sessions), value=sessions[0].id if sessions else None)  # update dropdown
             )
         except Exception as e:
             logger.error(f"세션 삭제 오류: {e}")
@@ -444,7 +572,11 @@ class MainTab:
         return gr.update(choices=presets, value=presets[0] if presets else None)
 
 
-    def process_character_conversation(self, history, selected_characters, model_type, selected_model, custom_path, image, api_key, device, seed):
+    def process_character_conversation(self, history, selected_characters, model_type, selected_model, custom_path, image, api_key, device, seed, session_id=None):
+        """
+        선택한 캐릭터들이 차례로 응답하는 대화를 생성합니다.
+        session_id는 중지 버튼과 세션 토큰 예산에 사용됩니다.
+        """
         try:
             for i, character in enumerate(selected_characters):
                 # 각 캐릭터의 시스템 메시지 설정
@@ -463,7 +595,8 @@ class MainTab:
                     image_input=image,
                     api_key=api_key,
                     device=device,
-                    seed=seed
+                    seed=seed,
+                    session_id=session_id
                 )
                 
                 history.append({
@@ -472,8 +605,8 @@ class MainTab:
                     "character": character
                 })
             
-            # 데이터베이스에 히스토리 저장
-            save_chat_history_db(history, session_id="character_conversation")
+            # 데이터베이스에 히스토리 저장 (write-behind 대기열)
+            chat_history_writer.submit(history, session_id="character_conversation")
             
             # 프로필 이미지는 None으로 반환
             return history, None  # 여기서 None을 반환하도록 수정
@@ -510,10 +643,11 @@ class MainTab:
         transformers_local = local_models_data["transformers"]
         gguf_local = local_models_data["gguf"]
         mlx_local = local_models_data["mlx"]
+        onnx_local = local_models_data["onnx"]
                 
         # "전체 목록"이면 => API 모델 + 모든 로컬 모델 + "사용자 지정 모델 경로 변경"
         if selected_type == "all":
-            all_models = api_models + transformers_local + gguf_local + mlx_local
+            all_models = api_models + transformers_local + gguf_local + mlx_local + onnx_local
             # 중복 제거 후 정렬
             all_models = sorted(list(dict.fromkeys(all_models)))
             return gr.update(choices=all_models, value=all_models[0] if all_models else None)
@@ -528,6 +662,8 @@ class MainTab:
             updated_list = gguf_local
         elif selected_type == "mlx":
             updated_list = mlx_local
+        elif selected_type == "onnx":
+            updated_list = onnx_local
         else:
         # 혹시 예상치 못한 값이면 transformers로 처리(또는 None)
             updated_list = transformers_local
@@ -610,7 +746,7 @@ def update_system_message_and_profile(
         # -- DB 업데이트 로직 추가 --
         # session_id가 유효하다면, 새 시스템 메시지를 DB에 반영
         if session_id:
-            update_system_message_in_db(session_id, system_message)
+            chat_history_writer.write_through(session_id, update_system_message_in_db, session_id, system_message)
 
         return system_message, selected_profile_image
     except ValueError as ve:
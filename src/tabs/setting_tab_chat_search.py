@@ -0,0 +1,93 @@
+import gradio as gr
+import logging
+from src.common.database import search_chat_history, SEARCH_PAGE_SIZE
+from src.common.chat_writer import chat_history_writer
+from src.tabs.main_tab import MainTab
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+main_tab=MainTab()
+
+def format_search_results(hits, query, offset, has_more):
+    """검색 결과를 Markdown 목록으로 변환"""
+    if not hits:
+        return f"'{query}'에 대한 검색 결과가 없습니다." if query else "검색어를 입력하세요."
+    lines = [f"**{offset + 1}–{offset + len(hits)}번째 결과**" + (" (다음 페이지 있음)" if has_more else "")]
+    for hit in hits:
+        title = hit.session_title or hit.session_id
+        snippet = hit.snippet.replace("\n", " ")
+        lines.append(f"- `{hit.session_id}` {title} · {hit.role} · {hit.timestamp or ''}\n  > {snippet}")
+    return "\n".join(lines)
+
+def run_search(query, offset=0):
+    """
+    검색을 실행하고 (결과 Markdown, 결과 세션 Dropdown 업데이트, 현재 offset)을 반환
+    """
+    offset = max(int(offset or 0), 0)
+    # 아직 기록되지 않은 최근 메시지도 검색되도록 대기열을 먼저 반영
+    chat_history_writer.flush()
+    hits, has_more = search_chat_history(query, limit=SEARCH_PAGE_SIZE, offset=offset)
+    session_ids = list(dict.fromkeys(hit.session_id for hit in hits))
+    return (
+        format_search_results(hits, query, offset, has_more),
+        gr.update(choices=session_ids, value=session_ids[0] if session_ids else None),
+        offset,
+    )
+
+def create_chat_search_tab(session_id_state, history_state, chatbot):
+    with gr.Tab("채팅 검색"):
+        gr.Markdown("### 채팅 기록 전체 검색")
+        with gr.Row():
+            search_box = gr.Textbox(
+                label="검색어",
+                placeholder="모든 세션의 메시지에서 검색 (공백으로 구분한 단어를 모두 포함)",
+                scale=4
+            )
+            search_btn = gr.Button("검색", variant="primary", scale=1)
+        search_results = gr.Markdown("")
+        search_offset_state = gr.State(0)
+        with gr.Row():
+            prev_page_btn = gr.Button("이전 페이지")
+            next_page_btn = gr.Button("다음 페이지")
+        with gr.Row():
+            result_session_dropdown = gr.Dropdown(
+                label="결과 세션",
+                choices=[],
+                value=None,
+                interactive=True
+            )
+            open_session_btn = gr.Button("세션 열기")
+        open_session_info = gr.Textbox(label="결과", interactive=False)
+
+        search_outputs = [search_results, result_session_dropdown, search_offset_state]
+        search_box.submit(
+            fn=lambda query: run_search(query, 0),
+            inputs=[search_box],
+            outputs=search_outputs
+        )
+        search_btn.click(
+            fn=lambda query: run_search(query, 0),
+            inputs=[search_box],
+            outputs=search_outputs
+        )
+        next_page_btn.click(
+            fn=lambda query, offset: run_search(query, offset + SEARCH_PAGE_SIZE),
+            inputs=[search_box, search_offset_state],
+            outputs=search_outputs
+        )
+        prev_page_btn.click(
+            fn=lambda query, offset: run_search(query, offset - SEARCH_PAGE_SIZE),
+            inputs=[search_box, search_offset_state],
+            outputs=search_outputs
+        )
+
+        open_session_btn.click(
+            fn=main_tab.apply_session,
+            inputs=[result_session_dropdown],
+            outputs=[history_state, session_id_state, open_session_info]
+        ).then(
+            fn=main_tab.filter_messages_for_chatbot,
+            inputs=[history_state],
+            outputs=[chatbot]
+        )
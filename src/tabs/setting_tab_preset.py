@@ -1,5 +1,6 @@
 import gradio as gr
 from src.common.database import preset_exists, handle_add_preset, load_system_presets, save_chat_history_db, get_preset_choices, handle_delete_preset
+from src.common.chat_writer import chat_history_writer
 from src.tabs.main_tab import MainTab
 import logging
 
@@ -44,7 +45,7 @@ def apply_preset(name, session_id, history, language=None):
         
     # 현재 세션의 히스토리를 초기화하고 시스템 메시지 추가
     new_history = [{"role": "system", "content": content}]
-    success = save_chat_history_db(new_history, session_id=session_id)
+    success = chat_history_writer.write_through(session_id, save_chat_history_db, new_history, session_id=session_id)
     if not success:
         return "❌ 프리셋 적용 중 오류가 발생했습니다.", history, gr.update()
     logger.info(f"'{name}' 프리셋을 적용하여 세션을 초기화했습니다.")
@@ -1,5 +1,6 @@
 import gradio as gr
 from src.common.database import save_chat_history_db, save_chat_history_csv, save_chat_button_click
+from src.common.chat_writer import chat_history_writer
 
 def create_save_history_tab(history_state):
     with gr.Tab("채팅 기록 저장"):
@@ -24,7 +25,7 @@ def create_save_history_tab(history_state):
         def save_chat_button_click_db(history):
             if not history:
                 return "채팅 이력이 없습니다."
-            ok = save_chat_history_db(history, session_id="demo_session")
+            ok = chat_history_writer.write_through("demo_session", save_chat_history_db, history, session_id="demo_session")
             if ok:
                 return f"✅ DB에 채팅 기록이 저장되었습니다 (session_id=demo_session)"
             else:
@@ -8,8 +8,17 @@ def create_session_management_tab(session_id_state, history_state, session_selec
     setting_session_management_tab = gr.Tab("세션 관리")
     with setting_session_management_tab:
         gr.Markdown("### 세션 관리")
+        with gr.Row():
+            session_search_box = gr.Textbox(
+                label="세션 검색",
+                placeholder="세션 ID 또는 첫 질문으로 검색",
+                scale=3
+            )
+            session_page_info = gr.Markdown("")
+        session_page_cursor = gr.State(None)  # 다음 페이지 커서 (last_activity, id)
         with gr.Row():
             refresh_sessions_btn = gr.Button("세션 목록 갱신")
+            next_sessions_page_btn = gr.Button("다음 페이지")
             existing_sessions_dropdown = gr.Dropdown(
                 label="기존 세션 목록",
                 choices=[],  # 초기에는 비어 있다가, 버튼 클릭 시 갱신
@@ -44,10 +53,22 @@ def create_session_management_tab(session_id_state, history_state, session_selec
             outputs=[current_session_display]
         )
                         
+        # 검색어가 바뀌거나 갱신하면 첫 페이지부터 (최근 활동순)
+        session_search_box.submit(
+            fn=main_tab.search_sessions,
+            inputs=[session_search_box],
+            outputs=[existing_sessions_dropdown, session_page_cursor, session_page_info]
+        )
+        next_sessions_page_btn.click(
+            fn=main_tab.next_sessions_page,
+            inputs=[session_search_box, session_page_cursor],
+            outputs=[existing_sessions_dropdown, session_page_cursor, session_page_info]
+        )
+                        
         refresh_sessions_btn.click(
-            fn=main_tab.refresh_sessions,
-            inputs=[],
-            outputs=[existing_sessions_dropdown]
+            fn=main_tab.search_sessions,
+            inputs=[session_search_box],
+            outputs=[existing_sessions_dropdown, session_page_cursor, session_page_info]
         ).then(
             fn=main_tab.refresh_sessions,
             inputs=[],
@@ -1,5 +1,5 @@
 import gradio as gr
-from src.common.utils import convert_and_save
+from src.common.utils import convert_and_save, convert_and_save_multi
 
 def create_util_tab():
     with gr.Tab("유틸리티"):
@@ -13,8 +13,39 @@ def create_util_tab():
             quant_type = gr.Radio(choices=["float8", "int8", "int4"], label="변환 유형", value="int8")
         with gr.Row():
             push_to_hub = gr.Checkbox(label="Hugging Face Hub에 푸시", value=False)
+            streaming = gr.Checkbox(
+                label="저메모리 스트리밍 변환",
+                value=False,
+                info="safetensors 샤드를 텐서 단위로 양자화하여 전체 모델을 메모리에 올리지 않습니다."
+            )
             
         convert_button = gr.Button("모델 변환 시작")
         output = gr.Textbox(label="결과")
             
-        convert_button.click(fn=convert_and_save, inputs=[model_id, output_dir, push_to_hub, quant_type], outputs=output)
\ No newline at end of file
+        convert_button.click(
+            fn=lambda model_id, output_dir, push_to_hub, quant_type, streaming: convert_and_save(
+                model_id, output_dir, push_to_hub, quant_type, streaming=streaming
+            ),
+            inputs=[model_id, output_dir, push_to_hub, quant_type, streaming],
+            outputs=output
+        )
+
+        gr.Markdown("### 다중 변형 변환")
+        gr.Markdown("원본 모델을 한 번만 읽어 여러 양자화 변형을 병렬로 생성하고, 결과를 JSON 매니페스트로 기록합니다.")
+
+        with gr.Row():
+            multi_model_id = gr.Textbox(label="HuggingFace 모델 ID", placeholder="예: gpt2")
+            multi_quant_types = gr.CheckboxGroup(
+                choices=["int8", "int4", "float8"],
+                value=["int8", "int4", "float8"],
+                label="생성할 변형"
+            )
+
+        multi_convert_button = gr.Button("다중 변형 변환 시작")
+        multi_output = gr.Textbox(label="결과")
+
+        multi_convert_button.click(
+            fn=convert_and_save_multi,
+            inputs=[multi_model_id, multi_quant_types],
+            outputs=multi_output
+        )